@@ -0,0 +1,130 @@
+# announcements.py
+import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AnnouncementCache:
+    """Nagrania zapowiedzi budzików i przypomnień syntezowane przed terminem.
+
+    Harmonogram woła `prepare` kilka minut przed terminem; synteza idzie
+    w tle (jeden wątek, żeby nie obciążać limitu Eleven Labs), a gotowe
+    PCM trzymane jest w pamięci pod kluczem (rodzaj, id) razem z tekstem.
+    W chwili uruchomienia `take` zwraca nagranie tylko dla niezmienionego
+    tekstu. Zmiana lub usunięcie wpisu (`invalidate`) usuwa nagranie
+    i porzuca trwającą syntezę. Nieudana synteza jest ponawiana co
+    `retry_seconds`, dopóki zdąży przed terminem. Łączny rozmiar nagrań
+    ograniczony jest do `memory_limit_bytes` - najdawniej używane wypadają.
+    """
+
+    def __init__(self, synthesize, memory_limit_bytes=4 * 1024 * 1024, retry_seconds=30.0,
+                 now=datetime.datetime.now):
+        self._synthesize = synthesize
+        self.memory_limit_bytes = memory_limit_bytes
+        self.retry_seconds = retry_seconds
+        self.now = now
+        self._entries = OrderedDict()  # (rodzaj, id) -> (tekst, nagranie)
+        self._bytes = 0
+        self._tokens = {}  # (rodzaj, id) -> znacznik bieżącego zlecenia syntezy
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="announcement")
+        self.rendered = 0
+        self.reused = 0
+        self.failed = 0
+        self.hits = 0
+        self.misses = 0
+
+    def prepare(self, key, text, due):
+        """Zleć syntezę zapowiedzi `text` na termin `due` (datetime); nie blokuje."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == text:
+                self._entries.move_to_end(key)
+                self.reused += 1  # powtarzany wpis - nagranie z poprzedniego terminu jest aktualne
+                return
+            token = object()
+            self._tokens[key] = token
+        self._executor.submit(self._render, key, text, due, token)
+
+    def take(self, key, text, keep=False):
+        """Gotowe nagranie dla tekstu albo None; bez `keep` wpis jest zwalniany (jednorazowy termin)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != text:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if keep:
+                self._entries.move_to_end(key)
+            else:
+                self._forget(key)
+            return entry[1]
+
+    def invalidate(self, key):
+        with self._lock:
+            self._tokens.pop(key, None)
+            self._forget(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "pending": len(self._tokens),
+                "rendered": self.rendered,
+                "reused": self.reused,
+                "failed": self.failed,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    def _render(self, key, text, due, token):
+        with self._lock:
+            if self._tokens.get(key) is not token:
+                return  # wpis zmieniony albo usunięty w międzyczasie
+        try:
+            audio = self._synthesize(text)
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            retry_at = self.now() + datetime.timedelta(seconds=self.retry_seconds)
+            if retry_at < due:
+                print(f"Błąd syntezy zapowiedzi \"{text}\", ponowienie za {self.retry_seconds:.0f} s: {e}")
+                timer = threading.Timer(self.retry_seconds, self._retry, args=(key, text, due, token))
+                timer.daemon = True
+                timer.start()
+            else:
+                print(f"Błąd syntezy zapowiedzi \"{text}\" - zostanie wypowiedziana na bieżąco: {e}")
+                self._finish(key, token)
+            return
+        with self._lock:
+            if self._tokens.get(key) is not token:
+                return
+            del self._tokens[key]
+            if not audio or len(audio) > self.memory_limit_bytes:
+                return
+            self._forget(key)
+            self._entries[key] = (text, audio)
+            self._bytes += len(audio)
+            while self._bytes > self.memory_limit_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+            self.rendered += 1
+
+    def _retry(self, key, text, due, token):
+        try:
+            self._executor.submit(self._render, key, text, due, token)
+        except RuntimeError:
+            pass  # wykonawca zamknięty przy wyłączaniu
+
+    def _finish(self, key, token):
+        with self._lock:
+            if self._tokens.get(key) is token:
+                del self._tokens[key]
+
+    # Wywoływane z założoną blokadą
+    def _forget(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
@@ -1,13 +1,14 @@
 import os
 import sys
 import time
+_PROCESS_START = time.perf_counter()
 import threading
 import traceback
-import json
 import random
 import datetime
 import difflib
-from flask import Flask, jsonify, request, send_from_directory
+import functools
+from flask import Flask, Response, g, jsonify, make_response, request
 from flask_socketio import SocketIO, emit
 from dotenv import load_dotenv
 import psutil
@@ -18,9 +19,29 @@ try:
 except ImportError:
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
     from assistant import VoiceAssistant
+from streaming import SentenceSplitter, SentenceSpeaker
+from storage import Storage
+from scheduler import EventScheduler, REPEAT_DAYS
+from system_metrics import SystemSampler
+from jobs import JobExecutor, JobQueueFull
+from stt_sessions import RecognizerPool, SessionRejected
+from speech_queue import PRIORITY_ALARM, PRIORITY_REMINDER, PRIORITY_CONVERSATION, PRIORITY_SYSTEM
+from startup import StartupProfiler
+from conversation_log import ConversationLog
+from metrics import metrics
+from compression import Compressor
+from assets import AssetManifest
+from announcements import AnnouncementCache
+
+# Pomiar czasu kolejnych faz startu (wynik w logu i w /api/health)
+profiler = StartupProfiler(_PROCESS_START)
+profiler.record("importy", _PROCESS_START)
 
 # Wczytaj zmienne środowiskowe
 load_dotenv()
+# Metryki (/api/metrics); METRICS_DEBUG=1 wysyła też podsumowanie opóźnień do panelu w GUI
+metrics.enabled = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_DEBUG = os.getenv("METRICS_DEBUG", "0") == "1"
 
 # Ścieżki i konfiguracja aplikacji
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -28,66 +49,218 @@ FRONTEND_PATH = os.path.abspath(os.path.join(BASE_DIR, '../frontend/public'))
 
 app = Flask(__name__, static_folder=FRONTEND_PATH, static_url_path='/')
 socketio = SocketIO(app, cors_allowed_origins="*")
+# Odciski plików frontendu (adresy ?v=... z długim cache) i kompresja odpowiedzi (HTTP_COMPRESSION=0 wyłącza)
+asset_manifest = AssetManifest(FRONTEND_PATH)
+compressor = Compressor() if os.getenv("HTTP_COMPRESSION", "1") == "1" else None
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    start = g.get('request_start')
+    if start is not None and metrics.enabled:
+        route = request.url_rule.rule if request.url_rule else "nieznana"
+        metrics.observe("http_request_duration_seconds", time.perf_counter() - start,
+                        route=route, method=request.method, status=str(response.status_code))
+    return response
+
+@app.after_request
+def cache_and_compress(response):
+    # Zarejestrowana po pomiarze czasu, więc wykonuje się przed nim - kompresja wlicza się w czas zapytania
+    if request.endpoint == 'static':
+        filename = (request.view_args or {}).get('filename', '')
+        if asset_manifest.is_current(filename, request.args.get('v')):
+            response.cache_control.no_cache = None  # send_file ustawia no-cache domyślnie
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            # Adres bez odcisku - przeglądarka sprawdza ETag przy każdym użyciu
+            response.cache_control.no_cache = True
+    if compressor is not None:
+        compressor.apply(response, request.accept_encodings)
+    return response
 
-# Inicjalizacja asystenta
-assistant = VoiceAssistant(socketio)
+# Magazyn danych (SQLite); dawne pliki JSON importowane są przy pierwszym uruchomieniu
+SETTINGS_FILE = "settings.json"
+DB_FILE = os.getenv("DB_FILE", os.path.join(BASE_DIR, "nova.db"))
+with profiler.phase("magazyn SQLite"):
+    storage = Storage(DB_FILE)
+    storage.import_legacy_json(
+        notes_file=os.getenv("NOTES_FILE", os.path.join(BASE_DIR, "..", "notes.json")),
+        alarms_file="alarms.json",
+        reminders_file="reminders.json",
+        settings_file=SETTINGS_FILE
+    )
+
+# Trwały log rozmowy - klienci po ponownym połączeniu dociągają tylko brakujące wpisy
+conversation_log = ConversationLog(
+    os.getenv("CONVERSATION_DIR", os.path.join(BASE_DIR, "conversation")),
+    capacity=int(os.getenv("CONVERSATION_LOG_SIZE", "1000"))
+)
+
+# Inicjalizacja asystenta (bez modelu Vosk - ten ładuje się w tle po starcie serwera)
+with profiler.phase("inicjalizacja asystenta"):
+    assistant = VoiceAssistant(socketio, storage=storage)
 assistant_active = True
 is_listening = False
 force_listen = False
 
-# Globalne zmienne dla budzików i przypomnień
-alarms = []
-reminders = []
-SETTINGS_FILE = "settings.json"
+# Mowa z mikrofonu przeglądarki: wspólny model Vosk, osobny rozpoznawacz na każdego klienta Socket.IO
+def on_browser_stt_result(sid, kind, text):
+    """Wyniki sesji trafiają tylko do pokoju klienta; wynik końcowy jest komendą dla asystenta."""
+    if kind == "partial":
+        socketio.emit('stt_partial', {"text": text}, to=sid)
+        return
+    socketio.emit('stt_result', {"text": text}, to=sid)
+    update_conversation("Użytkownik", text)
+    try:
+        jobs.submit("browser_command", browser_command_job, text, owner=sid)
+    except JobQueueFull as e:
+        print(e)
+        socketio.emit('job_update', {"name": "browser_command", "status": "rejected",
+                                     "error": "Asystent jest zajęty, spróbuj za chwilę."}, to=sid)
+
+stt_pool = RecognizerPool(
+    lambda: assistant.model_vosk,
+    sample_rate=assistant.sample_rate,
+    max_sessions=int(os.getenv("BROWSER_STT_SESSIONS", "8")),
+    workers=int(os.getenv("BROWSER_STT_WORKERS", str(os.cpu_count() or 2))),
+    max_pending_seconds=float(os.getenv("BROWSER_STT_MAX_QUEUE_SECONDS", "2.0")),
+    use_vad=assistant.vad_enabled,
+    on_result=on_browser_stt_result,
+    recognizer_factory=assistant.new_recognizer
+)
+
+# Stałe kwestie asystenta - syntezowane z wyprzedzeniem przy starcie (cache TTS)
+FIXED_PHRASES = [
+    "Jestem gotowa do działania",
+    "Tak, słucham?",
+    "Słucham?",
+    "Do usłyszenia!",
+    "Powiedz treść notatki...",
+    "Nie masz jeszcze żadnych notatek.",
+    "Kończę nasłuchiwanie. Miłego dnia!",
+]
 
 # Funkcja do aktualizacji konwersacji w GUI
-def update_conversation(speaker, text):
-    timestamp = time.strftime("%H:%M:%S")
-    entry = {"speaker": speaker, "text": text, "timestamp": timestamp}
+def update_conversation(speaker, text, message_id=None, done=True):
+    """Wyślij wpis do panelu rozmowy.
+
+    Z `message_id` wpis jest przyrostowy: GUI dokleja `text` do wiadomości
+    o tym samym id, a `done` oznacza koniec strumieniowanej odpowiedzi.
+    Pełne wpisy trafiają do logu rozmowy i dostają numer `seq` (kursor klienta).
+    """
+    if message_id is None:
+        entry = conversation_log.append(speaker, text)
+    else:
+        logged = conversation_log.stream(message_id, speaker, text, done)
+        entry = {"speaker": speaker, "text": text, "timestamp": time.strftime("%H:%M:%S"),
+                 "id": message_id, "delta": True, "done": done}
+        if logged is not None:
+            entry["seq"] = logged["seq"]
     socketio.emit('conversation_update', entry)
 
-# Funkcje do obsługi budzików i przypomnień
-def load_alarms():
-    """Wczytaj budziki z pliku JSON."""
-    global alarms
-    try:
-        if os.path.exists("alarms.json"):
-            with open("alarms.json", "r", encoding="utf-8") as f:
-                alarms = json.load(f)
-        else:
-            alarms = []
-    except Exception as e:
-        print(f"Błąd ładowania budzików: {e}")
-        alarms = []
-
-def save_alarms():
-    """Zapisz budziki do pliku JSON."""
-    try:
-        with open("alarms.json", "w", encoding="utf-8") as f:
-            json.dump(alarms, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"Błąd zapisu budzików: {e}")
-
-def load_reminders():
-    """Wczytaj przypomnienia z pliku JSON."""
-    global reminders
-    try:
-        if os.path.exists("reminders.json"):
-            with open("reminders.json", "r", encoding="utf-8") as f:
-                reminders = json.load(f)
-        else:
-            reminders = []
-    except Exception as e:
-        print(f"Błąd ładowania przypomnień: {e}")
-        reminders = []
-
-def save_reminders():
-    """Zapisz przypomnienia do pliku JSON."""
-    try:
-        with open("reminders.json", "w", encoding="utf-8") as f:
-            json.dump(reminders, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"Błąd zapisu przypomnień: {e}")
+def report_first_audio():
+    latency = assistant.last_first_audio_at - assistant.last_recognition_time
+    print(f"Opóźnienie od końca mowy do pierwszego słowa odpowiedzi: {latency * 1000:.0f} ms")
+
+def respond(command):
+    """Odpowiedz na komendę; odpowiedź AI trafia do GUI i TTS zdanie po zdaniu, w trakcie generowania."""
+    with metrics.span("respond"):
+        return _respond(command)
+
+def _respond(command):
+    message_id = f"nowa-{time.time_ns()}"
+    splitter = SentenceSplitter()
+    speaker = SentenceSpeaker(assistant.tts_speak, on_first_audio=report_first_audio)
+    streamed = []
+
+    def on_delta(delta):
+        streamed.append(delta)
+        update_conversation("Nowa", delta, message_id=message_id, done=False)
+        for sentence in splitter.feed(delta):
+            speaker.say(sentence)
+
+    response = assistant.run_ai(command, on_delta=on_delta)
+    if streamed:
+        for sentence in splitter.flush():
+            speaker.say(sentence)
+        update_conversation("Nowa", "", message_id=message_id, done=True)
+    if not streamed or response != "".join(streamed):
+        # Komenda lokalna albo błąd w trakcie strumienia
+        update_conversation("Nowa", response)
+        speaker.say(response)
+    speaker.finish()
+    # Między zdaniami mikrofon był chwilowo otwarty - pomiń ewentualny pogłos
+    assistant.skip_buffered_audio()
+    return response
+
+# Budziki i przypomnienia - jeden harmonogram zamiast wątków sprawdzających co 30 s
+def announcement_text(kind, item):
+    if kind == "alarm":
+        return f"Czas na budzik: {item.get('label', '') or item['time']}"
+    return f"Przypomnienie: {item['content']}"
+
+def on_scheduled_event(kind, item, repeats):
+    """Uruchom budzik lub przypomnienie; jednorazowe wpisy są po tym wyłączane."""
+    if kind == "alarm":
+        socketio.emit('alarm_triggered', item)
+        if not repeats:
+            storage.alarms.update(item['id'], active=False) # Wyłącz alarm po aktywacji
+        priority = PRIORITY_ALARM
+    else:
+        socketio.emit('reminder_triggered', item)
+        if not repeats:
+            storage.reminders.update(item['id'], active=False) # Wyłącz przypomnienie po aktywacji
+        priority = PRIORITY_REMINDER
+    # Zapowiedź zsyntezowana przed terminem gra od razu z pamięci; bez niej - synteza na bieżąco
+    text = announcement_text(kind, item)
+    audio = announcements.take((kind, item['id']), text, keep=repeats)
+    return assistant.tts_speak(text, priority, audio=audio)
+
+def prepare_announcement(kind, item, when):
+    if assistant.tts_model_loaded:
+        announcements.prepare((kind, item['id']), announcement_text(kind, item), when)
+
+# Zapowiedzi syntezowane ANNOUNCE_LEAD_SECONDS przed terminem (0 wyłącza)
+ANNOUNCE_LEAD_SECONDS = float(os.getenv("ANNOUNCE_LEAD_SECONDS", "600"))
+announcements = AnnouncementCache(
+    assistant.synthesize_pcm,
+    memory_limit_bytes=int(os.getenv("ANNOUNCE_CACHE_MB", "4")) * 1024 * 1024,
+    retry_seconds=float(os.getenv("ANNOUNCE_RETRY_SECONDS", "30"))
+)
+scheduler = EventScheduler(
+    on_scheduled_event,
+    lead=ANNOUNCE_LEAD_SECONDS,
+    on_prepare=prepare_announcement if ANNOUNCE_LEAD_SECONDS > 0 else None,
+    on_discard=lambda kind, item_id: announcements.invalidate((kind, item_id))
+)
+
+# Statystyki systemu - jeden wątek próbkujący; Socket.IO dostaje tylko istotne zmiany
+system_sampler = SystemSampler(
+    interval=float(os.getenv("SYSTEM_SAMPLE_INTERVAL", "1.0")),
+    threshold=float(os.getenv("SYSTEM_PUSH_THRESHOLD", "2.0")),
+    on_change=lambda sample: socketio.emit('system_stats', sample)
+)
+
+def parse_schedule(data):
+    """Wyciągnij z żądania czas HH:MM, opcjonalną datę i powtarzanie."""
+    # 'time' może być w formacie 'HH:MM' albo 'YYYY-MM-DDTHH:MM' (datetime-local)
+    raw_time = data['time']
+    fields = {"time": raw_time}
+    if 'T' in raw_time and len(raw_time) >= 16:
+        fields["date"] = raw_time[:10]
+        fields["time"] = raw_time[11:16]
+    elif data.get('date'):
+        fields["date"] = data['date']
+    repeat = data.get('repeat')
+    if repeat in REPEAT_DAYS or repeat == "weekly":
+        fields["repeat"] = repeat
+    return fields
 
 # Funkcja do porównywania podobieństwa tekstów
 def is_similar(a, b, threshold=0.8):
@@ -96,31 +269,206 @@ def is_similar(a, b, threshold=0.8):
         return False
     return difflib.SequenceMatcher(None, a, b).ratio() > threshold
 
+# Warunkowe GET dla kolekcji (notatki, budziki, przypomnienia, ustawienia)
+def conditional(*tables):
+    """ETag z wersji kolekcji w magazynie; aktualny If-None-Match daje 304 bez odczytu z bazy."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = storage.version(*tables)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+            response.set_etag(etag)
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
 # Endpointy API
 @app.route('/')
 def index():
-    """Serwuj plik index.html."""
-    return send_from_directory(FRONTEND_PATH, 'index.html')
+    """Serwuj index.html z odnośnikami do wersjonowanych plików (main.js?v=...)."""
+    html, etag = asset_manifest.render_page()
+    response = make_response(html)
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def current_settings():
+    return storage.settings.get_all() or {"city": "Szczecin", "mac": ""}
+
+@app.route('/api/bootstrap')
+def bootstrap_api():
+    """Stan paneli przy ładowaniu strony w jednej odpowiedzi; ETag z treści (pogoda nie ma wersji).
+
+    Statystyki systemu przychodzą przez Socket.IO przy połączeniu.
+    """
+    weather, _, _ = assistant.weather_cache.get(os.getenv("DEFAULT_CITY", "Szczecin"))
+    response = jsonify({
+        "weather": weather,
+        "notes": assistant.get_notes(),
+        "alarms": storage.alarms.list(),
+        "reminders": storage.reminders.list(),
+        "settings": current_settings()
+    })
+    response.add_etag()
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @app.route('/api/weather')
 def weather_api():
-    """Zwróć dane pogodowe."""
+    """Zwróć dane pogodowe (z cache; wiek danych w nagłówkach Age i X-Cache)."""
     city = request.args.get('city', os.getenv("DEFAULT_CITY", "Szczecin"))
-    weather = assistant.get_weather(city)
-    return jsonify(weather)
+    weather, age, status = assistant.weather_cache.get(city)
+    response = jsonify(weather)
+    if "error" not in weather:
+        response.headers['Age'] = str(int(age))
+        response.headers['Cache-Control'] = f"max-age={max(0, int(assistant.weather_cache.ttl - age))}"
+    response.headers['X-Cache'] = status.upper()
+    return response
+
+@app.route('/api/weather/stats')
+def weather_stats_api():
+    """Liczniki cache pogody (trafienia, chybienia, odświeżenia)."""
+    return jsonify(assistant.weather_cache.stats())
+
+@app.route('/api/ai/cache/stats')
+def ai_cache_stats_api():
+    """Skuteczność cache odpowiedzi AI (trafienia, zaoszczędzony czas oczekiwania)."""
+    return jsonify(assistant.ai_cache.stats())
+
+@app.route('/api/announcements/stats')
+def announcements_stats_api():
+    """Zapowiedzi budzików i przypomnień przygotowane przed terminem (w pamięci, w trakcie syntezy, trafienia)."""
+    return jsonify({"lead_seconds": ANNOUNCE_LEAD_SECONDS, **announcements.stats()})
+
+@app.route('/api/http/stats')
+def http_stats_api():
+    """Zapytania do zewnętrznych API według endpointu (liczba, błędy, średni i najdłuższy czas w ms)."""
+    return jsonify(assistant.http.stats())
+
+@app.route('/api/metrics')
+def metrics_api():
+    """Liczniki i histogramy czasów etapów w formacie tekstowym Prometheusa."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/api/metrics/stages')
+def metrics_stages_api():
+    """Podsumowanie czasów etapów (ms: ostatni, średni, p50, p95) dla panelu opóźnień."""
+    return jsonify(metrics.stages())
+
+def emit_latency_stats(interval=2.0):
+    while True:
+        time.sleep(interval)
+        socketio.emit('latency_stats', metrics.stages())
+
+@app.route('/api/wake_word')
+def wake_word_api():
+    """Zwróć statystyki detektora słowa aktywującego (CPU, fałszywe akceptacje/odrzucenia)."""
+    if not assistant.wake_detector:
+        return jsonify({"error": "Detektor słowa aktywującego niedostępny"}), 503
+    return jsonify(assistant.wake_detector.stats())
+
+@app.route('/api/stt/sessions')
+def stt_sessions_api():
+    """Sesje rozpoznawania mowy z przeglądarek (kolejka, opóźnienie, odrzucone kawałki, szybkość dekodowania)."""
+    return jsonify(stt_pool.stats())
+
+@app.route('/api/stt/workers')
+def stt_workers_api():
+    """Procesy dekodujące STT_WORKERS (pid, restarty, liczba wywołań, czas CPU dekodowania)."""
+    if assistant.stt_workers is None:
+        return jsonify({"enabled": False, "requested": assistant.stt_worker_count})
+    return jsonify({"enabled": True, **assistant.stt_workers.stats()})
+
+@app.route('/api/vad')
+def vad_api():
+    """Zwróć statystyki bramki VAD (pominięte bloki, oszczędzony czas CPU rozpoznawacza).
+
+    Nasłuchiwania STT raportowane są osobno dla każdego odbiorcy
+    ("command" - główna pętla, "note" - notatki głosowe).
+    """
+    wake_vad = assistant.wake_detector.vad if assistant.wake_detector else None
+    return jsonify({
+        "enabled": assistant.vad_enabled,
+        "wake_word": wake_vad.stats() if wake_vad else None,
+        "stt": {consumer: vad.stats() for consumer, vad in list(assistant.stt_vads.items())}
+        if assistant.vad_enabled else None
+    })
+
+@app.route('/api/health')
+def health_api():
+    """Gotowość podsystemów (STT, TTS, magazyn); 503, dopóki serwer nie jest w pełni gotowy."""
+    try:
+        storage.connection().execute("SELECT 1")
+        storage_status = "ready"
+    except Exception as e:
+        print(f"Błąd sprawdzania magazynu: {e}")
+        storage_status = "error"
+    subsystems = {
+        "stt": assistant.stt_status(),
+        "tts": "ready" if assistant.tts_model_loaded else "disabled",
+        "storage": storage_status,
+        "microphone": "ready" if assistant.capture.running else "stopped",
+        "scheduler": "ready" if scheduler.running else "stopped"
+    }
+    ready = subsystems["stt"] == "ready" and storage_status == "ready"
+    return jsonify({
+        "status": "ready" if ready else ("starting" if subsystems["stt"] == "loading" else "degraded"),
+        "subsystems": subsystems,
+        "stt_error": assistant.model_error,
+        "uptime": round(profiler.elapsed(), 1),
+        "startup": profiler.phases()
+    }), 200 if ready else 503
+
+def current_system_sample():
+    sample = system_sampler.latest()
+    if sample is None:
+        # Próbkowanie jeszcze nie ruszyło - szybki odczyt bez czekania
+        return {"cpu": psutil.cpu_percent(interval=None), "ram": psutil.virtual_memory().percent}
+    return sample
 
 @app.route('/api/system')
 def system_api():
-    """Zwróć statystyki systemowe (CPU, RAM)."""
-    cpu = psutil.cpu_percent(interval=0.5)
-    ram = psutil.virtual_memory().percent
-    return jsonify({"cpu": cpu, "ram": ram})
+    """Zwróć ostatnią próbkę statystyk systemowych (CPU, RAM, rdzenie, sieć, dysk)."""
+    return jsonify(current_system_sample())
+
+@app.route('/api/system/history')
+def system_history_api():
+    """Historia statystyk: ?window=sekundy&points=liczba_punktów (uśrednione)."""
+    window = request.args.get('window', 300, type=float)
+    points = request.args.get('points', 60, type=int)
+    return jsonify(system_sampler.history(window=window, points=max(1, min(points, 1000))))
+
+@app.route('/api/conversation')
+def conversation_api():
+    """Log rozmowy: ?after=seq (nowsze wpisy) albo ?before=seq (starsze strony), &limit=."""
+    after = request.args.get('after', type=int)
+    before = request.args.get('before', type=int)
+    limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+    entries, more, gap = conversation_log.page(after=after, before=before, limit=limit)
+    # reset: kursor `after` spoza zachowanego logu - zwrócone są najnowsze wpisy, historię trzeba przeładować
+    return jsonify({"entries": entries, "more": more, "last_seq": conversation_log.last_seq, "reset": gap})
 
 # Endpointy do zarządzania notatkami
 @app.route('/api/notes', methods=['GET'])
+@conditional("notes")
 def get_notes_api():
-    notes = assistant.get_notes()
-    return jsonify(notes)
+    """Bez parametrów pełna lista; ?q= wyszukiwanie, ?cursor=&limit= stronicowanie ({"items", "next_cursor"})."""
+    query = request.args.get('q', '').strip()
+    if not query and 'cursor' not in request.args and 'limit' not in request.args:
+        return jsonify(assistant.get_notes())
+    limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+    cursor = max(0, request.args.get('cursor', 0, type=int))
+    if query:
+        # Kursor wyników wyszukiwania to przesunięcie w rankingu
+        items, total = assistant.search_notes(query, offset=cursor, limit=limit)
+        next_cursor = cursor + limit if cursor + limit < total else None
+        return jsonify({"items": items, "next_cursor": next_cursor, "total": total})
+    items, next_cursor = storage.notes.page(after=cursor, limit=limit)
+    return jsonify({"items": items, "next_cursor": next_cursor})
 
 @app.route('/api/notes', methods=['POST'])
 def add_note_api():
@@ -138,56 +486,46 @@ def delete_note_api(note_id):
 
 # Endpointy do zarządzania budzikami
 @app.route('/api/alarms', methods=['GET'])
+@conditional("alarms")
 def get_alarms_api():
-    load_alarms()
-    return jsonify(alarms)
+    return jsonify(storage.alarms.list())
 
 @app.route('/api/alarms', methods=['POST'])
 def add_alarm_api():
     data = request.get_json()
     if not data or 'time' not in data:
         return jsonify({"error": "Brak czasu budzika"}), 400
-    
-    # Przetwórz czas na format HH:MM, jeśli przyszedł w innym formacie (np. datetime-local)
-    # Zakładamy, że 'time' może być w formacie 'YYYY-MM-DDTHH:MM'
-    alarm_time = data['time']
-    if 'T' in alarm_time and len(alarm_time) > 16: # Sprawdzamy, czy to pełna data-czas
-        alarm_time = alarm_time[11:16] # Wycinamy tylko HH:MM
 
     alarm_id = int(time.time()) + random.randint(1, 1000)
     alarm = {
         "id": alarm_id,
-        "time": alarm_time,
         "label": data.get('label', ''),
         "active": True
     }
-    load_alarms()
-    alarms.append(alarm)
-    save_alarms()
+    alarm.update(parse_schedule(data))
+    storage.alarms.insert(alarm)
+    scheduler.upsert("alarm", alarm)
     return jsonify({"message": "Budzik dodany!"})
 
 @app.route('/api/alarms/<int:alarm_id>', methods=['DELETE'])
 def delete_alarm_api(alarm_id):
-    load_alarms()
-    alarms[:] = [a for a in alarms if a['id'] != alarm_id]
-    save_alarms()
+    storage.alarms.delete(alarm_id)
+    scheduler.cancel("alarm", alarm_id)
     return jsonify({"message": "Budzik usunięty!"})
 
 @app.route('/api/alarms/<int:alarm_id>/toggle', methods=['PUT'])
 def toggle_alarm_api(alarm_id):
     data = request.get_json()
-    load_alarms()
-    for alarm in alarms:
-        if alarm['id'] == alarm_id:
-            alarm['active'] = data.get('active', True)
-    save_alarms()
+    alarm = storage.alarms.update(alarm_id, active=data.get('active', True))
+    if alarm:
+        scheduler.upsert("alarm", alarm)
     return jsonify({"message": "Status budzika zmieniony!"})
 
 # Endpointy do zarządzania przypomnieniami
 @app.route('/api/reminders', methods=['GET'])
+@conditional("reminders")
 def get_reminders_api():
-    load_reminders()
-    return jsonify(reminders)
+    return jsonify(storage.reminders.list())
 
 @app.route('/api/reminders', methods=['POST'])
 def add_reminder_api():
@@ -195,65 +533,146 @@ def add_reminder_api():
     if not data or 'time' not in data or 'content' not in data:
         return jsonify({"error": "Brak danych przypomnienia"}), 400
 
-    reminder_time = data['time']
-    if 'T' in reminder_time and len(reminder_time) > 16:
-        reminder_time = reminder_time[11:16]
-
     reminder_id = int(time.time()) + random.randint(1, 1000)
     reminder = {
         "id": reminder_id,
-        "time": reminder_time,
         "content": data['content'],
         "active": True,
         "timestamp": datetime.datetime.now().isoformat() # Dodaj timestamp dla wyświetlania
     }
-    load_reminders()
-    reminders.append(reminder)
-    save_reminders()
+    reminder.update(parse_schedule(data))
+    storage.reminders.insert(reminder)
+    scheduler.upsert("reminder", reminder)
     return jsonify({"message": "Przypomnienie dodane!"})
 
 @app.route('/api/reminders/<int:reminder_id>', methods=['DELETE'])
 def delete_reminder_api(reminder_id):
-    load_reminders()
-    reminders[:] = [r for r in reminders if r['id'] != reminder_id]
-    save_reminders()
+    storage.reminders.delete(reminder_id)
+    scheduler.cancel("reminder", reminder_id)
     return jsonify({"message": "Przypomnienie usunięte!"})
 
 @app.route('/api/reminders/<int:reminder_id>/toggle', methods=['PUT'])
 def toggle_reminder_api(reminder_id):
     data = request.get_json()
-    load_reminders()
-    for reminder in reminders:
-        if reminder['id'] == reminder_id:
-            reminder['active'] = data.get('active', True)
-    save_reminders()
+    reminder = storage.reminders.update(reminder_id, active=data.get('active', True))
+    if reminder:
+        scheduler.upsert("reminder", reminder)
     return jsonify({"message": "Status przypomnienia zmieniony!"})
 
 # Nowe endpointy do zarządzania ustawieniami
 @app.route('/api/settings', methods=['GET'])
+@conditional("settings")
 def get_settings():
-    if os.path.exists(SETTINGS_FILE):
-        with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-            return jsonify(json.load(f))
-    return jsonify({"city": "Szczecin", "mac": ""})
+    return jsonify(current_settings())
 
 @app.route('/api/settings', methods=['POST'])
 def save_settings():
     data = request.get_json()
-    with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    storage.settings.replace_all(data)
     return jsonify({"message": "Ustawienia zapisane!"})
 
+# Długie operacje (mowa, nasłuchiwanie) idą do puli zadań - handlery Socket.IO wracają od razu
+def emit_job_event(job, extra):
+    payload = job.to_dict()
+    payload.update(extra)
+    socketio.emit('job_update', payload, to=job.owner)
+
+jobs = JobExecutor(
+    max_workers=int(os.getenv("JOB_WORKERS", "2")),
+    max_queue=int(os.getenv("JOB_QUEUE_SIZE", "8")),
+    on_event=emit_job_event
+)
+
+def submit_job(name, fn, *args):
+    """Zleć zadanie w imieniu bieżącego klienta; zwraca potwierdzenie dla ack Socket.IO."""
+    try:
+        job = jobs.submit(name, fn, *args, owner=request.sid)
+    except JobQueueFull as e:
+        print(e)
+        emit('job_update', {"name": name, "status": "rejected", "error": "Asystent jest zajęty, spróbuj za chwilę."})
+        return {"status": "rejected"}
+    return {"job_id": job.id, "status": job.status}
+
+def speak_job(job, text):
+    return assistant.tts_speak(text, PRIORITY_SYSTEM).result()
+
+def voice_note_job(job):
+    assistant.tts_speak("Powiedz treść notatki...", PRIORITY_SYSTEM).result()
+    if job.cancelled:
+        return None
+    job.report(message="listening")
+    note_text = assistant.speech_to_text(timeout=15, cancel_event=job.cancel_event, consumer="note")
+    if job.cancelled:
+        return None
+    if note_text:
+        socketio.emit('voice_note_text', note_text, to=job.owner)
+    else:
+        socketio.emit('voice_note_text', "Nie rozpoznano notatki.", to=job.owner)
+    return note_text
+
+def browser_command_job(job, command):
+    return respond(command)
+
+def read_notes_job(job):
+    # Tylko najnowsze notatki - pełna lista jest w GUI (/api/notes?cursor=)
+    assistant.tts_speak(assistant.recent_notes_summary(numbered=True), PRIORITY_CONVERSATION).result()
+    return min(storage.notes.count(), assistant.notes_read_limit)
+
 # Obsługa Socket.IO
+@socketio.on('connect')
+def handle_connect(auth=None):
+    """Wyślij klientowi tylko brakującą część rozmowy (od jego kursora) albo ostatnie wpisy i bieżące statystyki."""
+    cursor = (auth or {}).get('conversation_cursor')
+    entries, more, gap = conversation_log.page(after=cursor if isinstance(cursor, int) else None, limit=200)
+    # Kursor starszy niż najstarszy zachowany wpis: klient dostaje najnowsze wpisy i zaczyna historię od nowa
+    emit('conversation_sync', {"entries": entries, "more": more, "last_seq": conversation_log.last_seq,
+                               "reset": gap or not isinstance(cursor, int)})
+    # Statystyki zmieniają się co sekundę - nie w /api/bootstrap, którego ETag ma być stabilny
+    emit('system_stats', current_system_sample())
+
+@socketio.on('disconnect')
+def handle_disconnect(reason=None):
+    stt_pool.close(request.sid, flush=False)
+
+@socketio.on('stt_start')
+def handle_stt_start(data=None):
+    """Otwórz sesję rozpoznawania dla mikrofonu przeglądarki (PCM int16 mono, 16 kHz)."""
+    try:
+        stt_pool.open(request.sid, sample_rate=(data or {}).get('sample_rate'))
+    except SessionRejected as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": True, "sample_rate": stt_pool.sample_rate}
+
+@socketio.on('stt_audio')
+def handle_stt_audio(data):
+    """Kawałek PCM jako binarna ramka; potwierdzenie mówi klientowi, czy zwolnić (backpressure)."""
+    if not isinstance(data, (bytes, bytearray)):
+        return {"ok": False, "error": "Oczekiwano binarnych danych PCM."}
+    accepted, queued_ms = stt_pool.feed(request.sid, data)
+    return {"ok": accepted, "queued_ms": queued_ms}
+
+@socketio.on('stt_stop')
+def handle_stt_stop():
+    """Zakończ sesję; reszta nagrania jest jeszcze rozpoznawana."""
+    return {"ok": stt_pool.close(request.sid)}
+
+@socketio.on('cancel_job')
+def handle_cancel_job(data):
+    """Anuluj zadanie po id."""
+    job_id = (data or {}).get('job_id')
+    return {"cancelled": jobs.cancel(job_id)}
+
 @socketio.on('start_listening')
 def handle_start_listening():
     """Rozpocznij nasłuchiwanie."""
     global is_listening, force_listen
     is_listening = True
     force_listen = True
+    if assistant.wake_detector:
+        assistant.wake_detector.report_manual_activation()
     update_conversation("System", "Rozpoczynam nasłuchiwanie.")
     socketio.emit('listening_status', {"status": True})
-    assistant.tts_speak("Słucham?")
+    return submit_job("speak", speak_job, "Słucham?")
 
 @socketio.on('stop_listening')
 def handle_stop_listening():
@@ -262,39 +681,33 @@ def handle_stop_listening():
     is_listening = False
     update_conversation("System", "Zatrzymano nasłuchiwanie.")
     socketio.emit('listening_status', {"status": False})
-    assistant.tts_speak("Do usłyszenia!")
+    return submit_job("speak", speak_job, "Do usłyszenia!")
 
 @socketio.on('start_voice_note')
 def handle_start_voice_note():
     update_conversation("System", "Powiedz treść notatki...")
-    assistant.tts_speak("Powiedz treść notatki...")
-    note_text = assistant.speech_to_text(timeout=15)
-    if note_text:
-        socketio.emit('voice_note_text', note_text)
-    else:
-        socketio.emit('voice_note_text', "Nie rozpoznano notatki.")
+    return submit_job("voice_note", voice_note_job)
 
 @socketio.on('read_notes')
 def handle_read_notes():
-    notes = assistant.get_notes()
-    if not notes:
-        assistant.tts_speak("Nie masz jeszcze żadnych notatek.")
-        return
-
-    text = "Oto Twoje notatki: "
-    for i, note in enumerate(notes, 1):
-        text += f"Notatka {i}: {note['content']}. "
-
-    assistant.tts_speak(text)
+    return submit_job("read_notes", read_notes_job)
 
 # Wątek asystenta
 def assistant_thread_function():
     """Główna pętla asystenta."""
     global is_listening, force_listen
     print("Wątek asystenta uruchomiony.")
-    assistant.tts_speak("Jestem gotowa do działania")
+    # Model ładuje się w tle - serwer HTTP obsługuje w tym czasie zapytania
+    assistant.models_ready.wait()
+    if assistant.model_vosk is None:
+        print("Brak modelu Vosk - sterowanie głosowe wyłączone.")
+        return
+    assistant.start_capture()
+    assistant.tts_speak("Jestem gotowa do działania", PRIORITY_SYSTEM)
     last_command = None
     last_response = None
+    wake_session = False
+    session_had_command = False
 
     while assistant_active:
         try:
@@ -303,17 +716,18 @@ def assistant_thread_function():
                 force_listen = False  # Reset flagi po pierwszym wejściu
             else:
                 print("Nasłuchiwanie słowa aktywującego...")
-                command = assistant.speech_to_text(timeout=10)
+                command = assistant.wait_for_wake_word(timeout=10)
                 print(f"Po nasłuchiwaniu: {command}")
 
-            wake_words = [w.strip() for w in os.getenv("WAKE_WORD", "nowa").split(",")]
-            if command and any(wake_word in command for wake_word in wake_words):
+            if command and any(wake_word in command for wake_word in assistant.wake_words):
                 print(f"Aktywowano: {command}")
                 update_conversation("Użytkownik", command)
                 is_listening = True
                 socketio.emit('listening_status', {"status": True})
                 assistant.reset_recognition_time()
-                assistant.tts_speak("Tak, słucham?")
+                wake_session = True
+                session_had_command = False
+                assistant.tts_speak("Tak, słucham?", PRIORITY_SYSTEM)
                 update_conversation("Nowa", "Tak, słucham?")
             elif not is_listening and command:
                 print(f"Nieaktywowana komenda: {command}")
@@ -323,14 +737,17 @@ def assistant_thread_function():
                 print("Nasłuchiwanie komendy użytkownika...")
                 while assistant.is_speaking:
                     time.sleep(0.1)
-                command = assistant.speech_to_text(timeout=30)
+                command = assistant.speech_to_text(timeout=30, incremental=True, persist_cursor=True)
 
                 if command is None or command == "":
                     if time.time() - assistant.last_recognition_time > 15:
                         print("Brak komendy, kończę nasłuchiwanie.")
                         is_listening = False
                         socketio.emit('listening_status', {"status": False})
-                        assistant.tts_speak("Do usłyszenia!")
+                        assistant.tts_speak("Do usłyszenia!", PRIORITY_SYSTEM)
+                        if wake_session and assistant.wake_detector:
+                            assistant.wake_detector.report_session(session_had_command)
+                        wake_session = False
                         break
                     continue
 
@@ -338,79 +755,69 @@ def assistant_thread_function():
                     print("Zignorowano powtórzoną lub echem komendę.")
                     continue
                 last_command = command
+                session_had_command = True
 
                 print(f"Pytanie: {command}")
-                response = assistant.run_ai(command)
+                response = respond(command)
                 last_response = response
                 print(f"Odpowiedź: {response}")
-                update_conversation("Nowa", response)
-                assistant.tts_speak(response)
 
         except Exception as e:
             print(f"Błąd w głównej pętli: {e}")
             traceback.print_exc()
             time.sleep(1)
 
-def alarm_checker():
-    while True:
-        now = datetime.datetime.now().strftime("%H:%M")
-        load_alarms()
-        for alarm in alarms:
-            if alarm['active'] and alarm['time'] == now:
-                socketio.emit('alarm_triggered', alarm)
-                assistant.tts_speak(f"Czas na budzik: {alarm.get('label', '') or alarm['time']}")
-                alarm['active'] = False # Wyłącz alarm po aktywacji
-                save_alarms()
-        time.sleep(30) # Sprawdzaj co 30 sekund
-
-def reminder_checker():
-    while True:
-        now = datetime.datetime.now().strftime("%H:%M")
-        load_reminders()
-        for reminder in reminders:
-            if reminder['active'] and reminder['time'] == now:
-                socketio.emit('reminder_triggered', reminder)
-                assistant.tts_speak(f"Przypomnienie: {reminder['content']}")
-                reminder['active'] = False # Wyłącz przypomnienie po aktywacji
-                save_reminders()
-        time.sleep(30) # Sprawdzaj co 30 sekund
-
-def system_stats_emitter(): # Nowa funkcja do wysyłania statystyk
-    while True:
-        cpu = psutil.cpu_percent(interval=1)
-        ram = psutil.virtual_memory().percent
-        socketio.emit('system_stats', {"cpu": cpu, "ram": ram})
-        time.sleep(2) # Wysyłaj co 2 sekundy
+def load_models_in_background():
+    with profiler.phase("model Vosk (w tle)"):
+        assistant.load_models()
+    profiler.report()
+
+def start_background_services():
+    """Uruchom wątki asystenta; model Vosk ładuje się równolegle z obsługą HTTP."""
+    global assistant_thread_instance
+    with profiler.phase("uruchamianie wątków"):
+        threading.Thread(target=load_models_in_background, name="model-loader", daemon=True).start()
+        assistant.warm_up_connections()
+        assistant.weather_cache.start_refresher()
+        tts_prewarm_thread = threading.Thread(target=assistant.prewarm_tts, args=(FIXED_PHRASES,), daemon=True)
+        tts_prewarm_thread.start()
+        # Indeks notatek gotowy przed pierwszym "znajdź notatkę"
+        threading.Thread(target=assistant.note_index, name="note-index", daemon=True).start()
+
+        scheduler.load("alarm", storage.alarms.list())
+        scheduler.load("reminder", storage.reminders.list())
+        scheduler.start()
+
+        assistant_thread_instance = threading.Thread(target=assistant_thread_function, daemon=True)
+        assistant_thread_instance.start()
+
+        system_sampler.start()
+        if METRICS_DEBUG and metrics.enabled:
+            threading.Thread(target=emit_latency_stats, name="latency-stats", daemon=True).start()
 
 if __name__ == "__main__":
-    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' or os.environ.get('FLASK_ENV') == 'development':
-        print("Uruchamianie serwera w głównym procesie (lub w trybie deweloperskim Flask)...")
-        alarm_thread = threading.Thread(target=alarm_checker, daemon=True)
-        alarm_thread.start()
-
-        reminder_thread = threading.Thread(target=reminder_checker, daemon=True)
-        reminder_thread.start()
-
-        assistant_thread = threading.Thread(target=assistant_thread_function, daemon=True)
-        assistant_thread.start()
-
-        system_stats_thread = threading.Thread(target=system_stats_emitter, daemon=True) # Uruchom wątek statystyk
-        system_stats_thread.start()
-
-        global assistant_thread_instance
-        assistant_thread_instance = assistant_thread
+    # Domyślnie bez debugera i reloadera Werkzeug - proces nadzorujący reloadera
+    # importowałby całą aplikację drugi raz. FLASK_DEBUG=1 włącza tryb deweloperski.
+    debug = os.getenv("FLASK_DEBUG", "0") == "1"
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services()
     else:
-        print("Proces przeładowania Flask - wątki nie będą uruchamiane.")
+        print("Proces nadzorujący reloadera Flask - wątki nie będą uruchamiane.")
 
     try:
-        socketio.run(app, host='0.0.0.0', port=5000, debug=True)
+        print(f"Serwer gotowy do obsługi zapytań po {profiler.elapsed() * 1000:.0f} ms.")
+        # Serwer Werkzeug tylko do pracy przy terminalu albo w trybie deweloperskim;
+        # jako usługa (bez terminala) - gunicorn z wsgi.py, patrz README
+        socketio.run(app, host='0.0.0.0', port=int(os.getenv("PORT", "5000")), debug=debug,
+                     use_reloader=debug, allow_unsafe_werkzeug=debug)
     except KeyboardInterrupt:
         print("Zamykanie serwera...")
         assistant_active = False
+        assistant.stop_capture()
         if 'assistant_thread_instance' in globals() and assistant_thread_instance.is_alive():
             assistant_thread_instance.join(timeout=2.0)
         sys.exit(0)
     except Exception as e:
         print(f"Krytyczny błąd serwera: {e}")
         traceback.print_exc()
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -0,0 +1,69 @@
+# assets.py
+import os
+import re
+import hashlib
+import threading
+
+
+class AssetManifest:
+    """Odciski treści plików frontendu (main.js, styles.css) do adresów z ?v=.
+
+    index.html wysyłany jest z odnośnikami `main.js?v=<odcisk>`; plik pobrany
+    pod aktualnym odciskiem może być trzymany przez przeglądarkę bez końca
+    (Cache-Control: immutable), bo każda zmiana treści zmienia adres.
+    Odciski liczone są ponownie tylko po zmianie mtime pliku.
+    """
+
+    def __init__(self, root, files=("main.js", "styles.css"), page="index.html"):
+        self.root = root
+        self.files = tuple(files)
+        self.page = page
+        self._hashes = {}  # nazwa -> (mtime, odcisk)
+        self._page = None  # (mtime strony i plików, html, etag)
+        self._lock = threading.Lock()
+        names = "|".join(re.escape(name) for name in self.files)
+        self._link_re = re.compile(r'((?:src|href)=")(' + names + r')(")')
+
+    def fingerprint(self, name):
+        """Odcisk aktualnej treści pliku albo None, gdy plik nie jest wersjonowany."""
+        if name not in self.files:
+            return None
+        path = os.path.join(self.root, name)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._hashes.get(name)
+            if cached and cached[0] == mtime:
+                return cached[1]
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+        with self._lock:
+            self._hashes[name] = (mtime, digest)
+        return digest
+
+    def is_current(self, name, version):
+        return bool(version) and version == self.fingerprint(name)
+
+    def _versioned_link(self, match):
+        version = self.fingerprint(match.group(2))
+        if version is None:
+            return match.group(0)
+        return f"{match.group(1)}{match.group(2)}?v={version}{match.group(3)}"
+
+    def render_page(self):
+        """(html, etag) strony z odnośnikami do wersjonowanych plików; przeliczane po zmianie któregokolwiek."""
+        page_path = os.path.join(self.root, self.page)
+        versions = tuple(self.fingerprint(name) for name in self.files)
+        mtime = os.stat(page_path).st_mtime_ns
+        with self._lock:
+            if self._page and self._page[0] == (mtime, versions):
+                return self._page[1], self._page[2]
+        with open(page_path, "r", encoding="utf-8") as f:
+            html = f.read()
+        html = self._link_re.sub(self._versioned_link, html)
+        etag = hashlib.sha256(html.encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            self._page = ((mtime, versions), html, etag)
+        return html, etag
@@ -1,26 +1,39 @@
 # assistant.py
 import os
-import sys
 import time
 import json
-import queue
 import requests
-import sounddevice as sd
-from vosk import Model, KaldiRecognizer
+import numpy as np
 import random
 import traceback
 import io
-import soundfile as sf
+import atexit
 from wakeonlan import send_magic_packet
 import datetime
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from tts_cache import TTSCache
+from http_client import HttpClient
+from audio_capture import AudioCapture
+from wake_word import WakeWordDetector
+from intents import build_default_router
+from weather_cache import WeatherCache
+from storage import Storage
+from speech_queue import SpeechQueue, PRIORITY_CONVERSATION
+from vad import VoiceActivityDetector
+from stt_workers import SttWorkerPool
+from llm_cache import ResponseCache, DEFAULT_FILLERS
+from note_index import NoteIndex
+from metrics import metrics
 # import pyttsx3
+# sounddevice, vosk i soundfile importowane są dopiero przy pierwszym użyciu - szybszy start serwera
 
 class VoiceAssistant:
-    def __init__(self, socketio=None):
-        self.q = queue.Queue()
+    def __init__(self, socketio=None, storage=None, audio_source=None):
         self.is_speaking = False
         self.recording_enabled = True
         self.socketio = socketio
+        self.http = HttpClient()
         self.last_recognition_time = 0
         self.recognition_cooldown = 0.5
         self.listening_start_time = 0
@@ -30,28 +43,114 @@ class VoiceAssistant:
             "VOSK_MODEL_PATH",
             os.path.join(os.path.dirname(__file__), "..", "models", "vosk", "pl")
         )
+        # Adresy API - nadpisywane np. w benchmarkach lokalnymi serwerami zastępczymi
+        self.openrouter_url = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+        self.elevenlabs_url = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io/v1")
+        self.openweather_url = os.getenv("OPENWEATHER_BASE_URL", "http://api.openweathermap.org/data/2.5")
         self.openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
         self.openweather_api_key = os.getenv("OPENWEATHER_API_KEY")
         self.elevenlabs_api_key = os.getenv("ELEVENLABS_API_KEY")
         self.elevenlabs_voice_id = os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4azwk8qx opposing")
+        self.elevenlabs_model_id = os.getenv("ELEVENLABS_MODEL_ID", "eleven_multilingual_v2")
+        self.elevenlabs_voice_settings = {
+            "stability": 0.5,
+            "similarity_boost": 0.75
+        }
+        # Strumieniowe odtwarzanie TTS (surowy PCM) zamiast buforowania całego pliku WAV
+        self.tts_streaming = os.getenv("TTS_STREAMING", "1") == "1"
+        self.tts_sample_rate = int(os.getenv("TTS_SAMPLE_RATE", "16000"))
+        self.tts_chunk_size = 4096
+        self.last_first_audio_at = 0.0  # time.time() pierwszej próbki ostatniej wypowiedzi
+        # Strumieniowanie odpowiedzi AI (SSE) zdanie po zdaniu do TTS
+        self.llm_streaming = os.getenv("LLM_STREAMING", "1") == "1"
+        # Cache nagrań TTS dla krótkich, powtarzalnych kwestii
+        self.tts_cache_max_text = int(os.getenv("TTS_CACHE_MAX_TEXT", "200"))
+        # Ile najnowszych notatek odczytuje "pokaż notatki" / "przeczytaj notatki"
+        self.notes_read_limit = int(os.getenv("NOTES_READ_LIMIT", "5"))
+        # Jedyny wątek odtwarzający mowę; wyciszenie mikrofonu śledzi stan kolejki
+        self.speech = SpeechQueue(self._speak_now, on_busy=self._on_speech_busy)
+        self.tts_cache = TTSCache(
+            os.getenv("TTS_CACHE_DIR", os.path.join(os.path.dirname(__file__), "cache", "tts")),
+            memory_limit_bytes=int(os.getenv("TTS_CACHE_MEMORY_MB", "8")) * 1024 * 1024,
+            disk_limit_bytes=int(os.getenv("TTS_CACHE_DISK_MB", "50")) * 1024 * 1024,
+            # Poza stałymi kwestiami na dysk trafiają teksty wypowiedziane co najmniej tyle razy
+            disk_min_uses=int(os.getenv("TTS_CACHE_DISK_MIN_USES", "2"))
+        )
         self.wake_word = os.getenv("WAKE_WORD", "nowa")
+        self.wake_words = [w.strip().lower() for w in self.wake_word.split(",") if w.strip()]
         self.end_words = os.getenv("END_WORDS", "stop,koniec,zakończ,wyjdź").split(",")
+        # Lokalne komendy: jeden skompilowany router zamiast łańcucha if-ów
+        self.intent_router = build_default_router(self.end_words)
+        self._intent_handlers = {
+            "note_save": self._handle_note_save,
+            "notes_show": self._handle_notes_show,
+            "note_search": self._handle_note_search,
+            "weather": self._handle_weather,
+            "wake_computer": self._handle_wake_computer,
+            "end": self._handle_end
+        }
         self.sample_rate = 16000
         self.blocksize = 8000
+        # Ciągłe nagrywanie do bufora pierścieniowego; preroll to ile sekund wstecz czyta nowy odbiorca
+        self.stt_preroll = float(os.getenv("STT_PREROLL_SECONDS", "1.0"))
+        self.capture = AudioCapture(
+            sample_rate=self.sample_rate,
+            blocksize=self.blocksize,
+            buffer_seconds=float(os.getenv("AUDIO_BUFFER_SECONDS", "30")),
+            gate=lambda: self.recording_enabled and not self.is_speaking,
+            stream_factory=audio_source
+        )
+        self._stt_cursor = None  # kursor głównej pętli (słowo aktywujące -> komenda)
+        # Bramka VAD: cisza nie trafia do Kaldi, koniec wypowiedzi wykrywany po VAD_HANGOVER_MS ciszy.
+        # Każde nasłuchiwanie ma własny detektor; tu łączne statystyki i ostatni poziom szumu
+        # osobno dla każdego odbiorcy (komendy, notatki głosowe) - strumienie się nie mieszają.
+        self.vad_enabled = os.getenv("VAD_ENABLED", "1") == "1"
+        self.stt_vads = {}
+        self._stt_vads_lock = threading.Lock()
+        # Tryb przyrostowy: ile kolejnych bloków wynik częściowy musi się nie zmieniać, by uznać go za stabilny
+        self.partial_stable_blocks = int(os.getenv("STT_PARTIAL_STABLE_BLOCKS", "2"))
+        self._speculation_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="speculation")
+        self._speculations = {}
+        self._speculation_lock = threading.Lock()
         self.default_city = os.getenv("DEFAULT_CITY", "Szczecin")
+        self.weather_cache = WeatherCache(
+            self._fetch_weather,
+            self.default_city,
+            ttl=float(os.getenv("WEATHER_TTL", "600")),
+            stale_ttl=float(os.getenv("WEATHER_STALE_TTL", "3600"))
+        )
         self.computer_mac = os.getenv("COMPUTER_MAC")
         self.broadcast_address = os.getenv("BROADCAST_ADDRESS", "192.168.1.255")
         self.notes_file = os.getenv(
             "NOTES_FILE",
             os.path.join(os.path.dirname(__file__), "..", "notes.json")
         )
+        if storage is None:
+            storage = Storage(os.getenv("DB_FILE", os.path.join(os.path.dirname(__file__), "nova.db")))
+            storage.notes.import_json(self.notes_file)
+        self.storage = storage
+        # Indeks pełnotekstowy notatek budowany przy pierwszym wyszukiwaniu, potem aktualizowany przyrostowo
+        self._note_index = None
+        self._note_index_lock = threading.Lock()
+        # Cache odpowiedzi AI na powtarzane pytania (klucz: znormalizowane pytanie + model + prompt systemowy)
+        self.ai_model = os.getenv("OPENROUTER_MODEL", "openai/gpt-oss-20b:free")
+        self.ai_system_prompt = "Jesteś pomocnym asystentem głosowym o imieniu Nowa. Odpowiadaj żywo, naturalnie i krótko oraz rozmownie, zawsze po polsku. Zakaz emotek i znaków specjalnych. nie używaj **."
+        self.ai_cache_enabled = os.getenv("AI_CACHE", "1") == "1"
+        self.ai_cache = ResponseCache(
+            storage,
+            ttl=float(os.getenv("AI_CACHE_TTL", str(7 * 24 * 3600))),
+            memory_limit_bytes=int(os.getenv("AI_CACHE_MEMORY_KB", "1024")) * 1024,
+            fillers=tuple(self.wake_words) + DEFAULT_FILLERS
+        )
 
-        try:
-            self.model_vosk = Model(self.vosk_model_path)
-            print("Model VOSK załadowany.")
-        except Exception as e:
-            print(f"Błąd ładowania modelu VOSK: {e}")
-            self.model_vosk = None
+        # Model Vosk ładowany jest w tle przez load_models() - serwer nie czeka na niego przy starcie
+        self.model_vosk = None
+        self.wake_detector = None
+        self.model_error = None
+        self.models_ready = threading.Event()
+        # STT_WORKERS>0: dekodowanie komend w osobnych procesach (każdy z własną kopią modelu), poza GIL-em serwera
+        self.stt_worker_count = int(os.getenv("STT_WORKERS", "0"))
+        self.stt_workers = None
 
         if self.elevenlabs_api_key and self.elevenlabs_voice_id:
             self.tts_model_loaded = True
@@ -60,81 +159,277 @@ class VoiceAssistant:
             self.tts_model_loaded = False
             print("Brak klucza API Eleven Labs lub ID głosu. TTS będzie niedostępny.")
 
+    def load_models(self):
+        """Załaduj model Vosk i detektor słowa aktywującego (kilka sekund - wywoływać w tle)."""
+        try:
+            from vosk import Model
+            model = Model(self.vosk_model_path)
+            self.wake_detector = WakeWordDetector(
+                model, self.sample_rate, self.wake_words,
+                vad=self._new_vad() if self.vad_enabled else None
+            )
+            if self.stt_worker_count > 0:
+                self._start_stt_workers()
+            self.model_vosk = model
+            print("Model VOSK załadowany.")
+        except Exception as e:
+            print(f"Błąd ładowania modelu VOSK: {e}")
+            self.model_error = str(e)
+        finally:
+            self.models_ready.set()
+
+    def _start_stt_workers(self):
+        try:
+            self.stt_workers = SttWorkerPool(
+                self.vosk_model_path,
+                workers=self.stt_worker_count,
+                sample_rate=self.sample_rate,
+                nice=int(os.getenv("STT_WORKER_NICE", "0"))
+            ).start()
+            atexit.register(self.stt_workers.stop)  # wspólna pamięć usuwana przy wyjściu, nie przez resource_tracker
+            print(f"Procesy STT uruchomione: {self.stt_worker_count}.")
+        except Exception as e:
+            # Bez procesów roboczych rozpoznawanie działa jak dawniej, w procesie serwera
+            print(f"Błąd uruchamiania procesów STT, dekodowanie w procesie serwera: {e}")
+            self.stt_workers = None
+
+    def new_recognizer(self, model=None, sample_rate=None):
+        """Rozpoznawacz Kaldi - zdalny (w procesie roboczym), gdy działa pula STT_WORKERS."""
+        if self.stt_workers is not None:
+            return self.stt_workers.recognizer()
+        from vosk import KaldiRecognizer
+        return KaldiRecognizer(model or self.model_vosk, sample_rate or self.sample_rate)
+
+    @staticmethod
+    def release_recognizer(recognizer):
+        close = getattr(recognizer, "close", None)
+        if close is not None:
+            close()
+
+    def stt_status(self):
+        """"ready", "loading" albo "error" - do raportu gotowości."""
+        if self.model_vosk is not None:
+            return "ready"
+        return "error" if self.models_ready.is_set() else "loading"
+
     # --- STT: Speech to Text ---
-    def audio_callback(self, indata, frames, time_, status):
-        if not self.recording_enabled or self.is_speaking:
-            return
-        if status:
-            print(status, file=sys.stderr)
-        self.q.put(bytes(indata))
+    def start_capture(self):
+        """Uruchom (jednorazowo) wątek ciągłego nagrywania z mikrofonu."""
+        self.capture.start()
+
+    def stop_capture(self):
+        self.capture.stop()
+
+    def _new_vad(self):
+        return VoiceActivityDetector(
+            sample_rate=self.sample_rate,
+            threshold_db=float(os.getenv("VAD_THRESHOLD_DB", "9")),
+            hangover_ms=float(os.getenv("VAD_HANGOVER_MS", "400")),
+            preroll_blocks=int(os.getenv("VAD_PREROLL_BLOCKS", "1"))
+        )
 
-    def clear_queue(self):
-        while not self.q.empty():
-            self.q.get()
+    def stt_vad(self, consumer):
+        """Łączne statystyki VAD nasłuchiwań danego odbiorcy (tworzone przy pierwszym użyciu)."""
+        with self._stt_vads_lock:
+            if consumer not in self.stt_vads:
+                self.stt_vads[consumer] = self._new_vad()
+            return self.stt_vads[consumer]
 
-    def speech_to_text(self, timeout=10):
-        """Prosty, zoptymalizowany STT z Vosk"""
+    def speech_to_text(self, timeout=10, preroll=None, incremental=False, cancel_event=None, persist_cursor=False,
+                       consumer="command"):
+        """Prosty, zoptymalizowany STT z Vosk czytający z bufora pierścieniowego.
+
+        Każde wywołanie ma własny kursor i własny detektor VAD, więc
+        równoczesne nasłuchiwania (główna pętla i np. notatka głosowa) nie
+        przeszkadzają sobie. Odczyt zaczyna się `preroll` sekund wstecz;
+        z `persist_cursor` (główna pętla) - nie wcześniej niż tam, gdzie
+        skończyło poprzednie rozpoznawanie, a kursor jest zapamiętywany.
+        Dzięki temu słowa wypowiedziane między wywołaniami nie giną, a stare
+        nagrania nie wracają.
+
+        W trybie `incremental` wyniki częściowe uruchamiają spekulacyjne
+        przygotowania (pogoda, połączenie z AI), a lokalne komendy
+        oznaczone jako `early` zwracane są już po ustabilizowaniu się hipotezy,
+        bez czekania na ciszę kończącą wypowiedź.
+
+        Z bramką VAD rozpoznawacz dostaje tylko fragmenty z mową, a wynik
+        końcowy pobierany jest zaraz po wykrytym przez VAD końcu wypowiedzi.
+
+        Ustawienie `cancel_event` (threading.Event) przerywa nasłuchiwanie.
+        Statystyki VAD liczone są osobno dla odbiorcy `consumer`.
+        """
         if not self.model_vosk:
             print("Brak modelu Vosk!")
             return ""
-        self.clear_queue()
-        recognizer = KaldiRecognizer(self.model_vosk, self.sample_rate)
+        self.start_capture()
+        recognizer = self.new_recognizer()
+        cursor = self.capture.cursor(
+            preroll=self.stt_preroll if preroll is None else preroll,
+            not_before=self._stt_cursor if persist_cursor else None
+        )
+        stable_partial, stable_count = "", 0
+        llm_warmed = False
+        vad = self._new_vad() if self.vad_enabled else None
+        if vad:
+            vad.noise_db = self.stt_vad(consumer).noise_db  # poziom szumu z poprzednich nasłuchiwań
         print("Rozpoczynam nasłuchiwanie...")
         try:
-            with sd.RawInputStream(samplerate=self.sample_rate, blocksize=self.blocksize, dtype='int16', channels=1, callback=self.audio_callback):
-                start_time = time.time()
-                while time.time() - start_time < timeout:
-                    try:
-                        data = self.q.get(timeout=0.5)
-                    except queue.Empty:
-                        continue
-                    if recognizer.AcceptWaveform(data):
-                        result = json.loads(recognizer.Result())
-                        text = result.get("text", "").strip().lower()
+            start_time = time.time()
+            while time.time() - start_time < timeout:
+                if cancel_event is not None and cancel_event.is_set():
+                    print("Nasłuchiwanie anulowane.")
+                    return ""
+                data, cursor = self.capture.read(cursor, timeout=0.5)
+                if data is None:
+                    continue
+                with metrics.span("vad"):
+                    blocks, ended = vad.process(data) if vad else ([data], False)
+                for block in blocks:
+                    block_start = time.thread_time()
+                    remote_start = getattr(recognizer, "cpu_seconds", 0.0)
+                    with metrics.span("stt_block"):
+                        accepted = recognizer.AcceptWaveform(block)
+                    if vad:
+                        # Zdalny rozpoznawacz liczy CPU w procesie roboczym, lokalny - w tym wątku
+                        vad.account(time.thread_time() - block_start
+                                    + getattr(recognizer, "cpu_seconds", 0.0) - remote_start)
+                    if accepted:
+                        text = json.loads(recognizer.Result()).get("text", "").strip().lower()
+                        stable_partial, stable_count = "", 0
                         if text:
                             print(f"Rozpoznano: {text}")
-                            self.last_recognition_time = time.time()
-                            return text
-                print("Timeout nasłuchiwania.")
-                return ""
+                            return self._finish_recognition(text, cursor, persist_cursor)
+                    elif incremental:
+                        partial = json.loads(recognizer.PartialResult()).get("partial", "").strip().lower()
+                        if not partial:
+                            continue
+                        if partial == stable_partial:
+                            stable_count += 1
+                        else:
+                            stable_partial, stable_count = partial, 0
+                        match = self.intent_router.match(partial)
+                        llm_warmed = self._speculate(match, llm_warmed)
+                        if stable_count >= self.partial_stable_blocks and match and match.intent.early:
+                            print(f"Rozpoznano (wcześnie, z wyniku częściowego): {partial}")
+                            return self._finish_recognition(partial, cursor, persist_cursor)
+                if ended:
+                    # VAD wykrył koniec wypowiedzi - nie czekaj na endpointer Kaldi
+                    with metrics.span("stt_final"):
+                        text = json.loads(recognizer.FinalResult()).get("text", "").strip().lower()
+                    stable_partial, stable_count = "", 0
+                    if text:
+                        print(f"Rozpoznano (koniec wg VAD): {text}")
+                        return self._finish_recognition(text, cursor, persist_cursor)
+            if persist_cursor:
+                self._stt_cursor = cursor
+            self._settle_speculation(None)
+            print("Timeout nasłuchiwania.")
+            return ""
         except Exception as e:
             print(f"Błąd STT: {e}")
             return ""
+        finally:
+            self.release_recognizer(recognizer)
+            if vad:
+                self.stt_vad(consumer).absorb(vad)
 
-    # --- TTS: Text to Speech (Eleven Labs) ---
-    def tts_speak(self, text):
-        """Generowanie i odtwarzanie mowy za pomocą Eleven Labs."""
-        if not self.tts_model_loaded or not self.elevenlabs_api_key or not self.elevenlabs_voice_id:
-            print("Eleven Labs nie jest skonfigurowany.")
-            return
+    def skip_buffered_audio(self):
+        """Pomiń dźwięk zebrany do tej chwili (np. pogłos między zdaniami odpowiedzi)."""
+        self._stt_cursor = self.capture.cursor(preroll=0)
 
-        try:
-            self.is_speaking = True
-            self.recording_enabled = False  # wycisz mikrofon
+    def _finish_recognition(self, text, cursor, persist_cursor):
+        self.last_recognition_time = time.time()
+        if persist_cursor:
+            self._stt_cursor = cursor
+        self._settle_speculation(text)
+        return text
 
-            headers = {
-                "Accept": "audio/wav",
-                "Content-Type": "application/json",
-                "xi-api-key": self.elevenlabs_api_key
-            }
-            data = {
-                "text": text,
-                "model_id": "eleven_multilingual_v2",
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.75
-                }
-            }
+    # --- Spekulacyjne przygotowania na podstawie wyników częściowych ---
+    @staticmethod
+    def _speculation_key(match):
+        if match and match.name == "weather":
+            return ("weather", match.slots.get("city"))
+        return None
 
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{self.elevenlabs_voice_id}"
+    def _speculate(self, match, llm_warmed):
+        """Uruchom w tle pracę, której prawdopodobnie będzie wymagać końcowy tekst."""
+        key = self._speculation_key(match)
+        if key is not None:
+            with self._speculation_lock:
+                if key not in self._speculations:
+                    self._speculations[key] = self._speculation_executor.submit(self.get_weather, key[1])
+        elif match is None and not llm_warmed and self.openrouter_api_key:
+            # Prawdopodobnie pytanie do AI - otwórz połączenie zanim skończy się wypowiedź
+            self.http.warm_up([f"{self.openrouter_url}/models"])
+            return True
+        return llm_warmed
 
-            response = requests.post(url, headers=headers, json=data, stream=True, timeout=10)
-            response.raise_for_status()
+    def _settle_speculation(self, final_text):
+        """Anuluj spekulacje, które nie pasują do końcowego tekstu."""
+        keep = self._speculation_key(self.intent_router.match(final_text)) if final_text else None
+        with self._speculation_lock:
+            for key in list(self._speculations):
+                if key != keep:
+                    self._speculations.pop(key).cancel()
 
-            audio_data, sample_rate = sf.read(io.BytesIO(response.content), dtype='float32')
+    def _take_speculation(self, key):
+        with self._speculation_lock:
+            future = self._speculations.pop(key, None)
+        if future is None or future.cancelled():
+            return None
+        return future
 
-            sd.play(audio_data, samplerate=sample_rate)
-            sd.wait()
+    def wait_for_wake_word(self, timeout=10):
+        """Czekaj na słowo aktywujące tanim rozpoznawaczem gramatycznym; zwraca słowo albo ""."""
+        if not self.wake_detector:
+            return self.speech_to_text(timeout=timeout, persist_cursor=True)
+        self.start_capture()
+        cursor = self.capture.cursor(preroll=0, not_before=self._stt_cursor)
+        word, cursor = self.wake_detector.listen(self.capture, cursor, timeout=timeout)
+        # Pełne rozpoznawanie komendy zaczyna się tuż po słowie aktywującym
+        self._stt_cursor = cursor
+        return word
+
+    # --- TTS: Text to Speech (Eleven Labs) ---
+    def tts_speak(self, text, priority=PRIORITY_CONVERSATION, audio=None):
+        """Zleć wypowiedzenie tekstu; nie blokuje.
+
+        Zwraca Future z wynikiem True (wypowiedziane) albo False (przerwane
+        przez ważniejszy komunikat lub błąd). Kolejność i priorytety
+        pilnuje SpeechQueue. Podane `audio` (PCM z synthesize_pcm) jest
+        odtwarzane z pamięci bez łączenia z Eleven Labs.
+        """
+        if not self.tts_model_loaded or not self.elevenlabs_api_key or not self.elevenlabs_voice_id:
+            print("Eleven Labs nie jest skonfigurowany.")
+            future = Future()
+            future.set_result(False)
+            return future
+        return self.speech.say(text, priority, audio)
+
+    def _on_speech_busy(self, busy):
+        self.is_speaking = busy
+        self.recording_enabled = not busy  # wycisz mikrofon na czas mówienia
+
+    def _speak_now(self, text, interrupt_event, audio=None):
+        """Generowanie i odtwarzanie mowy za pomocą Eleven Labs (wątek SpeechQueue)."""
+        try:
+            with metrics.span("tts_speak"):
+                if audio is not None:
+                    metrics.inc("tts_playbacks_total", source="prerendered")
+                    self._tts_play_pcm(audio, interrupt_event, source="prerendered")
+                    return True
+                cache_key = self._tts_cache_key(text)
+                cached_audio = self.tts_cache.get(cache_key) if cache_key else None
+                if cached_audio is not None:
+                    metrics.inc("tts_playbacks_total", source="cache")
+                    self._tts_play_pcm(cached_audio, interrupt_event, source="cache")
+                elif self.tts_streaming:
+                    metrics.inc("tts_playbacks_total", source="stream")
+                    self._tts_play_stream(text, interrupt_event, cache_key)
+                else:
+                    metrics.inc("tts_playbacks_total", source="buffered")
+                    self._tts_play_buffered(text, interrupt_event)
+            return True
 
         except requests.exceptions.RequestException as req_err:
             print(f"Błąd zapytania do Eleven Labs: {req_err}")
@@ -144,10 +439,174 @@ class VoiceAssistant:
         except Exception as e:
             print(f"Błąd TTS (Eleven Labs): {e}")
             traceback.print_exc()
-        finally:
-            self.is_speaking = False
-            self.recording_enabled = True  # przywróć mikrofon
+        return False
+
+    @staticmethod
+    def _wait_playback(duration, interrupt_event):
+        """Czekaj na koniec sd.play(); przerwij odtwarzanie, gdy ustawiono interrupt_event."""
+        import sounddevice as sd
+        if interrupt_event is not None and interrupt_event.wait(duration):
+            sd.stop()
+            print("TTS: wypowiedź przerwana przez ważniejszy komunikat.")
+            return
+        sd.wait()
+
+    def _tts_headers(self, accept):
+        return {
+            "Accept": accept,
+            "Content-Type": "application/json",
+            "xi-api-key": self.elevenlabs_api_key
+        }
+
+    def _tts_payload(self, text):
+        return {
+            "text": text,
+            "model_id": self.elevenlabs_model_id,
+            "voice_settings": dict(self.elevenlabs_voice_settings)
+        }
 
+    def _tts_cache_key(self, text):
+        """Klucz cache dla tekstu albo None, jeśli tekst jest zbyt długi, by go zapamiętywać."""
+        if not text or len(text) > self.tts_cache_max_text:
+            return None
+        return TTSCache.make_key(text, self.elevenlabs_voice_id, self.elevenlabs_model_id,
+                                 self.elevenlabs_voice_settings, f"pcm_{self.tts_sample_rate}")
+
+    def _tts_stream_url(self):
+        return f"{self.elevenlabs_url}/text-to-speech/{self.elevenlabs_voice_id}/stream"
+
+    def _tts_play_pcm(self, audio, interrupt_event=None, source="cache"):
+        """Odtwórz gotowe nagranie PCM int16 prosto z pamięci.
+
+        `source` to pochodzenie nagrania: "cache" (cache fraz TTS) albo
+        "prerendered" (zapowiedź przygotowana przed terminem).
+        """
+        import sounddevice as sd
+        samples = np.frombuffer(audio, dtype=np.int16)
+        duration = len(samples) / self.tts_sample_rate
+        with metrics.span("playback"):
+            sd.play(samples, samplerate=self.tts_sample_rate)
+            self.last_first_audio_at = time.time()
+            origin = "przygotowanej zapowiedzi" if source == "prerendered" else "z cache"
+            print(f"TTS: odtwarzanie {origin} ({duration:.2f} s nagrania)")
+            self._wait_playback(duration, interrupt_event)
+
+    def synthesize_pcm(self, text):
+        """Pobierz z Eleven Labs całe nagranie PCM bez odtwarzania."""
+        params = {"output_format": f"pcm_{self.tts_sample_rate}"}
+        response = self.http.post("elevenlabs", self._tts_stream_url(), headers=self._tts_headers("audio/pcm"),
+                                  params=params, json=self._tts_payload(text), deadline=10)
+        response.raise_for_status()
+        return response.content
+
+    def prewarm_tts(self, phrases):
+        """Zsyntezuj z wyprzedzeniem stałe kwestie asystenta, których jeszcze nie ma w cache."""
+        if not self.tts_model_loaded:
+            return
+        warmed = 0
+        for phrase in phrases:
+            cache_key = self._tts_cache_key(phrase)
+            if not cache_key or cache_key in self.tts_cache:
+                continue
+            try:
+                self.tts_cache.put(cache_key, self.synthesize_pcm(phrase), persist=True)
+                warmed += 1
+            except Exception as e:
+                print(f"Błąd wstępnej syntezy \"{phrase}\": {e}")
+        print(f"Cache TTS: zsyntezowano {warmed} nowych kwestii, razem {self.tts_cache.stats()['disk_entries']} na dysku.")
+
+    def _tts_play_buffered(self, text, interrupt_event=None):
+        """Pobierz cały plik WAV, zdekoduj i odtwórz (tryb bez strumieniowania)."""
+        import sounddevice as sd
+        import soundfile as sf
+        start = time.perf_counter()
+        url = f"{self.elevenlabs_url}/text-to-speech/{self.elevenlabs_voice_id}"
+        response = self.http.post("elevenlabs", url, headers=self._tts_headers("audio/wav"),
+                                  json=self._tts_payload(text), deadline=10)
+        response.raise_for_status()
+
+        audio_data, sample_rate = sf.read(io.BytesIO(response.content), dtype='float32')
+        synthesis_time = time.perf_counter() - start
+        metrics.observe_stage("tts_first_audio", synthesis_time)
+        metrics.observe_stage("tts_synthesis", synthesis_time)
+
+        with metrics.span("playback"):
+            sd.play(audio_data, samplerate=sample_rate)
+            self.last_first_audio_at = time.time()
+            print(f"TTS: pierwszy dźwięk po {synthesis_time * 1000:.0f} ms, synteza {synthesis_time:.2f} s")
+            self._wait_playback(len(audio_data) / sample_rate, interrupt_event)
+
+    def _tts_play_stream(self, text, interrupt_event=None, cache_key=None):
+        """Odtwarzaj surowy PCM z Eleven Labs w miarę napływania kolejnych fragmentów."""
+        import sounddevice as sd
+        start = time.perf_counter()
+        first_audio_time = None
+        params = {"output_format": f"pcm_{self.tts_sample_rate}"}
+        response = self.http.post("elevenlabs", self._tts_stream_url(), headers=self._tts_headers("audio/pcm"),
+                                  params=params, json=self._tts_payload(text), stream=True, deadline=10)
+        response.raise_for_status()
+
+        leftover = b""
+        received = [] if cache_key else None
+        interrupted = False
+        with sd.OutputStream(samplerate=self.tts_sample_rate, channels=1, dtype='int16') as stream:
+            for chunk in response.iter_content(chunk_size=self.tts_chunk_size):
+                if interrupt_event is not None and interrupt_event.is_set():
+                    # abort() porzuca dźwięk w buforze zamiast go dogrywać
+                    stream.abort()
+                    response.close()
+                    interrupted = True
+                    break
+                if not chunk:
+                    continue
+                if received is not None:
+                    received.append(chunk)
+                if leftover:
+                    chunk = leftover + chunk
+                    leftover = b""
+                # Próbki int16 mają 2 bajty - nieparzysty bajt przechodzi do następnego fragmentu
+                usable = len(chunk) - (len(chunk) % 2)
+                if usable < len(chunk):
+                    leftover = chunk[usable:]
+                if not usable:
+                    continue
+                # np.frombuffer na memoryview nie kopiuje danych
+                samples = np.frombuffer(memoryview(chunk)[:usable], dtype=np.int16)
+                stream.write(samples.reshape(-1, 1))
+                if first_audio_time is None:
+                    first_audio_time = time.perf_counter() - start
+                    metrics.observe_stage("tts_first_audio", first_audio_time)
+                    self.last_first_audio_at = time.time()
+            synthesis_time = time.perf_counter() - start
+            if not interrupted:
+                metrics.observe_stage("tts_synthesis", synthesis_time)
+        # Wyjście z bloku "with" czeka na odtworzenie reszty bufora
+        total_time = time.perf_counter() - start
+        if first_audio_time is not None:
+            # Odtwarzanie: od pierwszego zapisanego fragmentu do końca dźwięku (synteza biegnie równolegle)
+            metrics.observe_stage("playback", total_time - first_audio_time)
+
+        if interrupted:
+            print("TTS: wypowiedź przerwana przez ważniejszy komunikat.")
+            return
+        if first_audio_time is None:
+            print("TTS: serwer nie zwrócił żadnego dźwięku.")
+            return
+        if received:
+            self.tts_cache.put(cache_key, b"".join(received))
+        print(f"TTS: pierwszy dźwięk po {first_audio_time * 1000:.0f} ms, "
+              f"synteza {synthesis_time:.2f} s, razem z odtwarzaniem {total_time:.2f} s")
+
+    def warm_up_connections(self):
+        """Otwórz w tle połączenia z API, z których asystent będzie korzystał."""
+        urls = []
+        if self.openrouter_api_key:
+            urls.append(f"{self.openrouter_url}/models")
+        if self.tts_model_loaded:
+            urls.append(f"{self.elevenlabs_url}/models")
+        if self.openweather_api_key:
+            urls.append(f"{self.openweather_url}/weather")
+        return self.http.warm_up(urls)
 
     def reset_recognition_time(self):
         self.last_recognition_time = time.time() # Resetuj czas, aby sesja nie wygasła
@@ -155,14 +614,20 @@ class VoiceAssistant:
 
     # --- Funkcje komend ---
     def get_weather(self, city):
+        """Pogoda dla miasta z cache (TTL + odświeżanie w tle)."""
+        payload, _, _ = self.weather_cache.get(city)
+        return payload
+
+    def _fetch_weather(self, city):
         try:
             if city:
                 query_city = city
             else:
                 query_city = self.default_city # Użyj domyślnego miasta z pliku .env
 
-            url = f"http://api.openweathermap.org/data/2.5/weather?q={query_city}&appid={self.openweather_api_key}&units=metric&lang=pl"
-            response = requests.get(url, timeout=10)
+            url = f"{self.openweather_url}/weather?q={query_city}&appid={self.openweather_api_key}&units=metric&lang=pl"
+            with metrics.span("weather_request"):
+                response = self.http.get("openweather", url, deadline=10)
             response.raise_for_status()
             data = response.json()
             if data.get('cod') != 200:
@@ -199,13 +664,6 @@ class VoiceAssistant:
 
     def save_note(self, content):
         try:
-            notes = []
-            if os.path.exists(self.notes_file):
-                with open(self.notes_file, 'r', encoding='utf-8') as f:
-                    try:
-                        notes = json.load(f)
-                    except Exception:
-                        notes = []
             # Unikalny ID na bazie czasu i losowej liczby
             note_id = int(datetime.datetime.now().timestamp() * 1000) + random.randint(1, 999)
             note = {
@@ -213,9 +671,10 @@ class VoiceAssistant:
                 "timestamp": datetime.datetime.now().isoformat(),
                 "content": content
             }
-            notes.append(note)
-            with open(self.notes_file, 'w', encoding='utf-8') as f:
-                json.dump(notes, f, indent=2, ensure_ascii=False)
+            self.storage.notes.insert(note)
+            with self._note_index_lock:
+                if self._note_index is not None:
+                    self._note_index.add(note)
             return "Notatka została zapisana."
         except Exception as e:
             print(f"Błąd zapisu notatki: {e}")
@@ -223,80 +682,194 @@ class VoiceAssistant:
 
     def get_notes(self):
         try:
-            if os.path.exists(self.notes_file):
-                with open(self.notes_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return []
+            return self.storage.notes.list()
         except Exception as e:
             print(f"Błąd odczytu notatek: {e}")
             return []
 
+    def recent_notes_summary(self, numbered=False):
+        """Tekst do odczytania: tylko `NOTES_READ_LIMIT` najnowszych notatek i liczba pozostałych.
+
+        Wszystkie notatki w jednym tekście przekraczały limit długości
+        Eleven Labs już przy kilkuset wpisach - reszta jest dostępna przez
+        wyszukiwanie albo /api/notes?cursor=.
+        """
+        try:
+            total = self.storage.notes.count()
+            notes = self.storage.notes.latest(self.notes_read_limit) if total else []
+        except Exception as e:
+            print(f"Błąd odczytu notatek: {e}")
+            return "Nie udało się odczytać notatek."
+        if not notes:
+            return "Nie masz jeszcze żadnych notatek."
+        if numbered:
+            contents = " ".join(f"Notatka {i}: {note['content']}." for i, note in enumerate(notes, 1))
+        else:
+            contents = ", ".join(note["content"] for note in notes)
+        if total <= len(notes):
+            return f"Oto Twoje notatki: {contents}"
+        return (f"Masz {total} notatek. Oto {len(notes)} najnowszych: {contents} "
+                f"Pozostałe znajdziesz, mówiąc: znajdź notatkę o, i czego szukasz.")
+
     def delete_note(self, note_id):
         try:
-            notes = []
-            if os.path.exists(self.notes_file):
-                with open(self.notes_file, 'r', encoding='utf-8') as f:
-                    notes = json.load(f)
-            notes = [n for n in notes if n["id"] != note_id]
-            with open(self.notes_file, 'w', encoding='utf-8') as f:
-                json.dump(notes, f, indent=2, ensure_ascii=False)
+            self.storage.notes.delete(note_id)
+            with self._note_index_lock:
+                if self._note_index is not None:
+                    self._note_index.remove(note_id)
             return "Notatka usunięta."
         except Exception as e:
             print(f"Błąd usuwania notatki: {e}")
             return "Nie udało się usunąć notatki."
 
-    def run_ai(self, prompt):
-        # Notatki
-        if "zapisz notatkę" in prompt.lower() or "zrób notatkę" in prompt.lower():
-            content = prompt.lower().replace("zapisz notatkę", "").replace("zrób notatkę", "").strip()
-            if not content:
-                return "Co mam zapisać w notatce?"
-            return self.save_note(content)
-        if "pokaż notatki" in prompt.lower() or "wyświetl notatki" in prompt.lower():
-            notes = self.get_notes()
-            if not notes:
-                return "Nie masz jeszcze żadnych notatek."
-            return "Oto Twoje notatki: " + ", ".join([note['content'] for note in notes])
-        # Pogoda
-        weather_triggers = ["pogod", "temperatur", "deszcz", "słońc", "śnieg", "wilgotność", "wiatr"]
-        if any(trigger in prompt.lower() for trigger in weather_triggers):
-            city_name = None
-            if "w" in prompt.lower():
-                parts = prompt.lower().split("w")
-                if len(parts) > 1:
-                    city_name = parts[1].strip().split(" ")[0].capitalize()
-            
-            weather_info = self.get_weather(city_name)
-            if "error" in weather_info:
-                return weather_info["error"]
-            return (f"Aktualna pogoda w {weather_info['city']}: "
-                    f"{weather_info['description']}, "
-                    f"temperatura: {weather_info['temp']}°C "
-                    f"(odczuwalna {weather_info['feels_like']}°C), "
-                    f"wilgotność: {weather_info['humidity']}%, "
-                    f"wiatr: {weather_info['wind_speed']} km/h")
-        # Funkcja Wake on LAN
-        wake_triggers = ["włącz komputer", "uruchom komputer", "włącz pc", "włącz pecet"]
-        if any(trigger in prompt.lower() for trigger in wake_triggers):
-            return self.wake_computer()
-        # Zakończ sesję
-        if any(end in prompt.lower() for end in self.end_words):
-            self.active_session = False
-            return "Kończę nasłuchiwanie. Miłego dnia!"
+    def note_index(self):
+        with self._note_index_lock:
+            if self._note_index is None:
+                start = time.perf_counter()
+                index = NoteIndex()
+                index.build(self.storage.notes.list())
+                self._note_index = index
+                print(f"Zbudowano indeks {len(index)} notatek w {(time.perf_counter() - start) * 1000:.0f} ms.")
+            return self._note_index
+
+    def search_notes(self, query, offset=0, limit=20):
+        """Notatki pasujące do zapytania, od najlepiej dopasowanej: (notatki, łączna liczba trafień)."""
+        try:
+            with metrics.span("note_search"):
+                hits, total = self.note_index().search(query, offset=offset, limit=limit)
+                notes = self.storage.notes.get_many([note_id for note_id, _ in hits])
+            scores = dict(hits)
+            return [dict(note, score=scores[note["id"]]) for note in notes], total
+        except Exception as e:
+            print(f"Błąd wyszukiwania notatek: {e}")
+            return [], 0
+
+    # --- Obsługa lokalnych intencji ---
+    def _handle_note_save(self, match):
+        content = match.slots.get("content")
+        if not content:
+            return "Co mam zapisać w notatce?"
+        return self.save_note(content)
+
+    def _handle_notes_show(self, match):
+        return self.recent_notes_summary()
+
+    def _handle_note_search(self, match):
+        query = match.slots.get("query")
+        if not query:
+            return "Czego mam szukać w notatkach?"
+        notes, total = self.search_notes(query, limit=3)
+        if not notes:
+            return f"Nie znalazłam notatek o {query}."
+        found = ", ".join(note["content"] for note in notes)
+        if total > len(notes):
+            return f"Znalazłam {total} pasujących notatek. Najlepiej pasują: {found}"
+        return f"Znalazłam: {found}"
+
+    def _handle_weather(self, match):
+        city_name = match.slots.get("city")
+        speculation = self._take_speculation(("weather", city_name))
+        weather_info = speculation.result() if speculation else self.get_weather(city_name)
+        if "error" in weather_info:
+            return weather_info["error"]
+        return (f"Aktualna pogoda w {weather_info['city']}: "
+                f"{weather_info['description']}, "
+                f"temperatura: {weather_info['temp']}°C "
+                f"(odczuwalna {weather_info['feels_like']}°C), "
+                f"wilgotność: {weather_info['humidity']}%, "
+                f"wiatr: {weather_info['wind_speed']} km/h")
+
+    def _handle_wake_computer(self, match):
+        return self.wake_computer()
+
+    def _handle_end(self, match):
+        self.active_session = False
+        return "Kończę nasłuchiwanie. Miłego dnia!"
+
+    def run_ai(self, prompt, on_delta=None):
+        """Obsłuż komendę lokalnie albo zapytaj AI.
+
+        Gdy podano `on_delta`, odpowiedź AI jest strumieniowana - funkcja
+        dostaje kolejne fragmenty tekstu jeszcze przed końcem generowania.
+        Zwracany jest zawsze pełny tekst odpowiedzi.
+        """
+        with metrics.span("intent"):
+            match = self.intent_router.match(prompt)
+        if match is not None:
+            return self._intent_handlers[match.name](match)
         # AI
+        cache_key = self.ai_cache.make_key(prompt, self.ai_model, self.ai_system_prompt) if self.ai_cache_enabled else None
+        if cache_key:
+            cached = self.ai_cache.get(cache_key)
+            if cached is not None:
+                print("AI: odpowiedź z cache.")
+                if on_delta is not None:
+                    on_delta(cached)
+                return cached
         try:
-            headers = {"Authorization": f"Bearer {self.openrouter_api_key}", "Content-Type": "application/json"}
-            payload = {
-                "model": "openai/gpt-oss-20b:free",
-                "messages": [
-                    {"role": "system", "content": "Jesteś pomocnym asystentem głosowym o imieniu Nowa. Odpowiadaj żywo, naturalnie i krótko oraz rozmownie, zawsze po polsku. Zakaz emotek i znaków specjalnych. nie używaj **."},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.7,
-                "max_tokens": 400
-            }
-            r = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload, timeout=30)
-            r.raise_for_status()
-            return r.json()['choices'][0]['message']['content']
+            start = time.perf_counter()
+            with metrics.span("llm_request"):
+                if on_delta is not None and self.llm_streaming:
+                    response = self._ask_ai_stream(prompt, on_delta)
+                else:
+                    r = self.http.post("openrouter", f"{self.openrouter_url}/chat/completions",
+                                       headers=self._ai_headers(), json=self._ai_payload(prompt), deadline=30)
+                    r.raise_for_status()
+                    response = r.json()['choices'][0]['message']['content']
         except Exception as e:
-            return f"Błąd w komunikacji z AI: {e}"
\ No newline at end of file
+            return f"Błąd w komunikacji z AI: {e}"
+        if cache_key:
+            self.ai_cache.put(cache_key, response, ttl=self.ai_cache.ttl_for(prompt),
+                              latency=time.perf_counter() - start)
+        return response
+
+    def _ai_headers(self):
+        return {"Authorization": f"Bearer {self.openrouter_api_key}", "Content-Type": "application/json"}
+
+    def _ai_payload(self, prompt, stream=False):
+        payload = {
+            "model": self.ai_model,
+            "messages": [
+                {"role": "system", "content": self.ai_system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.7,
+            "max_tokens": 400
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def _ask_ai_stream(self, prompt, on_delta):
+        """Czytaj odpowiedź OpenRouter jako strumień SSE, przekazując każdy fragment do `on_delta`."""
+        start = time.perf_counter()
+        first_token_time = None
+        parts = []
+        r = self.http.post("openrouter", f"{self.openrouter_url}/chat/completions",
+                           headers=self._ai_headers(), json=self._ai_payload(prompt, stream=True),
+                           stream=True, deadline=30)
+        r.raise_for_status()
+        with r:
+            for raw_line in r.iter_lines():
+                # Linie zaczynające się od ":" to komentarze SSE (np. "OPENROUTER PROCESSING")
+                if not raw_line or not raw_line.startswith(b"data:"):
+                    continue
+                data = raw_line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                chunk = json.loads(data)
+                if chunk.get("error"):
+                    raise RuntimeError(chunk["error"].get("message", "błąd strumienia"))
+                choices = chunk.get("choices") or [{}]
+                delta = (choices[0].get("delta") or {}).get("content")
+                if not delta:
+                    continue
+                if first_token_time is None:
+                    first_token_time = time.perf_counter() - start
+                    metrics.observe_stage("llm_first_token", first_token_time)
+                parts.append(delta)
+                on_delta(delta)
+        if first_token_time is not None:
+            print(f"AI: pierwszy token po {first_token_time * 1000:.0f} ms, "
+                  f"cała odpowiedź po {time.perf_counter() - start:.2f} s")
+        return "".join(parts)
@@ -0,0 +1,128 @@
+# audio_capture.py
+import sys
+import time
+import threading
+
+from metrics import metrics
+
+
+class AudioCapture:
+    """Stały wątek nagrywania z mikrofonu zapisujący bloki do ograniczonego bufora pierścieniowego.
+
+    Urządzenie otwierane jest raz. Odbiorcy (słowo aktywujące, komendy,
+    notatki głosowe) czytają niezależnie, każdy ze swoim kursorem - numerem
+    kolejnego bloku. Kursor starszy niż najstarszy blok w buforze jest
+    przesuwany do przodu (utrata najstarszych danych zamiast blokowania).
+
+    `stream_factory` pozwala podać inne źródło niż mikrofon (np. odtwarzanie
+    nagrań WAV w benchmarkach): funkcja zwracająca menedżer kontekstu
+    z metodą `read(frames)` -> (dane, przepełnienie), jak sd.RawInputStream.
+    """
+
+    def __init__(self, sample_rate=16000, blocksize=8000, buffer_seconds=30.0, gate=None, stream_factory=None):
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.capacity = max(2, int(buffer_seconds * sample_rate / blocksize))
+        self.gate = gate  # funkcja zwracająca False, gdy mikrofon ma być wyciszony (np. podczas TTS)
+        self.stream_factory = stream_factory or self._microphone
+        self._blocks = [None] * self.capacity
+        self._stamps = [0.0] * self.capacity  # chwila zapisu bloku (perf_counter) - do etapu "capture"
+        self._head = 0  # numer następnego bloku do zapisania
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self.overflows = 0
+
+    @property
+    def block_seconds(self):
+        return self.blocksize / self.sample_rate
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, name="audio-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    @property
+    def running(self):
+        return self._running
+
+    def _microphone(self):
+        import sounddevice as sd  # import leniwy - ładuje PortAudio dopiero przy otwarciu mikrofonu
+        return sd.RawInputStream(samplerate=self.sample_rate, blocksize=self.blocksize,
+                                 dtype='int16', channels=1)
+
+    def _capture_loop(self):
+        while self._running:
+            try:
+                with self.stream_factory() as stream:
+                    print("Mikrofon otwarty - nagrywanie ciągłe.")
+                    while self._running:
+                        data, overflowed = stream.read(self.blocksize)
+                        metrics.inc("audio_blocks_total")
+                        if overflowed:
+                            self.overflows += 1
+                            metrics.inc("audio_overflows_total")
+                            print("Przepełnienie bufora wejściowego audio.", file=sys.stderr)
+                        if self.gate is not None and not self.gate():
+                            metrics.inc("audio_dropped_blocks_total")
+                            continue
+                        self._append(bytes(data))
+            except Exception as e:
+                print(f"Błąd nagrywania audio: {e}")
+                time.sleep(1.0)  # spróbuj ponownie otworzyć urządzenie
+
+    def _append(self, data):
+        with self._cond:
+            self._blocks[self._head % self.capacity] = data
+            self._stamps[self._head % self.capacity] = time.perf_counter()
+            self._head += 1
+            self._cond.notify_all()
+
+    def cursor(self, preroll=0.0, not_before=None):
+        """Kursor wskazujący `preroll` sekund wstecz od bieżącego bloku.
+
+        `not_before` pozwala kontynuować od miejsca, w którym skończył
+        poprzedni odbiorca, o ile nie cofa się dalej niż preroll.
+        """
+        with self._cond:
+            preroll_blocks = int(round(preroll / self.block_seconds))
+            start = max(self._oldest(), self._head - preroll_blocks)
+            if not_before is not None:
+                start = max(start, min(not_before, self._head))
+            return start
+
+    def read(self, cursor, timeout=0.5):
+        """Zwróć (blok, nowy_kursor) albo (None, kursor) po upływie `timeout`.
+
+        Etap "capture" w metrykach to czas od zapisu bloku do jego odczytu,
+        liczony tylko dla bloków, na które odbiorca czekał. Bloki zapisane
+        przed wywołaniem (pre-roll z `cursor`, zaległości) leżały w buforze
+        z wyboru odbiorcy, a nie przez opóźnienie mikrofonu.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            waited = cursor >= self._head
+            while cursor >= self._head:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    return None, cursor
+                self._cond.wait(remaining)
+            cursor = max(cursor, self._oldest())
+            block, stamp = self._blocks[cursor % self.capacity], self._stamps[cursor % self.capacity]
+        if waited:
+            metrics.observe_stage("capture", time.perf_counter() - stamp)
+        return block, cursor + 1
+
+    def _oldest(self):
+        return max(0, self._head - self.capacity)
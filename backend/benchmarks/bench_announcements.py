@@ -0,0 +1,102 @@
+# bench_announcements.py
+"""Opóźnienie zapowiedzi budzika od terminu do pierwszego dźwięku: synteza w chwili terminu vs przygotowana wcześniej.
+
+Budzik uruchamiany jest tak jak robi to harmonogram (on_scheduled_event
+z app.py). "Dawniej" zapowiedź syntezowana jest dopiero w chwili terminu,
+"teraz" - wcześniej, przez prepare_announcement (przy sprawnej sieci),
+a w chwili terminu gra z pamięci. ElevenLabs zastępuje lokalny serwer
+(mock_apis.py), którego opóźnienie w chwili terminu jest zmieniane:
+sieć normalna, wolna i niedostępna. Odtwarzanie tylko odmierza czas.
+
+Uruchomienie:  python backend/benchmarks/bench_announcements.py [--runs 5] [--slow-first-chunk 2.0]
+"""
+import os
+import sys
+import time
+import datetime
+import argparse
+import tempfile
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+sys.path.insert(0, BENCH_DIR)
+from mock_apis import MockApis  # noqa: E402
+from bench_pipeline import null_sounddevice  # noqa: E402
+
+
+def trigger(server, item):
+    """Uruchom budzik; zwraca (wypowiedziany?, ms od terminu do pierwszego dźwięku)."""
+    server.assistant.last_first_audio_at = 0.0
+    start = time.time()
+    spoken = server.on_scheduled_event("alarm", item, False).result()
+    first_audio = server.assistant.last_first_audio_at
+    return spoken, (first_audio - start) * 1000 if spoken and first_audio else None
+
+
+def prepare(server, item):
+    server.prepare_announcement("alarm", item, datetime.datetime.now() + datetime.timedelta(minutes=10))
+    while server.announcements.stats()["pending"]:
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--first-chunk", type=float, default=0.3, help="czas do pierwszego bajtu TTS (s)")
+    parser.add_argument("--slow-first-chunk", type=float, default=2.0, help="to samo przy wolnej sieci (s)")
+    args = parser.parse_args()
+
+    apis = MockApis(tts_first_chunk=args.first_chunk, seconds_per_char=0.02)
+    tmp = tempfile.mkdtemp(prefix="nova-bench-")
+    os.environ.update(apis.start())
+    os.environ.update({
+        "ELEVENLABS_API_KEY": "bench", "ELEVENLABS_VOICE_ID": "bench",
+        "DB_FILE": os.path.join(tmp, "bench.db"), "NOTES_FILE": os.path.join(tmp, "notes.json"),
+        "TTS_CACHE_DIR": os.path.join(tmp, "tts"), "TTS_CACHE_MAX_TEXT": "0",
+        "CONVERSATION_DIR": os.path.join(tmp, "conversation"),
+    })
+    sys.modules["sounddevice"] = null_sounddevice()
+    import app as server
+
+    networks = [("normalna", args.first_chunk), ("wolna", args.slow_first_chunk), ("niedostępna", None)]
+    rows = []
+    serial = 0
+    for network, first_chunk in networks:
+        for mode in ("dawniej", "teraz"):
+            latencies, silent = [], 0
+            for _ in range(args.runs):
+                serial += 1
+                item = {"id": serial, "time": "07:00", "label": f"pobudka numer {serial}", "active": True}
+                apis.tts_first_chunk = args.first_chunk
+                if mode == "teraz":
+                    prepare(server, item)
+                if first_chunk is None:
+                    apis.stop()
+                    server.assistant.http.close()  # bez połączeń keep-alive do zatrzymanego serwera
+                else:
+                    apis.tts_first_chunk = first_chunk
+                spoken, latency = trigger(server, item)
+                if first_chunk is None:
+                    os.environ.update(apis.start())
+                    server.assistant.elevenlabs_url = os.environ["ELEVENLABS_BASE_URL"]
+                if spoken:
+                    latencies.append(latency)
+                else:
+                    silent += 1
+            rows.append((network, mode, latencies, silent))
+    apis.stop()
+
+    print(f"\nZapowiedzi budzika, {args.runs} na wiersz; pierwszy bajt TTS: {args.first_chunk} s, "
+          f"wolna sieć {args.slow_first_chunk} s\n")
+    print(f"{'sieć w chwili terminu':<22} {'tryb':<8} {'p50 ms':>8} {'max ms':>8} {'ciche':>6}")
+    for network, mode, latencies, silent in rows:
+        p50 = f"{np.percentile(latencies, 50):.0f}" if latencies else "-"
+        worst = f"{max(latencies):.0f}" if latencies else "-"
+        print(f"{network:<22} {mode:<8} {p50:>8} {worst:>8} {silent:>6}")
+    print(f"\nStatystyki: {server.announcements.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# bench_browser_stt.py
+"""Test obciążenia sesji mowy z przeglądarek: ile równoczesnych strumieni jedna maszyna dekoduje w czasie rzeczywistym.
+
+Każdy strumień to 100 ms kawałki PCM 16 kHz podawane do RecognizerPool
+w tempie nagrania - tak jak handler Socket.IO `stt_audio` dla jednego
+klienta. Dla kolejnych liczb strumieni mierzone są: odrzucone kawałki
+(backpressure), długość kolejki (ms nagrania czekającego na dekodowanie)
+i zużycie CPU. Liczba strumieni jest "utrzymana", gdy nic nie odrzucono,
+a p95 kolejki nie przekracza --max-lag-ms.
+
+Uruchomienie:
+    python backend/benchmarks/bench_browser_stt.py --wav nagranie.wav [--streams 1,2,4,8,16] [--seconds 20]
+
+Model z VOSK_MODEL_PATH (domyślnie models/vosk-model-small-pl-0.22). Bez
+--wav podawany jest syntetyczny sygnał o rytmie mowy (1,5 s dźwięku,
+0,5 s ciszy). --synthetic-decode-ms zastępuje Kaldi sztucznym czasem
+dekodowania (ms na 100 ms nagrania) - sprawdza samą pulę, nie model ani CPU.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+import psutil
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from stt_sessions import RecognizerPool  # noqa: E402
+
+SAMPLE_RATE = 16000
+CHUNK = SAMPLE_RATE // 10  # 100 ms
+
+
+def load_audio(path):
+    if path is None:
+        # Ton z harmonicznymi modulowany jak sylaby, przerwy co 2 s - przechodzi przez VAD jak mowa
+        t = np.arange(SAMPLE_RATE * 10) / SAMPLE_RATE
+        voice = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((140, 280, 420, 700, 1100)))
+        envelope = (0.5 + 0.5 * np.sin(2 * np.pi * 4 * t)) * ((t % 2.0) < 1.5)
+        noise = np.random.default_rng(0).normal(0, 0.01, len(t))
+        return ((voice * envelope * 0.25 + noise) * 32767).clip(-32768, 32767).astype(np.int16)
+    import soundfile as sf
+    samples, rate = sf.read(path, dtype="int16")
+    if rate != SAMPLE_RATE:
+        raise SystemExit(f"{path}: nagranie musi mieć {SAMPLE_RATE} Hz (ma {rate} Hz)")
+    return samples[:, 0] if samples.ndim > 1 else samples
+
+
+class SyntheticRecognizer:
+    """Zastępczy rozpoznawacz: czeka proporcjonalnie do długości nagrania, zwalniając GIL jak Kaldi.
+
+    Nie zużywa CPU, więc pokazuje tylko przepustowość puli wątków i backpressure.
+    """
+
+    def __init__(self, model, sample_rate, cost_per_chunk):
+        self.cost = cost_per_chunk
+        self.bytes = 0
+
+    def AcceptWaveform(self, data):
+        time.sleep(self.cost * len(data) / (CHUNK * 2))
+        self.bytes += len(data)
+        return self.bytes % (SAMPLE_RATE * 4) < len(data)
+
+    def Result(self):
+        return json.dumps({"text": "syntetyczny wynik"})
+
+    def PartialResult(self):
+        return json.dumps({"partial": "syntetyczny"})
+
+    def FinalResult(self):
+        return self.Result()
+
+    def Reset(self):
+        self.bytes = 0
+
+
+def run(pool, audio, streams, seconds):
+    sids = [f"strumien-{i}" for i in range(streams)]
+    for sid in sids:
+        pool.open(sid)
+    offsets = [(i * CHUNK * 7) % (len(audio) - CHUNK) for i in range(streams)]  # różne miejsca nagrania
+    lags, dropped, sent = [], 0, 0
+    process = psutil.Process()
+    process.cpu_percent(None)
+    start = time.monotonic()
+    ticks = int(seconds * 10)
+    for tick in range(ticks):
+        for i, sid in enumerate(sids):
+            offset = offsets[i]
+            chunk = audio[offset:offset + CHUNK]
+            offsets[i] = (offset + CHUNK) % (len(audio) - CHUNK)
+            accepted, queued_ms = pool.feed(sid, chunk.tobytes())
+            sent += 1
+            dropped += not accepted
+            lags.append(queued_ms)
+        time.sleep(max(0.0, start + (tick + 1) * 0.1 - time.monotonic()))
+    cpu = process.cpu_percent(None)
+    stats = {s["sid"]: s for s in pool.stats()["streams"]}
+    speeds = [stats[sid]["speed"] for sid in sids if stats.get(sid, {}).get("speed")]
+    for sid in sids:
+        pool.close(sid, flush=False)
+    time.sleep(0.2)
+    return {"sent": sent, "dropped": dropped, "p95_lag": float(np.percentile(lags, 95)), "max_lag": max(lags),
+            "cpu": cpu, "speed": min(speeds) if speeds else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--wav")
+    parser.add_argument("--streams", default="1,2,4,8,16")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--max-lag-ms", type=float, default=300)
+    parser.add_argument("--no-vad", action="store_true")
+    parser.add_argument("--synthetic-decode-ms", type=float)
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.streams.split(",")]
+    audio = load_audio(args.wav)
+    if args.synthetic_decode_ms is not None:
+        cost = args.synthetic_decode_ms / 1000
+        model, factory = object(), lambda model, rate: SyntheticRecognizer(model, rate, cost)
+        print(f"Sztuczny dekoder: {args.synthetic_decode_ms} ms na 100 ms nagrania (bez modelu Vosk).")
+    else:
+        from vosk import Model, SetLogLevel
+        SetLogLevel(-1)
+        model_path = os.getenv("VOSK_MODEL_PATH", os.path.join(os.path.dirname(__file__), "..", "models",
+                                                               "vosk-model-small-pl-0.22"))
+        if not os.path.isdir(model_path):
+            raise SystemExit(f"Brak modelu Vosk w {model_path} (ustaw VOSK_MODEL_PATH albo użyj --synthetic-decode-ms).")
+        model, factory = Model(model_path), None
+    pool = RecognizerPool(lambda: model, max_sessions=max(counts), workers=args.workers,
+                          use_vad=not args.no_vad, recognizer_factory=factory)
+
+    print(f"Rdzenie: {os.cpu_count()}, wątki dekodujące: {args.workers}, VAD: {'nie' if args.no_vad else 'tak'}\n")
+    print(f"{'strumienie':>10} {'odrzucone':>10} {'p95 kolejki ms':>15} {'max ms':>8} {'CPU %':>7} {'x czas rz.':>10}  wynik")
+    sustained = 0
+    for streams in counts:
+        result = run(pool, audio, streams, args.seconds)
+        ok = result["dropped"] == 0 and result["p95_lag"] <= args.max_lag_ms
+        sustained = streams if ok else sustained
+        speed = f"{result['speed']:.1f}" if result["speed"] else "-"
+        print(f"{streams:>10} {result['dropped']:>10} {result['p95_lag']:>15.0f} {result['max_lag']:>8.0f} "
+              f"{result['cpu']:>7.0f} {speed:>10}  {'OK' if ok else 'nie nadąża'}")
+        if not ok:
+            break
+    print(f"\nUtrzymanych w czasie rzeczywistym: {sustained} strumieni")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# bench_intents.py
+"""Mikro-benchmark routera intencji i tabela poprawności.
+
+Uruchomienie:  python backend/benchmarks/bench_intents.py [liczba_powtórzeń]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from intents import build_default_router  # noqa: E402
+
+END_WORDS = "stop,koniec,zakończ,wyjdź".split(",")
+
+# (wypowiedź, oczekiwana intencja, oczekiwane sloty)
+CORPUS = [
+    ("zapisz notatkę kupić mleko", "note_save", {"content": "kupić mleko"}),
+    ("nowa zrób notatkę zadzwonić do mamy", "note_save", {"content": "zadzwonić do mamy"}),
+    ("zapisz notatkę", "note_save", {"content": ""}),
+    ("zapisz notatkę że jutro pogoda będzie ładna", "note_save", {"content": "że jutro pogoda będzie ładna"}),
+    ("pokaż notatki", "notes_show", {}),
+    ("wyświetl notatki proszę", "notes_show", {}),
+    ("jaka jest pogoda", "weather", {"city": None}),
+    ("jaka jest pogoda w krakowie", "weather", {"city": "Kraków"}),
+    ("jaka będzie temperatura we wrocławiu", "weather", {"city": "Wrocław"}),
+    ("czy będzie padać deszcz w łodzi", "weather", {"city": "Łódź"}),
+    ("jaka jest wilgotność", "weather", {"city": None}),
+    ("jaka pogoda w tym tygodniu", "weather", {"city": None}),
+    ("czy wieje wiatr", "weather", {"city": None}),
+    ("włącz komputer", "wake_computer", {}),
+    ("uruchom komputer w salonie", "wake_computer", {}),
+    ("wlacz pc", "wake_computer", {}),
+    ("stop", "end", {}),
+    ("dobra koniec", "end", {}),
+    ("zakończ", "end", {}),
+    ("opowiedz żart", None, {}),
+    ("jaki jest dzień", None, {}),
+    ("jak zrobić naleśniki", None, {}),
+    ("kto wygrał mundial w dwa tysiące osiemnastym", None, {}),
+    ("stopień trudności tego przepisu", None, {}),
+]
+
+
+def legacy_route(prompt, end_words=END_WORDS):
+    """Dawny łańcuch if-ów z run_ai - punkt odniesienia dla czasu routingu."""
+    if "zapisz notatkę" in prompt.lower() or "zrób notatkę" in prompt.lower():
+        return "note_save"
+    if "pokaż notatki" in prompt.lower() or "wyświetl notatki" in prompt.lower():
+        return "notes_show"
+    weather_triggers = ["pogod", "temperatur", "deszcz", "słońc", "śnieg", "wilgotność", "wiatr"]
+    if any(trigger in prompt.lower() for trigger in weather_triggers):
+        if "w" in prompt.lower():
+            parts = prompt.lower().split("w")
+            if len(parts) > 1:
+                parts[1].strip().split(" ")[0].capitalize()
+        return "weather"
+    wake_triggers = ["włącz komputer", "uruchom komputer", "włącz pc", "włącz pecet"]
+    if any(trigger in prompt.lower() for trigger in wake_triggers):
+        return "wake_computer"
+    if any(end in prompt.lower() for end in end_words):
+        return "end"
+    return None
+
+
+def check_correctness(router):
+    print(f"{'wypowiedź':<48} {'oczekiwana':<14} {'wynik':<14} sloty")
+    failures = 0
+    for text, expected_intent, expected_slots in CORPUS:
+        match = router.match(text)
+        name = match.name if match else None
+        slots = match.slots if match else {}
+        ok = name == expected_intent and all(slots.get(k) == v for k, v in expected_slots.items())
+        failures += not ok
+        print(f"{text:<48} {str(expected_intent):<14} {str(name):<14} {slots} {'OK' if ok else 'BŁĄD'}")
+    print(f"\nPoprawnie: {len(CORPUS) - failures}/{len(CORPUS)}")
+    return failures
+
+
+def bench(label, route, repeats, rounds=5):
+    """Najlepszy z `rounds` przebiegów - mniej szumu od innych procesów na jednym rdzeniu."""
+    texts = [text for text, _, _ in CORPUS]
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for text in texts:
+                route(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    per_call = best / (repeats * len(texts)) * 1e6
+    print(f"{label:<28} {per_call:8.2f} µs / wypowiedź")
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    start = time.perf_counter()
+    router = build_default_router(END_WORDS)
+    print(f"Kompilacja routera: {(time.perf_counter() - start) * 1000:.2f} ms\n")
+    failures = check_correctness(router)
+    print()
+    bench("router (regex)", router.match, repeats)
+    bench("dawny łańcuch if-ów", legacy_route, repeats)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# bench_note_index.py
+"""Wyszukiwanie w notatkach: indeks odwrócony (NoteIndex) vs przeglądanie wszystkich notatek.
+
+Uruchomienie:  python backend/benchmarks/bench_note_index.py [liczba_notatek] [liczba_zapytań]
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from intents import normalize  # noqa: E402
+from note_index import NoteIndex  # noqa: E402
+
+WORDS = ("kupić mleko chleb masło jajka zadzwonić do mamy lekarz wizyta dentysta spotkanie z szefem projekt "
+         "prezentacja rachunek za prąd gaz czynsz urodziny prezent dla siostry książka film serial trening "
+         "siłownia basen rower naprawa samochodu opony przegląd paszport wakacje bilety pociąg hotel "
+         "przepis na pierogi zupa ogórkowa ciasto ogród podlać kwiaty pomidory kot weterynarz").split()
+QUERIES = ("mleko", "zadzwonić do mamy", "przegląd samochodu", "bilety na pociąg", "przepisy na pierogi",
+           "urodzin siostry", "weterynarza", "rachunki za prąd")
+
+
+# Reszta słownika: sztuczne słowa o rozkładzie Zipfa, jak w prawdziwych notatkach - kilka częstych, wiele rzadkich
+FILLER = [f"slowo{i}" for i in range(5000)]
+FILLER_WEIGHTS = [1 / (i + 1) for i in range(len(FILLER))]
+
+
+def make_note(note_id, rng):
+    length = rng.randint(3, 15)
+    words = rng.choices(FILLER, FILLER_WEIGHTS, k=length)
+    words[rng.randrange(length)] = rng.choice(WORDS)
+    return {"id": note_id, "content": " ".join(words)}
+
+
+def scan(notes, query):
+    """Dawne podejście: podciąg w treści każdej notatki."""
+    words = normalize(query).split()
+    return [n["id"] for n in notes if all(w in normalize(n["content"]) for w in words)]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(0)
+    notes = [make_note(i, rng) for i in range(count)]
+
+    index = NoteIndex()
+    start = time.perf_counter()
+    index.build(notes)
+    print(f"Budowa indeksu {count} notatek: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    timings = {"search": [], "scan": [], "add": [], "remove": []}
+    for i in range(queries):
+        query = QUERIES[i % len(QUERIES)]
+        start = time.perf_counter()
+        index.search(query, limit=20)
+        timings["search"].append(time.perf_counter() - start)
+        if i < 20:
+            start = time.perf_counter()
+            scan(notes, query)
+            timings["scan"].append(time.perf_counter() - start)
+        note = make_note(count + i, rng)
+        start = time.perf_counter()
+        index.add(note)
+        timings["add"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        index.remove(rng.randrange(count))
+        timings["remove"].append(time.perf_counter() - start)
+
+    print(f"\n{'operacja':<10} {'n':>5} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, values in timings.items():
+        print(f"{name:<10} {len(values):>5} {percentile(values, 0.5):9.3f} {percentile(values, 0.95):9.3f}")
+
+
+if __name__ == "__main__":
+    main()
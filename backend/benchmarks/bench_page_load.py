@@ -0,0 +1,109 @@
+# bench_page_load.py
+"""Liczba zapytań i bajtów przy ładowaniu GUI: dawniej (osobne fetch-e, bez kompresji i cache) vs teraz.
+
+"Teraz" to /api/bootstrap, kompresja i warunkowe GET z ETagiem oraz pliki
+z odciskiem (?v=) trzymane przez przeglądarkę bez odpytywania serwera.
+Przeglądarkę udaje prosty cache HTTP nad klientem testowym Flaska; pogoda
+pochodzi z lokalnego serwera zastępczego (mock_apis.py). Skrypty z CDN
+(Tailwind, Alpine, Socket.IO) i połączenie Socket.IO nie są liczone.
+
+Uruchomienie:  python backend/benchmarks/bench_page_load.py [liczba_notatek]
+"""
+import os
+import re
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+sys.path.insert(0, BENCH_DIR)
+from mock_apis import MockApis  # noqa: E402
+
+LEGACY_REQUESTS = ["/", "/main.js", "/styles.css", "/api/weather", "/api/system", "/api/notes",
+                   "/api/alarms", "/api/reminders", "/api/settings"]
+
+
+class BrowserCache:
+    """Minimalny cache przeglądarki: immutable bez zapytania, reszta z If-None-Match."""
+
+    def __init__(self, client, accept_encoding):
+        self.client = client
+        self.accept_encoding = accept_encoding
+        self.entries = {}  # url -> (etag, immutable)
+
+    def get(self, url):
+        """Zwraca (wysłano zapytanie?, bajty treści w odpowiedzi, status)."""
+        etag, immutable = self.entries.get(url, (None, False))
+        if immutable:
+            return False, 0, 200
+        headers = {"Accept-Encoding": self.accept_encoding} if self.accept_encoding else {}
+        if etag:
+            headers["If-None-Match"] = etag
+        response = self.client.get(url, headers=headers)
+        body = len(response.get_data())
+        response.close()
+        if response.status_code == 200 and self.accept_encoding:
+            cache_control = response.headers.get("Cache-Control", "")
+            self.entries[url] = (response.headers.get("ETag"), "immutable" in cache_control)
+        return True, body, response.status_code
+
+
+def page_urls(client):
+    """Adresy ładowane przez nowe GUI: strona, pliki z odciskiem z jej treści i /api/bootstrap."""
+    html = client.get("/", headers={"Accept-Encoding": ""}).get_data(as_text=True)
+    assets = re.findall(r'(?:src|href)="((?:main\.js|styles\.css)\?v=[0-9a-f]+)"', html)
+    return ["/"] + ["/" + asset for asset in assets] + ["/api/bootstrap"]
+
+
+def load(cache, urls):
+    requests = body = 0
+    statuses = []
+    for url in urls:
+        sent, size, status = cache.get(url)
+        requests += sent
+        body += size
+        if sent:
+            statuses.append(status)
+    return requests, body, statuses
+
+
+def main():
+    notes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    apis = MockApis(weather_latency=0.0)
+    tmp = tempfile.mkdtemp(prefix="nova-bench-")
+    os.environ.update(apis.start())
+    os.environ.update({
+        "OPENWEATHER_API_KEY": "bench", "DB_FILE": os.path.join(tmp, "bench.db"),
+        "NOTES_FILE": os.path.join(tmp, "notes.json"), "TTS_CACHE_DIR": os.path.join(tmp, "tts"),
+        "CONVERSATION_DIR": os.path.join(tmp, "conversation"),
+    })
+    import app as server
+
+    for i in range(notes):
+        server.storage.notes.insert({"id": i + 1, "timestamp": "2025-08-19T21:16:17.234011",
+                                     "content": f"Notatka {i + 1}: kupić mleko, chleb i zadzwonić do mamy"})
+    for i in range(10):
+        server.storage.alarms.insert({"id": i + 1, "time": f"0{i}:30", "label": "pobudka", "active": True})
+        server.storage.reminders.insert({"id": i + 1, "time": f"1{i}:00", "content": "leki", "active": True})
+    client = server.app.test_client()
+
+    rows = []
+    legacy = BrowserCache(client, accept_encoding=None)
+    rows.append(("dawniej, pierwsze", *load(legacy, LEGACY_REQUESTS)))
+    rows.append(("dawniej, ponowne", *load(legacy, LEGACY_REQUESTS)))
+    urls = page_urls(client)
+    browser = BrowserCache(client, accept_encoding="br, gzip")
+    rows.append(("teraz, pierwsze", *load(browser, urls)))
+    rows.append(("teraz, ponowne", *load(browser, urls)))
+    server.storage.notes.insert({"id": notes + 1, "timestamp": "2025-08-20T08:00:00", "content": "nowa notatka"})
+    rows.append(("teraz, po zmianie", *load(browser, urls)))
+    apis.stop()
+
+    print(f"Kodowanie: {', '.join(server.compressor.encodings)}; notatek: {notes}\n")
+    print(f"{'ładowanie':<20} {'zapytania':>9} {'bajty treści':>13}  statusy")
+    for name, requests, body, statuses in rows:
+        print(f"{name:<20} {requests:>9} {body:>13}  {' '.join(map(str, statuses))}")
+
+
+if __name__ == "__main__":
+    main()
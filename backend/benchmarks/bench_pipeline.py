@@ -0,0 +1,266 @@
+# bench_pipeline.py
+"""Benchmark całego potoku: słowo aktywujące -> STT -> run_ai -> TTS -> odtwarzanie.
+
+Działa bez kluczy API, mikrofonu i głośników: OpenRouter, ElevenLabs
+i OpenWeather zastępują lokalne serwery (mock_apis.py), dźwięk wejściowy
+pochodzi z nagrań WAV zamiast sd.RawInputStream, a odtwarzanie trafia do
+"pustego" wyjścia, które tylko odmierza czas trwania nagrania.
+
+Uruchomienie:
+    python backend/benchmarks/bench_pipeline.py [--runs 20] [--wav-dir KATALOG] [--llm-first-token 0.35] ...
+
+KATALOG zawiera wake.wav (słowo aktywujące) i nagrania komend *.wav
+(16 kHz, mono), każde z transkrypcją w pliku .txt o tej samej nazwie.
+Etapy słowa aktywującego i STT wymagają modelu (VOSK_MODEL_PATH); bez
+niego komendy podawane są jako tekst z transkrypcji albo z listy poniżej.
+"""
+import os
+import sys
+import glob
+import time
+import types
+import argparse
+import tempfile
+import threading
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+sys.path.insert(0, BENCH_DIR)
+from mock_apis import MockApis  # noqa: E402
+
+SAMPLE_RATE = 16000
+BLOCKSIZE = 8000
+
+TEXT_COMMANDS = [
+    "opowiedz żart",
+    "jak zrobić naleśniki",
+    "kto napisał pana tadeusza",
+    "jaka jest pogoda w krakowie",
+    "ile nóg ma pająk",
+]
+
+
+def null_sounddevice():
+    """Zastępczy moduł sounddevice: nic nie gra, ale blokuje tak długo jak prawdziwe odtwarzanie."""
+    module = types.ModuleType("sounddevice")
+    state = {"until": 0.0}
+
+    def play(data, samplerate):
+        state["until"] = time.monotonic() + len(data) / samplerate
+
+    def wait():
+        time.sleep(max(0.0, state["until"] - time.monotonic()))
+
+    def stop():
+        state["until"] = 0.0
+
+    class OutputStream:
+        def __init__(self, samplerate, channels=1, dtype="int16"):
+            self.samplerate = samplerate
+            self._until = time.monotonic()
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            time.sleep(max(0.0, self._until - time.monotonic()))
+            return False
+
+        def write(self, samples):
+            # Bufor urządzenia ~0,2 s: write blokuje, gdy zapisano więcej niż tyle do przodu
+            now = time.monotonic()
+            self._until = max(self._until, now) + len(samples) / self.samplerate
+            time.sleep(max(0.0, self._until - now - 0.2))
+
+        def abort(self):
+            self._until = time.monotonic()
+
+    module.play, module.wait, module.stop, module.OutputStream = play, wait, stop, OutputStream
+    return module
+
+
+class WavFeeder:
+    """Źródło dźwięku dla AudioCapture: nagrania odtwarzane w czasie rzeczywistym, pomiędzy nimi cichy szum."""
+
+    def __init__(self, noise_level=20):
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._lock = threading.Lock()
+        self._done = None
+        self._next_block = None
+        self._rng = np.random.default_rng(0)
+        self.noise_level = noise_level
+        self.speech_end = None  # time.time() oddania ostatniego bloku nagrania
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        self._next_block = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def say(self, samples):
+        """Zacznij "mówić" nagranie; zwraca Event ustawiany po oddaniu jego ostatniego bloku."""
+        done = threading.Event()
+        with self._lock:
+            self._pending = samples.astype(np.int16)
+            self._done = done
+            self.speech_end = None
+        return done
+
+    def read(self, frames):
+        self._next_block += frames / SAMPLE_RATE
+        time.sleep(max(0.0, self._next_block - time.monotonic()))
+        block = self._rng.normal(0, self.noise_level, frames).astype(np.int16)
+        with self._lock:
+            take = min(frames, len(self._pending))
+            if take:
+                block[:take] = self._pending[:take]
+                self._pending = self._pending[take:]
+                if not len(self._pending):
+                    self.speech_end = time.time()
+                    self._done.set()
+        return block.tobytes(), False
+
+
+def load_utterances(wav_dir):
+    import soundfile as sf
+    wake, commands = None, []
+    for path in sorted(glob.glob(os.path.join(wav_dir, "*.wav"))):
+        samples, rate = sf.read(path, dtype="int16")
+        if rate != SAMPLE_RATE:
+            raise SystemExit(f"{path}: nagranie musi mieć {SAMPLE_RATE} Hz (ma {rate} Hz)")
+        if samples.ndim > 1:
+            samples = samples[:, 0]
+        if os.path.basename(path) == "wake.wav":
+            wake = samples
+            continue
+        transcript_path = os.path.splitext(path)[0] + ".txt"
+        transcript = open(transcript_path, encoding="utf-8").read().strip() if os.path.exists(transcript_path) else ""
+        commands.append((samples, transcript))
+    return wake, commands
+
+
+def percentiles(values):
+    if not values:
+        return None
+    return np.percentile(np.array(values) * 1000, [50, 95, 99])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--wav-dir")
+    parser.add_argument("--llm-first-token", type=float, default=0.35)
+    parser.add_argument("--llm-token-interval", type=float, default=0.015)
+    parser.add_argument("--tts-first-chunk", type=float, default=0.2)
+    parser.add_argument("--tts-chunk-interval", type=float, default=0.01)
+    parser.add_argument("--seconds-per-char", type=float, default=0.06, help="długość nagrania TTS na znak")
+    parser.add_argument("--no-stream", action="store_true", help="wyłącz strumieniowanie LLM i TTS")
+    args = parser.parse_args()
+
+    apis = MockApis(llm_first_token=args.llm_first_token, llm_token_interval=args.llm_token_interval,
+                    tts_first_chunk=args.tts_first_chunk, tts_chunk_interval=args.tts_chunk_interval,
+                    seconds_per_char=args.seconds_per_char)
+    tmp = tempfile.mkdtemp(prefix="nova-bench-")
+    os.environ.update(apis.start())
+    os.environ.update({
+        "OPENROUTER_API_KEY": "bench", "ELEVENLABS_API_KEY": "bench", "ELEVENLABS_VOICE_ID": "bench",
+        "OPENWEATHER_API_KEY": "bench",
+        "DB_FILE": os.path.join(tmp, "bench.db"), "NOTES_FILE": os.path.join(tmp, "notes.json"),
+        "TTS_CACHE_DIR": os.path.join(tmp, "tts"), "TTS_CACHE_MAX_TEXT": "0", "AI_CACHE": "0",
+        "LLM_STREAMING": "0" if args.no_stream else "1", "TTS_STREAMING": "0" if args.no_stream else "1",
+    })
+    sys.modules["sounddevice"] = null_sounddevice()
+    from assistant import VoiceAssistant
+    from streaming import SentenceSplitter, SentenceSpeaker
+
+    wake, commands = load_utterances(args.wav_dir) if args.wav_dir else (None, [])
+    feeder = WavFeeder()
+    assistant = VoiceAssistant(None, audio_source=feeder)
+    use_audio = bool(commands) and os.path.isdir(os.getenv("VOSK_MODEL_PATH", assistant.vosk_model_path))
+    if use_audio:
+        assistant.load_models()
+        use_audio = assistant.model_vosk is not None
+    if not use_audio:
+        print("Brak nagrań albo modelu Vosk - etapy słowa aktywującego i STT pominięte, komendy podawane tekstem.")
+        commands = [(None, text) for text in TEXT_COMMANDS] if not commands else commands
+    else:
+        assistant.start_capture()
+
+    stages = {name: [] for name in ("wake", "stt", "intent", "llm_first_token", "llm_total",
+                                    "first_audio", "playback", "end_to_end")}
+    for run in range(args.runs):
+        samples, transcript = commands[run % len(commands)]
+        if use_audio and wake is not None:
+            feeder.say(wake).wait()
+            if assistant.wait_for_wake_word(timeout=10):
+                stages["wake"].append(time.time() - feeder.speech_end)
+        if use_audio:
+            feeder.say(samples)
+            text = assistant.speech_to_text(timeout=15, incremental=True, persist_cursor=True)
+            if not text:
+                print(f"Przebieg {run + 1}: nie rozpoznano komendy")
+                continue
+            speech_end = feeder.speech_end or time.time()
+            stages["stt"].append(time.time() - speech_end)
+        else:
+            text, speech_end = transcript, time.time()
+
+        start = time.perf_counter()
+        match = assistant.intent_router.match(text)
+        stages["intent"].append(time.perf_counter() - start)
+
+        splitter = SentenceSplitter()
+        # Wywoływane po pierwszym zdaniu, zanim kolejka zacznie następne - last_first_audio_at dotyczy jeszcze jego
+        first_audio = []
+        speaker = SentenceSpeaker(assistant.tts_speak, on_first_audio=lambda: first_audio.append(assistant.last_first_audio_at))
+        first_token = []
+        streamed = []
+
+        def on_delta(delta):
+            if not first_token:
+                first_token.append(time.time())
+            streamed.append(delta)
+            for sentence in splitter.feed(delta):
+                speaker.say(sentence)
+
+        ai_start = time.time()
+        response = assistant.run_ai(text, on_delta=on_delta)
+        ai_end = time.time()
+        if streamed:
+            for sentence in splitter.flush():
+                speaker.say(sentence)
+        if not streamed or response != "".join(streamed):
+            speaker.say(response)
+        speaker.finish()
+        done = time.time()
+        if match is None:
+            stages["llm_first_token"].append((first_token[0] if first_token else ai_end) - ai_start)
+            stages["llm_total"].append(ai_end - ai_start)
+        if not first_audio:
+            print(f"Przebieg {run + 1}: brak dźwięku odpowiedzi")
+            continue
+        stages["first_audio"].append(first_audio[0] - speech_end)
+        stages["playback"].append(done - first_audio[0])
+        stages["end_to_end"].append(done - speech_end)
+        print(f"Przebieg {run + 1}/{args.runs}: \"{text}\" - pierwszy dźwięk po "
+              f"{(first_audio[0] - speech_end) * 1000:.0f} ms")
+
+    assistant.stop_capture()
+    apis.stop()
+    print(f"\n{'etap':<16} {'n':>4} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name, values in stages.items():
+        result = percentiles(values)
+        if result is None:
+            print(f"{name:<16} {0:>4} {'-':>10} {'-':>10} {'-':>10}")
+        else:
+            print(f"{name:<16} {len(values):>4} {result[0]:10.1f} {result[1]:10.1f} {result[2]:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
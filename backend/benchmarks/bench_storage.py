@@ -0,0 +1,99 @@
+# bench_storage.py
+"""Porównanie czasu pojedynczych operacji: dawne pliki JSON vs magazyn SQLite (WAL).
+
+Uruchomienie:  python backend/benchmarks/bench_storage.py [liczba_wierszy] [liczba_operacji]
+"""
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from storage import Storage  # noqa: E402
+
+
+def make_note(note_id):
+    return {"id": note_id, "timestamp": "2025-08-19T21:16:17.234011", "content": f"notatka numer {note_id} kupić mleko"}
+
+
+class JsonNotes:
+    """Dawne podejście: każdy odczyt i zapis przetwarza cały plik."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save(self, notes):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(notes, f, indent=2, ensure_ascii=False)
+
+    def list(self):
+        return self._load()
+
+    def insert(self, item):
+        notes = self._load()
+        notes.append(item)
+        self._save(notes)
+
+    def update(self, item_id, **fields):
+        notes = self._load()
+        for note in notes:
+            if note["id"] == item_id:
+                note.update(fields)
+        self._save(notes)
+
+    def delete(self, item_id):
+        notes = [n for n in self._load() if n["id"] != item_id]
+        self._save(notes)
+
+
+def timed(fn, ops):
+    samples = []
+    for arg in ops:
+        start = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.95) - 1] * 1000
+
+
+def run(label, repo, rows, operations):
+    ids = random.sample(range(rows), operations)
+    new_ids = range(rows, rows + operations)
+    results = {
+        "insert": timed(lambda i: repo.insert(make_note(i)), new_ids),
+        "update": timed(lambda i: repo.update(i, content="zmieniona treść"), ids),
+        "delete": timed(lambda i: repo.delete(i), ids),
+        "list": timed(lambda _: repo.list(), range(max(3, operations // 10))),
+    }
+    for op, (p50, p95) in results.items():
+        print(f"{label:<8} {op:<8} p50 {p50:9.3f} ms   p95 {p95:9.3f} ms")
+    return results
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    operations = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "notes.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump([make_note(i) for i in range(rows)], f, indent=2, ensure_ascii=False)
+
+        storage = Storage(os.path.join(tmp, "bench.db"))
+        start = time.perf_counter()
+        storage.notes.import_json(json_path)
+        print(f"Import {rows} wierszy z JSON: {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+        print(f"{rows} wierszy, {operations} operacji każdego typu")
+        run("json", JsonNotes(json_path), rows, operations)
+        print()
+        run("sqlite", storage.notes, rows, operations)
+
+
+if __name__ == "__main__":
+    main()
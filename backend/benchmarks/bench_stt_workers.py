@@ -0,0 +1,200 @@
+# bench_stt_workers.py
+"""Opóźnienia API (p50/p95/p99) przy nasyconym STT: dekodowanie w procesie serwera vs procesy STT_WORKERS.
+
+Serwer Flask (app.py) działa na serwerze Werkzeug w wątku tego procesu,
+a zapytania GET /api/notes i /api/settings wysyła osobny proces-klient w
+stałym tempie. Równolegle --streams strumieni audio (100 ms kawałki w
+tempie nagrania) trafia do RecognizerPool - tak jak z mikrofonów
+przeglądarek. Rozpoznawacze są lokalne (dawniej) albo zdalne z SttWorkerPool.
+
+Uruchomienie:
+    python backend/benchmarks/bench_stt_workers.py [--synthetic-decode-ms 80] [--streams 4] [--seconds 15]
+
+Bez --synthetic-decode-ms używany jest model z VOSK_MODEL_PATH (i nagranie
+--wav albo sygnał syntetyczny). Sztuczny dekoder liczy w czystym Pythonie
+(trzyma GIL) --synthetic-decode-ms ms na 100 ms nagrania.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import multiprocessing
+import urllib.request
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+sys.path.insert(0, BENCH_DIR)
+from stt_sessions import RecognizerPool  # noqa: E402
+from stt_workers import SttWorkerPool  # noqa: E402
+from bench_browser_stt import load_audio, CHUNK  # noqa: E402
+
+URLS = ["/api/notes?cursor=0&limit=20", "/api/settings"]
+
+
+class SyntheticRecognizer:
+    """Dekoder zastępczy: pętla w Pythonie przez `cost` s na 100 ms nagrania - trzyma GIL jak kod w Pythonie."""
+
+    def __init__(self, cost):
+        self.cost = cost
+        self.bytes = 0
+
+    def AcceptWaveform(self, data):
+        deadline = time.thread_time() + self.cost * len(data) / (CHUNK * 2)
+        while time.thread_time() < deadline:
+            pass
+        self.bytes += len(data)
+        return self.bytes % (16000 * 8) < len(data)
+
+    def Result(self):
+        return json.dumps({"text": "syntetyczny wynik"})
+
+    def PartialResult(self):
+        return json.dumps({"partial": "syntetyczny"})
+
+    def FinalResult(self):
+        return self.Result()
+
+    def Reset(self):
+        self.bytes = 0
+
+
+# Funkcje modułu (nie lambdy) - proces roboczy importuje je po nazwie; "ścieżka modelu" to koszt w sekundach
+def synthetic_model(cost):
+    return float(cost)
+
+
+def synthetic_recognizer(model, sample_rate):
+    return SyntheticRecognizer(model)
+
+
+def client_main(base_url, seconds, rate, conn):
+    """Proces-klient: zapytania co 1/rate s, zwraca listę opóźnień w ms."""
+    latencies, errors = [], 0
+    start = time.monotonic()
+    i = 0
+    while time.monotonic() - start < seconds:
+        url = base_url + URLS[i % len(URLS)]
+        sent = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=10) as response:
+                response.read()
+            latencies.append((time.perf_counter() - sent) * 1000)
+        except Exception:
+            errors += 1
+        i += 1
+        time.sleep(max(0.0, start + i / rate - time.monotonic()))
+    conn.send((latencies, errors))
+    conn.close()
+
+
+def measure(base_url, seconds, rate, feed=None):
+    context = multiprocessing.get_context("spawn")
+    parent, child = context.Pipe(duplex=False)
+    client = context.Process(target=client_main, args=(base_url, seconds, rate, child))
+    client.start()
+    stop = threading.Event()
+    feeder = threading.Thread(target=feed, args=(stop,), daemon=True) if feed else None
+    if feeder:
+        feeder.start()
+    latencies, errors = parent.recv()
+    client.join()
+    stop.set()
+    if feeder:
+        feeder.join()
+    return latencies, errors
+
+
+def stt_load(pool, audio, streams):
+    """Funkcja podająca `streams` strumieni audio w tempie nagrania, aż do ustawienia zdarzenia."""
+    def feed(stop):
+        sids = [f"strumien-{i}" for i in range(streams)]
+        for sid in sids:
+            pool.open(sid)
+        offsets = [(i * CHUNK * 7) % (len(audio) - CHUNK) for i in range(streams)]
+        start = time.monotonic()
+        tick = 0
+        while not stop.is_set():
+            for i, sid in enumerate(sids):
+                chunk = audio[offsets[i]:offsets[i] + CHUNK]
+                offsets[i] = (offsets[i] + CHUNK) % (len(audio) - CHUNK)
+                pool.feed(sid, chunk.tobytes())
+            tick += 1
+            time.sleep(max(0.0, start + tick * 0.1 - time.monotonic()))
+        feed.stats = pool.stats()
+        for sid in sids:
+            pool.close(sid, flush=False)
+    return feed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--wav")
+    parser.add_argument("--streams", type=int, default=max(2, 2 * (os.cpu_count() or 1)))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--rate", type=float, default=50, help="zapytań API na sekundę")
+    parser.add_argument("--nice", type=int, default=0, help="STT_WORKER_NICE dla procesów roboczych")
+    parser.add_argument("--synthetic-decode-ms", type=float)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="nova-bench-")
+    os.environ.update({
+        "DB_FILE": os.path.join(tmp, "bench.db"), "NOTES_FILE": os.path.join(tmp, "notes.json"),
+        "TTS_CACHE_DIR": os.path.join(tmp, "tts"), "CONVERSATION_DIR": os.path.join(tmp, "conversation"),
+    })
+    import app as server
+    from werkzeug.serving import make_server
+    for i in range(200):
+        server.storage.notes.insert({"id": i + 1, "timestamp": "2025-08-19T21:16:17.234011",
+                                     "content": f"Notatka {i + 1}: kupić mleko, chleb i zadzwonić do mamy"})
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # bez linii dziennika na każde zapytanie
+    http = make_server("127.0.0.1", 0, server.app, threaded=True)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{http.server_port}"
+
+    audio = load_audio(args.wav)
+    if args.synthetic_decode_ms is not None:
+        import bench_stt_workers as bench  # po nazwie modułu, nie __main__ - do wczytania w procesach roboczych
+        model_path, loader, factory = str(args.synthetic_decode_ms / 1000), bench.synthetic_model, \
+            bench.synthetic_recognizer
+        local_model = loader(model_path)
+        print(f"Sztuczny dekoder: {args.synthetic_decode_ms} ms CPU (z GIL-em) na 100 ms nagrania.")
+    else:
+        from vosk import Model, KaldiRecognizer, SetLogLevel
+        SetLogLevel(-1)
+        model_path = os.getenv("VOSK_MODEL_PATH", os.path.join(BENCH_DIR, "..", "models", "vosk-model-small-pl-0.22"))
+        if not os.path.isdir(model_path):
+            raise SystemExit(f"Brak modelu Vosk w {model_path} (ustaw VOSK_MODEL_PATH albo użyj --synthetic-decode-ms).")
+        loader, factory, local_model = None, KaldiRecognizer, Model(model_path)
+
+    workers = SttWorkerPool(model_path, workers=args.workers, nice=args.nice, model_loader=loader,
+                            recognizer_factory=None if loader is None else factory).start()
+    local = RecognizerPool(lambda: local_model, max_sessions=args.streams, workers=args.workers,
+                           recognizer_factory=factory)
+    remote = RecognizerPool(lambda: local_model, max_sessions=args.streams, workers=args.workers,
+                            recognizer_factory=lambda model, rate: workers.recognizer())
+
+    print(f"Rdzenie: {os.cpu_count()}, strumienie: {args.streams}, procesy STT: {args.workers}, "
+          f"API: {args.rate:.0f} zapytań/s przez {args.seconds:.0f} s\n")
+    print(f"{'STT':<26} {'zapytania':>9} {'błędy':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'odrzucone audio':>16}")
+    for name, pool in (("bez STT", None), ("w procesie serwera", local), ("procesy STT_WORKERS", remote)):
+        feed = stt_load(pool, audio, args.streams) if pool else None
+        latencies, errors = measure(base_url, args.seconds, args.rate, feed)
+        dropped = sum(s["dropped_chunks"] for s in feed.stats["streams"]) if feed else 0
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"{name:<26} {len(latencies):>9} {errors:>6} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} "
+              f"{max(latencies):>8.1f} {dropped:>16}")
+    http.shutdown()
+    time.sleep(0.5)  # zamknięte sesje kończą dekodowanie ostatniego bloku
+    workers.stop()
+
+
+if __name__ == "__main__":
+    main()
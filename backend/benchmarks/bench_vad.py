@@ -0,0 +1,131 @@
+# bench_vad.py
+"""Bramka VAD przed Kaldi: koszt CPU na godzinę ciszy i opóźnienie końca wypowiedzi.
+
+Uruchomienie:  python backend/benchmarks/bench_vad.py [nagranie.wav]
+
+Bez nagrania używany jest syntetyczny sygnał (szum tła + "sylaby" z tonów
+harmonicznych). Jeśli VOSK_MODEL_PATH wskazuje istniejący model, mierzony
+jest też koszt rozpoznawacza i moment, w którym własny endpointer Kaldi
+zwraca wynik - do porównania z końcem wykrytym przez VAD. Nagranie
+(16 kHz, mono) powinno zawierać wypowiedź zakończoną kilkoma sekundami ciszy.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from vad import VoiceActivityDetector  # noqa: E402
+
+SAMPLE_RATE = 16000
+BLOCKSIZE = 8000
+BLOCKS_PER_HOUR = int(3600 * SAMPLE_RATE / BLOCKSIZE)
+
+
+def noise(seconds, level=0.003, rng=np.random.default_rng(1)):
+    return rng.normal(0, level, int(seconds * SAMPLE_RATE))
+
+
+def synthetic_utterance(seconds=1.6, rng=np.random.default_rng(2)):
+    """Ciąg "sylab": tony 120-220 Hz z harmonicznymi, modulowane ok. 4 Hz."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = rng.uniform(120, 220)
+    voiced = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) ** 0.5
+    return 0.2 * voiced * envelope
+
+
+def to_blocks(signal):
+    pcm = (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+    pcm = pcm[:len(pcm) // BLOCKSIZE * BLOCKSIZE]
+    return [block.tobytes() for block in pcm.reshape(-1, BLOCKSIZE)]
+
+
+def load_wav(path):
+    import soundfile as sf
+    data, rate = sf.read(path, dtype="float32")
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    if rate != SAMPLE_RATE:
+        raise SystemExit(f"Nagranie musi mieć {SAMPLE_RATE} Hz (ma {rate} Hz)")
+    return data
+
+
+def load_model():
+    path = os.getenv("VOSK_MODEL_PATH")
+    if not path or not os.path.isdir(path):
+        return None
+    from vosk import Model, SetLogLevel
+    SetLogLevel(-1)
+    return Model(path)
+
+
+def cpu_per_block(fn, blocks):
+    start = time.thread_time()
+    for block in blocks:
+        fn(block)
+    return (time.thread_time() - start) / len(blocks)
+
+
+def idle_cost(model):
+    silence = to_blocks(noise(60))
+    vad = VoiceActivityDetector(SAMPLE_RATE)
+    vad_cost = cpu_per_block(vad.process, silence)
+    print(f"VAD:       {vad_cost * 1000:8.3f} ms CPU / blok   "
+          f"{vad_cost * BLOCKS_PER_HOUR:7.2f} s CPU na godzinę ciszy   "
+          f"(przepuszczone bloki: {vad.passed}/{vad.blocks})")
+    if model is None:
+        print("Kaldi:     brak modelu (ustaw VOSK_MODEL_PATH) - pominięto")
+        return
+    from vosk import KaldiRecognizer
+    recognizer = KaldiRecognizer(model, SAMPLE_RATE)
+    kaldi_cost = cpu_per_block(recognizer.AcceptWaveform, silence)
+    print(f"Kaldi:     {kaldi_cost * 1000:8.3f} ms CPU / blok   "
+          f"{kaldi_cost * BLOCKS_PER_HOUR:7.2f} s CPU na godzinę ciszy")
+    print(f"Oszczędność: {(kaldi_cost - vad_cost) * BLOCKS_PER_HOUR:.1f} s CPU na godzinę ciszy")
+
+
+def end_latency(signal, speech_end, model):
+    """Czas od końca mowy do zgłoszenia końca wypowiedzi (VAD i endpointer Kaldi)."""
+    blocks = to_blocks(signal)
+    block_seconds = BLOCKSIZE / SAMPLE_RATE
+    vad = VoiceActivityDetector(SAMPLE_RATE)
+    vad.process(to_blocks(noise(2))[0])  # kalibracja poziomu szumu
+    vad_end = next(((i + 1) * block_seconds for i, block in enumerate(blocks) if vad.process(block)[1]), None)
+    report("VAD", vad_end, speech_end)
+    if model is None:
+        return
+    from vosk import KaldiRecognizer
+    recognizer = KaldiRecognizer(model, SAMPLE_RATE)
+    kaldi_end = next(((i + 1) * block_seconds for i, block in enumerate(blocks) if recognizer.AcceptWaveform(block)), None)
+    report("Kaldi", kaldi_end, speech_end)
+
+
+def report(label, detected, speech_end):
+    if detected is None:
+        print(f"{label:<6} koniec wypowiedzi nie wykryty")
+    else:
+        print(f"{label:<6} koniec wypowiedzi po {(detected - speech_end) * 1000:6.0f} ms od końca mowy")
+
+
+def main():
+    model = load_model()
+    print(f"Bloki {BLOCKSIZE} próbek ({BLOCKSIZE / SAMPLE_RATE:.2f} s), {BLOCKS_PER_HOUR} bloków na godzinę\n")
+    idle_cost(model)
+    print()
+    if len(sys.argv) > 1:
+        signal = load_wav(sys.argv[1])
+        # Koniec mowy: ostatnia ramka 20 ms o energii powyżej 10% maksimum
+        frames = signal[:len(signal) // 320 * 320].reshape(-1, 320)
+        energy = (frames ** 2).mean(axis=1)
+        speech_end = (np.flatnonzero(energy > energy.max() * 0.1)[-1] + 1) * 320 / SAMPLE_RATE
+    else:
+        speech = synthetic_utterance()
+        signal = np.concatenate([noise(1), speech + noise(len(speech) / SAMPLE_RATE), noise(4)])
+        speech_end = 1 + len(speech) / SAMPLE_RATE
+    end_latency(signal, speech_end, model)
+
+
+if __name__ == "__main__":
+    main()
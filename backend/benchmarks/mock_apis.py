@@ -0,0 +1,154 @@
+# mock_apis.py
+"""Lokalne serwery zastępcze OpenRouter, ElevenLabs i OpenWeather do benchmarków.
+
+Jeden ThreadingHTTPServer obsługuje trzy prefiksy ścieżek; opóźnienia
+(czas do pierwszego bajtu, odstęp między fragmentami strumienia) są
+konfigurowalne, a losowy rozrzut (`jitter`) imituje zmienność sieci.
+"""
+import io
+import json
+import time
+import wave
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+DEFAULT_ANSWER = "Jasne, już odpowiadam. Krótko mówiąc, wszystko zależy od okoliczności. Daj znać, jeśli chcesz więcej."
+
+
+class MockApis:
+    def __init__(self, llm_first_token=0.35, llm_token_interval=0.015, tts_first_chunk=0.2,
+                 tts_chunk_interval=0.01, weather_latency=0.08, jitter=0.2, answer=DEFAULT_ANSWER,
+                 tts_sample_rate=16000, seconds_per_char=0.06, seed=0):
+        self.llm_first_token = llm_first_token
+        self.llm_token_interval = llm_token_interval
+        self.tts_first_chunk = tts_first_chunk
+        self.tts_chunk_interval = tts_chunk_interval
+        self.weather_latency = weather_latency
+        self.jitter = jitter
+        self.answer = answer
+        self.tts_sample_rate = tts_sample_rate
+        self.seconds_per_char = seconds_per_char
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._server = None
+
+    def delay(self, seconds):
+        with self._random_lock:
+            factor = 1 + self._random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, seconds * factor))
+
+    def start(self):
+        apis = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def _send(self, status, body, content_type="application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _chunked(self, content_type, chunks):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for chunk in chunks:
+                    self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                if self.path.startswith("/openweather/"):
+                    apis.delay(apis.weather_latency)
+                    return self._send(200, json.dumps(apis.weather()).encode())
+                self._send(404, b"{}")
+
+            def do_POST(self):
+                body = self._body()
+                if self.path.startswith("/openrouter/") and self.path.endswith("/chat/completions"):
+                    if body.get("stream"):
+                        return self._chunked("text/event-stream", apis.llm_events())
+                    apis.delay(apis.llm_first_token + apis.llm_token_interval * len(apis.answer.split()))
+                    return self._send(200, json.dumps(
+                        {"choices": [{"message": {"role": "assistant", "content": apis.answer}}]}).encode())
+                if self.path.startswith("/elevenlabs/") and "/text-to-speech/" in self.path:
+                    if self.path.split("?")[0].endswith("/stream"):
+                        return self._chunked("audio/pcm", apis.tts_chunks(body.get("text", "")))
+                    return self._send(200, apis.tts_wav(body.get("text", "")), "audio/wav")
+                self._send(404, b"{}")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="mock-apis", daemon=True).start()
+        base = f"http://127.0.0.1:{self._server.server_address[1]}"
+        return {
+            "OPENROUTER_BASE_URL": f"{base}/openrouter/api/v1",
+            "ELEVENLABS_BASE_URL": f"{base}/elevenlabs/v1",
+            "OPENWEATHER_BASE_URL": f"{base}/openweather/data/2.5",
+        }
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def llm_events(self):
+        self.delay(self.llm_first_token)
+        yield b": OPENROUTER PROCESSING\n\n"
+        words = self.answer.split(" ")
+        for i, word in enumerate(words):
+            if i:
+                self.delay(self.llm_token_interval)
+            delta = word if i == len(words) - 1 else word + " "
+            yield b"data: " + json.dumps({"choices": [{"delta": {"content": delta}}]}).encode() + b"\n\n"
+        yield b"data: [DONE]\n\n"
+
+    def _pcm(self, text):
+        samples = int(len(text) * self.seconds_per_char * self.tts_sample_rate)
+        t = np.arange(samples) / self.tts_sample_rate
+        return (np.sin(2 * np.pi * 180 * t) * 3000).astype(np.int16).tobytes()
+
+    def tts_wav(self, text):
+        """Cały plik WAV naraz - czas syntezy jak przy pobraniu całego strumienia."""
+        pcm = self._pcm(text)
+        self.delay(self.tts_first_chunk + self.tts_chunk_interval * (len(pcm) // 4096))
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.tts_sample_rate)
+            wav.writeframes(pcm)
+        return buffer.getvalue()
+
+    def tts_chunks(self, text, chunk_size=4096):
+        self.delay(self.tts_first_chunk)
+        pcm = self._pcm(text)
+        for offset in range(0, len(pcm), chunk_size):
+            if offset:
+                self.delay(self.tts_chunk_interval)
+            yield pcm[offset:offset + chunk_size]
+
+    @staticmethod
+    def weather():
+        return {"cod": 200, "name": "Szczecin",
+                "weather": [{"icon": "01d", "description": "bezchmurnie"}],
+                "main": {"temp": 18.5, "feels_like": 17.9, "humidity": 60}, "wind": {"speed": 3.2}}
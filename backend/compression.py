@@ -0,0 +1,84 @@
+# compression.py
+import gzip
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # brotli jest opcjonalny - bez niego zostaje gzip
+    brotli = None
+
+# Typy odpowiedzi, które warto kompresować (obrazy i dźwięk są już skompresowane)
+COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "text/", "image/svg+xml")
+
+
+class Compressor:
+    """Kompresja odpowiedzi HTTP: brotli albo gzip według nagłówka Accept-Encoding.
+
+    Pliki statyczne kompresowane są raz - wynik trzymany jest w małym LRU
+    pod kluczem (ETag pliku, kodowanie), więc kolejne pobrania tego samego
+    pliku nie kosztują CPU. Odpowiedzi API kompresowane są za każdym razem
+    (ich ETag wersji jest wspólny dla różnych parametrów zapytania).
+    """
+
+    def __init__(self, min_size=512, gzip_level=6, brotli_quality=5, cache_entries=64):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_entries = cache_entries
+        self.encodings = (["br"] if brotli is not None else []) + ["gzip"]
+        self._cache = OrderedDict()  # (etag, kodowanie) -> bajty
+        self._lock = threading.Lock()
+
+    def choose(self, accept_encodings):
+        """Najlepsze obsługiwane kodowanie z nagłówka Accept-Encoding (werkzeug MIMEAccept) albo None."""
+        return accept_encodings.best_match(self.encodings)
+
+    def compress(self, data, encoding):
+        if encoding == "br":
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def apply(self, response, accept_encodings):
+        """Skompresuj odpowiedź na miejscu, jeśli ma to sens; zwraca tę samą odpowiedź."""
+        if (response.status_code != 200 or "Content-Encoding" in response.headers
+                or not (response.mimetype or "").startswith(COMPRESSIBLE_TYPES)):
+            return response
+        if response.is_streamed and not response.direct_passthrough:
+            return response  # generator (np. strumień) - rozmiar nieznany, nie buforujemy
+        response.vary.add("Accept-Encoding")
+        encoding = self.choose(accept_encodings)
+        if encoding is None:
+            return response
+        # Pliki z send_from_directory są przekazywane bezpośrednio - odczyt wymaga wyłączenia passthrough
+        is_file = response.direct_passthrough
+        response.direct_passthrough = False
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        etag, _ = response.get_etag()
+        cache_key = (etag, encoding) if is_file and etag else None
+        compressed = self._cached(cache_key) if cache_key else None
+        if compressed is None:
+            compressed = self.compress(data, encoding)
+            if cache_key:
+                self._store(cache_key, compressed)
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        if etag:
+            # Inna reprezentacja tych samych danych: ETag słaby (jak w nginx) - If-None-Match porównuje słabo
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _cached(self, key):
+        with self._lock:
+            data = self._cache.get(key)
+            if data is not None:
+                self._cache.move_to_end(key)
+            return data
+
+    def _store(self, key, data):
+        with self._lock:
+            self._cache[key] = data
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
@@ -0,0 +1,132 @@
+# conversation_log.py
+import os
+import sys
+import json
+import time
+import threading
+from collections import deque
+from itertools import islice
+
+
+class ConversationLog:
+    """Ograniczony, dopisywany log rozmowy z rosnącymi numerami `seq`.
+
+    W pamięci trzymane są krotki (seq, czas, mówca, tekst, id_wiadomości),
+    najwyżej `capacity` ostatnich. Na dysku log zapisywany jest w segmentach
+    JSON Lines po `segment_size` wpisów; segmenty starsze niż potrzebne do
+    odtworzenia `capacity` wpisów są usuwane. Po restarcie numeracja jest
+    kontynuowana, więc kursor klienta pozostaje ważny.
+    """
+
+    def __init__(self, directory, capacity=1000, segment_size=200):
+        self.directory = directory
+        self.capacity = capacity
+        self.segment_size = segment_size
+        self._entries = deque(maxlen=capacity)
+        self._streams = {}  # id wiadomości -> (mówca, fragmenty) dla odpowiedzi strumieniowanych
+        self._lock = threading.Lock()
+        self._next_seq = 1
+        self._segment = None  # (ścieżka, liczba wpisów)
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _segments(self):
+        names = sorted(n for n in os.listdir(self.directory) if n.startswith("conversation-") and n.endswith(".jsonl"))
+        return [os.path.join(self.directory, n) for n in names]
+
+    def _load(self):
+        segments = self._segments()
+        for path in segments:
+            count = 0
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        seq, at, speaker, text, message_id = json.loads(line)
+                    except ValueError:
+                        continue  # urwany ostatni wiersz po awarii
+                    self._entries.append((seq, at, sys.intern(speaker), text, message_id))
+                    self._next_seq = max(self._next_seq, seq + 1)
+                    count += 1
+            self._segment = (path, count)
+        if self._entries:
+            print(f"Log rozmowy: wczytano {len(self._entries)} wpisów (ostatni seq {self._next_seq - 1}).")
+
+    @property
+    def last_seq(self):
+        with self._lock:
+            return self._next_seq - 1
+
+    def append(self, speaker, text, message_id=None):
+        """Dopisz pełny wpis; zwraca go jako słownik z nadanym `seq`."""
+        with self._lock:
+            entry = (self._next_seq, time.time(), sys.intern(speaker), text, message_id)
+            self._next_seq += 1
+            self._entries.append(entry)
+            try:
+                self._persist(entry)
+            except OSError as e:
+                print(f"Błąd zapisu logu rozmowy: {e}")
+        return self._to_dict(entry)
+
+    def stream(self, message_id, speaker, delta, done):
+        """Zbieraj fragmenty odpowiedzi strumieniowanej; po `done` dopisz całość i zwróć wpis."""
+        with self._lock:
+            parts = self._streams.setdefault(message_id, (speaker, []))[1]
+            if delta:
+                parts.append(delta)
+            if not done:
+                return None
+            speaker, parts = self._streams.pop(message_id)
+        return self.append(speaker, "".join(parts), message_id=message_id)
+
+    def _persist(self, entry):
+        # Wywoływane z założoną blokadą
+        path, count = self._segment or (None, self.segment_size)
+        if count >= self.segment_size:
+            path, count = os.path.join(self.directory, f"conversation-{entry[0]:012d}.jsonl"), 0
+            self._prune()
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._segment = (path, count + 1)
+
+    def _prune(self):
+        # Zostaw tyle pełnych segmentów, ile mieści się w `capacity`, plus nowy
+        keep = -(-self.capacity // self.segment_size)
+        for path in self._segments()[:-keep or None]:
+            os.remove(path)
+
+    def page(self, after=None, before=None, limit=50):
+        """Wpisy z `seq` > after (przyrost dla klienta) albo < before (starsze strony).
+
+        Bez kursora zwraca `limit` najnowszych wpisów. Wynik: (wpisy, więcej_dostępnych,
+        przerwa). `przerwa` oznacza, że kursor `after` wskazuje wpisy już usunięte
+        z logu (albo spoza niego, np. po wyczyszczeniu katalogu) - zamiast
+        przyrostu zwracane są wtedy najnowsze wpisy, a klient ma przeładować historię.
+        """
+        with self._lock:
+            gap = bool(after) and (after >= self._next_seq or not self._entries or after < self._entries[0][0] - 1)
+            if not self._entries:
+                return [], False, gap
+            first = self._entries[0][0]
+            if gap:
+                after = None
+            if after is not None:
+                start = max(0, after - first + 1)
+                selected = list(islice(self._entries, start, start + limit + 1))
+                more = len(selected) > limit
+                selected = selected[:limit]
+            else:
+                end = len(self._entries) if before is None else max(0, min(len(self._entries), before - first))
+                start = max(0, end - limit)
+                selected = list(islice(self._entries, start, end))
+                more = start > 0
+        return [self._to_dict(entry) for entry in selected], more, gap
+
+    @staticmethod
+    def _to_dict(entry):
+        seq, at, speaker, text, message_id = entry
+        data = {"seq": seq, "speaker": speaker, "text": text,
+                "timestamp": time.strftime("%H:%M:%S", time.localtime(at)), "time": at}
+        if message_id is not None:
+            data["id"] = message_id
+        return data
@@ -0,0 +1,135 @@
+# http_client.py
+import time
+import random
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import metrics
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Budżet czasu zapytania wyczerpał się przed kolejną próbą."""
+
+
+class HttpClient:
+    """Wspólna warstwa HTTP dla zewnętrznych API (OpenRouter, Eleven Labs, OpenWeather).
+
+    Każdy host ma własną sesję keep-alive z pulą połączeń, każde zapytanie
+    ma budżet czasu (deadline), a ponowienia z losowym opóźnieniem dotyczą
+    tylko zapytań idempotentnych.
+    """
+
+    def __init__(self, pool_maxsize=4, max_retries=2, backoff_base=0.2, backoff_max=2.0):
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sessions = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _session(self, url):
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+                session.mount(host, adapter)
+                self._sessions[host] = session
+            return session
+
+    def request(self, endpoint, method, url, deadline=10.0, idempotent=None, **kwargs):
+        """Wykonaj zapytanie w ramach budżetu `deadline` sekund.
+
+        `endpoint` to nazwa używana w licznikach (np. "openweather").
+        Domyślnie ponawiane są tylko GET/HEAD; POST wymaga idempotent=True.
+        """
+        if idempotent is None:
+            idempotent = method.upper() in ("GET", "HEAD", "OPTIONS")
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        session = self._session(url)
+        start = time.perf_counter()
+        expires = start + deadline
+        last_error = None
+
+        for attempt in range(attempts):
+            remaining = expires - time.perf_counter()
+            if remaining <= 0:
+                break
+            attempt_start = time.perf_counter()
+            try:
+                response = session.request(method, url, timeout=remaining, **kwargs)
+                if response.status_code >= 500 and attempt + 1 < attempts:
+                    response.close()
+                    raise requests.exceptions.HTTPError(f"{response.status_code} Server Error", response=response)
+                self._record(endpoint, time.perf_counter() - attempt_start, error=response.status_code >= 400)
+                return response
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.HTTPError) as e:
+                self._record(endpoint, time.perf_counter() - attempt_start, error=True)
+                last_error = e
+                if attempt + 1 >= attempts:
+                    break
+                # Pełny jitter: losowe opóźnienie w [0, base * 2^próba], nie dłuższe niż pozostały budżet
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+                time.sleep(max(0.0, min(delay, expires - time.perf_counter())))
+
+        if last_error is not None:
+            raise last_error
+        raise DeadlineExceeded(f"Przekroczono budżet czasu {deadline:.1f} s dla {endpoint}")
+
+    def get(self, endpoint, url, **kwargs):
+        return self.request(endpoint, "GET", url, **kwargs)
+
+    def post(self, endpoint, url, **kwargs):
+        return self.request(endpoint, "POST", url, **kwargs)
+
+    def warm_up(self, urls):
+        """Otwórz połączenia (TCP+TLS) z podanymi hostami w tle."""
+        def _warm():
+            for url in urls:
+                try:
+                    self._session(url).head(url, timeout=5, allow_redirects=False)
+                except requests.exceptions.RequestException as e:
+                    print(f"Rozgrzewanie połączenia z {url} nieudane: {e}")
+        thread = threading.Thread(target=_warm, daemon=True)
+        thread.start()
+        return thread
+
+    def _record(self, endpoint, latency, error=False):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {
+                "requests": 0, "errors": 0, "latency_total": 0.0, "latency_max": 0.0
+            })
+            stats["requests"] += 1
+            stats["latency_total"] += latency
+            stats["latency_max"] = max(stats["latency_max"], latency)
+            if error:
+                stats["errors"] += 1
+        metrics.observe("http_client_duration_seconds", latency, endpoint=endpoint)
+        if error:
+            metrics.inc("http_client_errors_total", endpoint=endpoint)
+
+    def stats(self):
+        """Liczniki zapytań, błędów i opóźnień (w ms) dla każdego endpointu."""
+        with self._lock:
+            result = {}
+            for endpoint, stats in self._stats.items():
+                result[endpoint] = {
+                    "requests": stats["requests"],
+                    "errors": stats["errors"],
+                    "latency_avg_ms": round(stats["latency_total"] / stats["requests"] * 1000, 1),
+                    "latency_max_ms": round(stats["latency_max"] * 1000, 1)
+                }
+            return result
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
@@ -0,0 +1,200 @@
+# intents.py
+import re
+
+# Zamiana polskich znaków 1:1 - pozycje w tekście znormalizowanym i oryginalnym się pokrywają
+_FOLD = str.maketrans("ąćęłńóśźż", "acelnoszz")
+# Litera bez ogonka -> klasa znaków z ogonkiem; frazy dopasowują tekst z polskimi znakami i bez nich
+_DIACRITIC_CLASS = {"a": "[aą]", "c": "[cć]", "e": "[eę]", "l": "[lł]", "n": "[nń]", "o": "[oó]", "s": "[sś]",
+                    "z": "[zźż]"}
+
+# Słowa po "w", które nie są nazwą miasta ("pogoda w tym tygodniu")
+_NOT_A_CITY = {"tym", "ten", "tej", "ogóle", "ogole", "nocy", "dzień", "dzien", "domu", "weekend", "poniedziałek",
+               "wtorek", "środę", "czwartek", "piątek", "sobotę", "niedzielę"}
+_CITY_RE = re.compile(r"\bwe?\s+([^\s,.?!]+)")
+
+# Miejscownik ("w Krakowie") -> mianownik, którego oczekuje OpenWeatherMap; odmiany nieregularne
+_CITY_NOMINATIVE = {
+    "krakowie": "kraków", "warszawie": "warszawa", "gdańsku": "gdańsk", "wrocławiu": "wrocław",
+    "poznaniu": "poznań", "łodzi": "łódź", "szczecinie": "szczecin", "lublinie": "lublin",
+    "katowicach": "katowice", "białymstoku": "białystok", "gdyni": "gdynia", "bydgoszczy": "bydgoszcz",
+    "toruniu": "toruń", "rzeszowie": "rzeszów", "olsztynie": "olsztyn", "kielcach": "kielce", "opolu": "opole",
+    "zakopanem": "zakopane", "sopocie": "sopot", "częstochowie": "częstochowa", "radomiu": "radom",
+    "londynie": "londyn", "paryżu": "paryż", "berlinie": "berlin", "pradze": "praga", "wiedniu": "wiedeń",
+    "rzymie": "rzym", "madrycie": "madryt", "oslo": "oslo", "zielonej": "zielona góra",
+}
+# Pozostałe nazwy: typowe końcówki miejscownika (pierwsza pasująca wygrywa)
+_LOCATIVE_SUFFIXES = [
+    ("owie", "ów"), ("awie", "awa"), ("ach", "e"), ("niu", "ń"), ("iu", ""), ("ku", "k"), ("gu", "g"),
+    ("chu", "ch"), ("yni", "ynia"), ("cie", "t"), ("nie", "n"), ("mie", "m"), ("pie", "p"), ("bie", "b"),
+    ("sie", "s"), ("rze", "r"),
+]
+
+
+def normalize(text):
+    """Małe litery i usunięte polskie znaki; długość tekstu się nie zmienia."""
+    return text.lower().translate(_FOLD)
+
+
+def city_nominative(word):
+    """Mianownik nazwy miasta podanej w miejscowniku ("krakowie" -> "kraków")."""
+    word = word.lower()
+    if word in _CITY_NOMINATIVE:
+        return _CITY_NOMINATIVE[word]
+    for suffix, replacement in _LOCATIVE_SUFFIXES:
+        if word.endswith(suffix) and len(word) > len(suffix) + 2:
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+def extract_city(text, start=0):
+    """Nazwa miasta w mianowniku po przyimku "w"/"we" (np. "pogoda w Krakowie" -> "Kraków") albo None."""
+    for match in _CITY_RE.finditer(text.lower(), start):
+        word = match.group(1)
+        if word not in _NOT_A_CITY:
+            return city_nominative(word).title()
+    return None
+
+
+def extract_after_trigger(text, start=0, end=0):
+    """Treść wypowiedzi po słowie kluczowym (np. treść notatki)."""
+    return text[end:].strip(" ,.:")
+
+
+class Intent:
+    """Lokalna komenda: frazy kluczowe i funkcje wyciągające parametry (sloty).
+
+    `prefix=True` oznacza, że fraza może być początkiem słowa ("pogod" ->
+    "pogoda", "pogodzie"); w przeciwnym razie musi być całym słowem.
+    `early=True` pozwala wykonać komendę już na stabilnym wyniku
+    częściowym rozpoznawania mowy.
+    """
+
+    def __init__(self, name, triggers, slots=None, prefix=False, early=False):
+        self.name = name
+        self.triggers = [t.strip() for t in triggers if t.strip()]
+        self.slots = slots or {}
+        self.prefix = prefix
+        self.early = early
+
+
+class IntentMatch:
+    def __init__(self, intent, text, slots):
+        self.intent = intent
+        self.name = intent.name
+        self.text = text
+        self.slots = slots
+
+    def __repr__(self):
+        return f"IntentMatch({self.name!r}, {self.slots!r})"
+
+
+class IntentRouter:
+    """Rejestr intencji skompilowany do jednego wyrażenia regularnego.
+
+    Kolejność rejestracji to priorytet: gdy w wypowiedzi pasuje kilka
+    intencji, wygrywa zarejestrowana najwcześniej. Polskie znaki w frazach
+    kompilowane są do klas ("[lł]"), więc tekst wystarczy zamienić na małe
+    litery. Frazy tworzą drzewo prefiksów, a wstępny filtr pierwszych
+    liter fraz pomija pozostałe pozycje bez sprawdzania alternatyw.
+    """
+
+    def __init__(self):
+        self.intents = []
+        self._pattern = None
+        self._trigger_intent = {}
+        self._matched = {}  # dopasowany tekst (z polskimi znakami lub bez) -> (priorytet, intencja)
+
+    def register(self, intent):
+        self.intents.append(intent)
+        self._pattern = None
+        return intent
+
+    def compile(self):
+        self._trigger_intent = {}
+        prefix_triggers = set()
+        for priority, intent in enumerate(self.intents):
+            for trigger in intent.triggers:
+                folded = normalize(trigger)
+                self._trigger_intent.setdefault(folded, (priority, intent))
+                if intent.prefix:
+                    prefix_triggers.add(folded)
+        # Frazy złożone w drzewo prefiksów: wspólne początki ("w" -> "wiatr", "włącz ...") sprawdzane są raz.
+        # Bez grup nazwanych - dopasowany tekst sam wskazuje intencję w słowniku.
+        if not self._trigger_intent:
+            self._pattern = None
+            return self
+        trie = {}
+        for trigger in self._trigger_intent:
+            node = trie
+            for char in trigger:
+                node = node.setdefault(char, {})
+            node[""] = trigger
+        first_letters = "".join(_DIACRITIC_CLASS.get(c, c).strip("[]") for c in sorted(trie))
+        # Wstępny filtr: wyrażenie próbuje dopasowania tylko na literach, od których zaczyna się jakaś fraza
+        self._pattern = re.compile("(?=[" + re.escape(first_letters) + r"])\b"
+                                   + _trie_pattern(trie, prefix_triggers))
+        self._matched = {}
+        return self
+
+    def match(self, text):
+        """Dopasuj wypowiedź do intencji; zwraca IntentMatch albo None (pytanie do AI)."""
+        if self._pattern is None:
+            self.compile()
+            if self._pattern is None:
+                return None
+        lowered = text.lower()
+        best = None
+        for m in self._pattern.finditer(lowered):
+            found = m.group()
+            hit = self._matched.get(found)
+            if hit is None:
+                hit = self._matched[found] = self._trigger_intent[normalize(found)]
+            priority, intent = hit
+            if best is None or priority < best[0]:
+                best = (priority, intent, m.start(), m.end())
+                if priority == 0:
+                    break
+        if best is None:
+            return None
+        _, intent, start, end = best
+        slots = {name: extractor(lowered, start=start, end=end) for name, extractor in intent.slots.items()} \
+            if intent.slots else {}
+        return IntentMatch(intent, text, slots)
+
+
+def _trie_pattern(node, prefix_triggers):
+    """Wyrażenie dla poddrzewa fraz; dłuższa fraza ma pierwszeństwo przed swoim początkiem."""
+    alternatives = [(_DIACRITIC_CLASS.get(char) or re.escape(char)) + _trie_pattern(child, prefix_triggers)
+                    for char, child in sorted(node.items()) if char]
+    if "" in node:
+        alternatives.append("" if node[""] in prefix_triggers else r"\b")
+    return alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+
+
+_SEARCH_PREFIX_RE = re.compile(r"^(?:o|na temat|dotycząc[aey]|z|ze)\s+")
+
+
+def _search_query_slot(text, start=0, end=0):
+    # "znajdź notatkę o zakupach" -> "zakupach"
+    return _SEARCH_PREFIX_RE.sub("", extract_after_trigger(text, start, end))
+
+
+def _city_slot(text, start=0, end=0):
+    return extract_city(text)
+
+
+def build_default_router(end_words):
+    """Intencje obsługiwane lokalnie przez asystenta, w kolejności priorytetu."""
+    router = IntentRouter()
+    router.register(Intent("note_save", ["zapisz notatkę", "zrób notatkę"],
+                           slots={"content": extract_after_trigger}))
+    router.register(Intent("notes_show", ["pokaż notatki", "wyświetl notatki"], early=True))
+    router.register(Intent("note_search", ["znajdź notatkę", "znajdź notatki", "wyszukaj notatkę", "wyszukaj notatki",
+                                           "szukaj notatki", "poszukaj notatki"],
+                           slots={"query": _search_query_slot}))
+    router.register(Intent("weather", ["pogod", "temperatur", "deszcz", "słońc", "śnieg", "wilgotność", "wiatr"],
+                           slots={"city": _city_slot}, prefix=True))
+    router.register(Intent("wake_computer", ["włącz komputer", "uruchom komputer", "włącz pc", "włącz pecet"],
+                           early=True))
+    router.register(Intent("end", end_words, early=True))
+    return router.compile()
@@ -0,0 +1,122 @@
+# jobs.py
+import queue
+import itertools
+import threading
+import traceback
+
+
+class JobQueueFull(Exception):
+    """Kolejka zadań jest pełna - spróbuj ponownie później."""
+
+
+class Job:
+    """Jedno długie zadanie asystenta (mowa, nasłuchiwanie) z id, statusem i możliwością anulowania."""
+
+    def __init__(self, job_id, name, fn, args, kwargs, owner, executor):
+        self.id = job_id
+        self.name = name
+        self.owner = owner  # np. sid klienta Socket.IO, do którego trafiają zdarzenia
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+        self._executor = executor
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def report(self, progress=None, message=None):
+        """Zgłoś postęp zadania (0-1 i/lub komunikat)."""
+        self._executor._emit(self, progress=progress, message=message)
+
+    def to_dict(self):
+        data = {"id": self.id, "name": self.name, "status": self.status}
+        if self.result is not None:
+            data["result"] = self.result
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+
+class JobExecutor:
+    """Pula wątków z ograniczoną kolejką dla długich operacji wywoływanych z handlerów Socket.IO.
+
+    Handler tylko zleca zadanie i od razu wraca z id; postęp i wynik
+    przychodzą przez `on_event(job, extra)`. Funkcja zadania dostaje obiekt
+    Job jako pierwszy argument i może sprawdzać `job.cancelled`.
+    """
+
+    def __init__(self, max_workers=2, max_queue=8, on_event=None):
+        self.on_event = on_event
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._workers = [threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                         for i in range(max_workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, name, fn, *args, owner=None, **kwargs):
+        """Zleć zadanie; zwraca Job albo rzuca JobQueueFull."""
+        job = Job(next(self._ids), name, fn, args, kwargs, owner, self)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            raise JobQueueFull(f"Kolejka zadań pełna, odrzucono: {name}") from None
+        if job.status == "queued":
+            self._emit(job)
+        return job
+
+    def cancel(self, job_id):
+        """Anuluj zadanie: oczekujące nie wystartuje, trwające dostaje sygnał przez job.cancelled."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        job.cancel_event.set()
+        if job.status == "queued":
+            self._finish(job, "cancelled")
+        return True
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job.cancelled:
+                continue
+            job.status = "running"
+            self._emit(job)
+            try:
+                job.result = job._fn(job, *job._args, **job._kwargs)
+                self._finish(job, "cancelled" if job.cancelled else "done")
+            except Exception as e:
+                print(f"Błąd zadania {job.name}: {e}")
+                traceback.print_exc()
+                job.error = str(e)
+                self._finish(job, "failed")
+
+    def _finish(self, job, status):
+        job.status = status
+        with self._lock:
+            self._jobs.pop(job.id, None)
+        self._emit(job)
+
+    def _emit(self, job, **extra):
+        if self.on_event is None:
+            return
+        try:
+            self.on_event(job, {k: v for k, v in extra.items() if v is not None})
+        except Exception as e:
+            print(f"Błąd wysyłania statusu zadania: {e}")
@@ -0,0 +1,155 @@
+# llm_cache.py
+import re
+import json
+import time
+import hashlib
+import datetime
+import threading
+from collections import OrderedDict
+
+from intents import normalize
+
+# Słowa, które nie zmieniają sensu pytania ("nowa, powiedz mi proszę ...")
+DEFAULT_FILLERS = ("prosze", "hej", "no", "dobra", "okej", "ok", "powiedz", "mi", "czy", "mozesz", "moglabys",
+                   "a", "wiec", "to", "yyy", "eee", "hmm", "tak", "sluchaj")
+# Pytania o rzeczy zmieniające się z minuty na minutę - nigdy z cache
+DEFAULT_EXCLUDED = ("godzin", "teraz", "aktualn", "najnowsz", "wiadomosc", "news", "kurs", "wynik", "notowani")
+# Pytania ważne do końca dnia ("jaki jest dzień") - TTL skrócony do północy
+DEFAULT_DAILY = ("dzis", "dzien", "jutro", "wczoraj", "dat")
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _trigger_re(words):
+    words = [w for w in words if w]
+    return re.compile(r"\b(?:" + "|".join(re.escape(w) for w in words) + ")") if words else None
+
+
+class ResponseCache:
+    """Cache odpowiedzi AI: LRU w pamięci z limitem bajtów + tabela SQLite przetrwająca restart.
+
+    Klucz to skrót z (znormalizowane pytanie, model, prompt systemowy):
+    małe litery, bez polskich znaków, bez interpunkcji i słów-wypełniaczy.
+    Każdy wpis ma własny termin ważności; pytania o sprawy bieżące są
+    pomijane, a dotyczące bieżącego dnia wygasają o północy.
+    """
+
+    def __init__(self, storage, ttl=7 * 24 * 3600, memory_limit_bytes=1024 * 1024, max_entries=2000,
+                 fillers=DEFAULT_FILLERS, excluded=DEFAULT_EXCLUDED, daily=DEFAULT_DAILY):
+        self.storage = storage
+        self.ttl = ttl
+        self.memory_limit_bytes = memory_limit_bytes
+        self.max_entries = max_entries
+        self.fillers = {normalize(w) for w in fillers}
+        self._excluded_re = _trigger_re([normalize(w) for w in excluded])
+        self._daily_re = _trigger_re([normalize(w) for w in daily])
+        self._memory = OrderedDict()  # klucz -> (odpowiedź, wygasa)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self._miss_seconds = 0.0
+        self._hit_seconds = 0.0
+
+    def normalize_prompt(self, prompt):
+        words = _WORD_RE.findall(normalize(prompt))
+        return " ".join(w for w in words if w not in self.fillers)
+
+    def make_key(self, prompt, model, system_prompt):
+        """Klucz wpisu albo None, gdy pytanie nie może być buforowane."""
+        text = self.normalize_prompt(prompt)
+        if not text or (self._excluded_re and self._excluded_re.search(text)):
+            with self._lock:
+                self.skipped += 1
+            return None
+        raw = json.dumps([text, model, system_prompt], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, prompt):
+        """Czas życia wpisu w sekundach: do północy dla pytań o bieżący dzień, inaczej `ttl`."""
+        if self._daily_re and self._daily_re.search(self.normalize_prompt(prompt)):
+            now = datetime.datetime.now()
+            midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+            return min(self.ttl, (midnight - now).total_seconds())
+        return self.ttl
+
+    def get(self, key):
+        start = time.perf_counter()
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > now:
+                self._memory.move_to_end(key)
+                self._record_hit(start)
+                return entry[0]
+        row = self.storage.connection().execute(
+            "SELECT response, expires FROM llm_cache WHERE key = ? AND expires > ?", (key, now)).fetchone()
+        with self._lock:
+            if row is None:
+                self._forget(key)
+                self.misses += 1
+                return None
+            self._remember(key, row[0], row[1])
+            self._record_hit(start)
+        self.storage.connection().execute("UPDATE llm_cache SET used = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, key, response, ttl=None, latency=None):
+        """Zapisz odpowiedź; `latency` (czas zapytania do AI) służy do liczenia zaoszczędzonego czasu."""
+        if not response:
+            return
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, response, expires)
+            if latency is not None:
+                self._miss_seconds += latency
+        try:
+            with self.storage.transaction() as conn:
+                conn.execute("INSERT OR REPLACE INTO llm_cache (key, response, expires, used) VALUES (?, ?, ?, ?)",
+                             (key, response, expires, now))
+                conn.execute("DELETE FROM llm_cache WHERE expires <= ? OR key IN ("
+                             "SELECT key FROM llm_cache ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                             (now, self.max_entries))
+        except Exception as e:
+            print(f"Błąd zapisu cache odpowiedzi AI: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            avg_miss = self._miss_seconds / self.misses if self.misses else 0.0
+            avg_hit = self._hit_seconds / self.hits if self.hits else 0.0
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "skipped": self.skipped,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "avg_ai_ms": round(avg_miss * 1000, 1),
+                "avg_hit_ms": round(avg_hit * 1000, 3),
+                "latency_saved_seconds": round(self.hits * max(0.0, avg_miss - avg_hit), 1),
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "ttl": self.ttl
+            }
+
+    # Metody poniżej wywoływane są z założoną blokadą
+    def _record_hit(self, start):
+        self.hits += 1
+        self._hit_seconds += time.perf_counter() - start
+
+    def _remember(self, key, response, expires):
+        size = len(response.encode("utf-8"))
+        if size > self.memory_limit_bytes:
+            return
+        self._forget(key)
+        self._memory[key] = (response, expires)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_limit_bytes:
+            _, (evicted, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted.encode("utf-8"))
+
+    def _forget(self, key):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= len(entry[0].encode("utf-8"))
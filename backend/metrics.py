@@ -0,0 +1,183 @@
+# metrics.py
+import os
+import time
+import threading
+from bisect import bisect_left
+
+# Granice kubełków histogramów czasu (sekundy) - od pojedynczych bloków audio po zapytania do AI
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "stage_duration_seconds": "Czas etapów potoku asystenta (przechwytywanie, STT, intencje, AI, TTS, odtwarzanie, magazyn).",
+    "http_request_duration_seconds": "Czas obsługi zapytań HTTP według reguły trasy.",
+    "http_client_duration_seconds": "Czas prób zapytań do zewnętrznych API według endpointu (openrouter, elevenlabs, openweather).",
+    "http_client_errors_total": "Nieudane próby zapytań do zewnętrznych API (błąd połączenia, limit czasu, status >= 400).",
+    "stage_errors_total": "Liczba etapów zakończonych wyjątkiem.",
+    "audio_blocks_total": "Bloki audio odczytane z mikrofonu.",
+    "audio_dropped_blocks_total": "Bloki audio odrzucone, gdy mikrofon był wyciszony (np. podczas TTS).",
+    "audio_overflows_total": "Przepełnienia bufora wejściowego audio.",
+    "tts_playbacks_total": "Wypowiedzi TTS według źródła nagrania (prerendered, cache, stream, buffered).",
+}
+
+
+class Histogram:
+    """Histogram o stałych kubełkach: observe to bisect i kilka dodawań."""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "last", "max")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.last = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.last = value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Przybliżony kwantyl: interpolacja liniowa wewnątrz kubełka, nie więcej niż maksimum."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return min(self.max, lower + (upper - lower) * (rank - seen) / bucket_count)
+            seen += bucket_count
+        return self.max
+
+
+class _Span:
+    __slots__ = ("_metrics", "_stage", "_start")
+
+    def __init__(self, metrics, stage):
+        self._metrics = metrics
+        self._stage = stage
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._metrics.observe_stage(self._stage, time.perf_counter() - self._start, error=exc_type is not None)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Metrics:
+    """Lekkie liczniki i histogramy w pamięci, eksportowane w formacie tekstowym Prometheusa.
+
+    `span(etap)` mierzy czas bloku `with`; przy wyłączonych metrykach
+    zwraca współdzielony pusty obiekt, więc koszt to jedno sprawdzenie flagi.
+    """
+
+    def __init__(self, enabled=True, prefix="nova"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._histograms = {}  # (rodzina, etykiety) -> Histogram
+        self._counters = {}  # (rodzina, etykiety) -> wartość
+        self._lock = threading.Lock()
+
+    def span(self, stage):
+        return _Span(self, stage) if self.enabled else _NULL_SPAN
+
+    def observe_stage(self, stage, seconds, error=False):
+        if not self.enabled:
+            return
+        self.observe("stage_duration_seconds", seconds, stage=stage)
+        if error:
+            self.inc("stage_errors_total", stage=stage)
+
+    def observe(self, family, value, **labels):
+        if not self.enabled:
+            return
+        key = (family, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, family, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (family, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def stages(self):
+        """Podsumowanie etapów (ms) dla GUI: liczba, ostatni, średni, p50, p95."""
+        with self._lock:
+            items = [(dict(labels)["stage"], h) for (family, labels), h in self._histograms.items()
+                     if family == "stage_duration_seconds"]
+            return {stage: {"count": h.count, "last": round(h.last * 1000, 1),
+                            "avg": round(h.sum / h.count * 1000, 1),
+                            "p50": round(h.quantile(0.5) * 1000, 1), "p95": round(h.quantile(0.95) * 1000, 1)}
+                    for stage, h in items}
+
+    def render(self):
+        """Wszystkie metryki w formacie tekstowym Prometheusa (text/plain; version=0.0.4)."""
+        with self._lock:
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            histograms = [(key, (list(h.counts), h.sum, h.count, h.buckets)) for key, h in histograms]
+            counters = sorted(self._counters.items())
+        lines = []
+        described = set()
+        for (family, labels), value in counters:
+            name = f"{self.prefix}_{family}"
+            if family not in described:
+                described.add(family)
+                lines.append(f"# HELP {name} {HELP.get(family, family)}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_labels(labels)} {value}")
+        for (family, labels), (counts, total, count, buckets) in histograms:
+            name = f"{self.prefix}_{family}"
+            if family not in described:
+                described.add(family)
+                lines.append(f"# HELP {name} {HELP.get(family, family)}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(labels, le=_number(bound))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels, le='+Inf')} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _number(value):
+    return repr(float(value))
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+# Wspólny rejestr dla całego backendu; METRICS_ENABLED=0 wyłącza pomiary
+metrics = Metrics(enabled=os.getenv("METRICS_ENABLED", "1") == "1")
@@ -0,0 +1,177 @@
+# note_index.py
+import re
+import math
+import heapq
+import threading
+from functools import lru_cache
+from collections import Counter
+from bisect import bisect_left
+
+from intents import normalize
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Końcówki fleksyjne (po usunięciu polskich znaków); rdzeń co najmniej 3-znakowy, leniwy,
+# więc wygrywa najdłuższa pasująca końcówka
+_SUFFIXES = ("owie", "ami", "ach", "ego", "emu", "ich", "imi", "ymi", "ych", "owi", "iem", "iej",
+             "om", "ow", "em", "ie", "ej", "ym", "im", "a", "e", "i", "y", "u", "o")
+_STEM_RE = re.compile(r"^([a-z0-9]{3,}?)(?:" + "|".join(_SUFFIXES) + r")$")
+# Oboczności spółgłosek na końcu rdzenia ("samochodzie" -> "samochod", "siostrze" -> "siostr")
+_ALTERNATIONS = (("dz", "d"), ("rz", "r"))
+_STOP_WORDS = {"i", "w", "z", "ze", "na", "o", "do", "od", "sie", "to", "a", "ale", "jest", "po", "za", "nie"}
+
+
+@lru_cache(maxsize=65536)
+def stem(word):
+    """Lekki stemmer: obcina typową końcówkę, zostawiając co najmniej 3 znaki rdzenia."""
+    match = _STEM_RE.match(word)
+    root = match.group(1) if match else word
+    for tail, replacement in _ALTERNATIONS:
+        if root.endswith(tail) and len(root) > len(tail) + 2:
+            return root[:-len(tail)] + replacement
+    return root
+
+
+def terms(text):
+    """Rdzenie słów tekstu: małe litery, bez polskich znaków i słów funkcyjnych."""
+    return [stem(w) for w in _WORD_RE.findall(normalize(text)) if w not in _STOP_WORDS]
+
+
+class NoteIndex:
+    """Przyrostowy indeks odwrócony treści notatek z rankingiem BM25.
+
+    Dodanie i usunięcie notatki dotyka tylko jej rdzeni - indeks nie jest
+    przebudowywany. Listy wystąpień trzymają gotowy składnik BM25 zależny
+    od notatki (liczba wystąpień i długość), więc wyszukiwanie to tylko
+    mnożenie przez idf i sumowanie. Słowo z zapytania pasuje do rdzeni,
+    które się od niego zaczynają ("mlek" -> "mleko", "mleka"), z niższą
+    wagą niż trafienie dokładne; posortowana lista rdzeni pozwala znaleźć
+    je przez bisekcję.
+    """
+
+    PREFIX_WEIGHT = 0.7
+    MAX_EXPANSIONS = 50
+    K1 = 1.2
+    B = 0.75
+    # Przeliczenie składników, gdy średnia długość notatki odjedzie o tyle od użytej do ich wyliczenia
+    RENORMALIZE_DRIFT = 0.25
+
+    def __init__(self):
+        self._postings = {}  # rdzeń -> {id notatki: składnik BM25}
+        self._sorted_terms = []
+        self._notes = {}  # id notatki -> (liczba rdzeni, {rdzeń: liczba wystąpień})
+        self._total_length = 0
+        self._avg_length = 0.0  # średnia użyta w składnikach list wystąpień
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._notes)
+
+    def build(self, notes):
+        for note in notes:
+            self.add(note)
+
+    def add(self, note):
+        note_id = note["id"]
+        note_terms = terms(note.get("content", ""))
+        counts = {}
+        for term in note_terms:
+            counts[term] = counts.get(term, 0) + 1
+        with self._lock:
+            self._remove(note_id)
+            self._notes[note_id] = (len(note_terms), counts)
+            self._total_length += len(note_terms)
+            if not self._avg_length:
+                self._avg_length = max(1.0, float(len(note_terms)))
+            for term, count in counts.items():
+                posting = self._postings.get(term)
+                if posting is None:
+                    posting = self._postings[term] = {}
+                    self._sorted_terms.insert(bisect_left(self._sorted_terms, term), term)
+                posting[note_id] = self._part(count, len(note_terms))
+            self._check_drift()
+
+    def remove(self, note_id):
+        with self._lock:
+            self._remove(note_id)
+            self._check_drift()
+
+    # Metody poniżej wywoływane są z założoną blokadą
+    def _part(self, tf, length):
+        return tf * (self.K1 + 1) / (tf + self.K1 * (1 - self.B + self.B * length / self._avg_length))
+
+    @staticmethod
+    def _idf(count, frequency):
+        return math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+
+    def _remove(self, note_id):
+        entry = self._notes.pop(note_id, None)
+        if entry is None:
+            return
+        length, counts = entry
+        self._total_length -= length
+        for term in counts:
+            posting = self._postings[term]
+            del posting[note_id]
+            if not posting:
+                del self._postings[term]
+                del self._sorted_terms[bisect_left(self._sorted_terms, term)]
+
+    def _check_drift(self):
+        if not self._notes:
+            return
+        avg_length = max(1.0, self._total_length / len(self._notes))
+        if abs(avg_length - self._avg_length) <= self.RENORMALIZE_DRIFT * self._avg_length:
+            return
+        self._avg_length = avg_length
+        for note_id, (length, counts) in self._notes.items():
+            for term, count in counts.items():
+                self._postings[term][note_id] = self._part(count, length)
+
+    def _expand(self, term):
+        # (rdzeń, waga) - dokładny i zaczynające się od `term`
+        matches = []
+        index = bisect_left(self._sorted_terms, term)
+        while index < len(self._sorted_terms) and len(matches) < self.MAX_EXPANSIONS:
+            candidate = self._sorted_terms[index]
+            if not candidate.startswith(term):
+                break
+            matches.append((candidate, 1.0 if candidate == term else self.PREFIX_WEIGHT))
+            index += 1
+        return matches
+
+    def search(self, query, offset=0, limit=20):
+        """Notatki pasujące do zapytania: (lista (id, wynik), łączna liczba trafień)."""
+        query_terms = list(dict.fromkeys(terms(query)))
+        if not query_terms:
+            return [], 0
+        scores = {}
+        matched = Counter()  # id notatki -> liczba pasujących słów zapytania
+        with self._lock:
+            count = len(self._notes)
+            for query_term in query_terms:
+                expansions = self._expand(query_term)
+                scores_get = scores.get
+                if len(expansions) == 1:
+                    # Najczęstszy przypadek: jeden rdzeń, sumowanie prosto z listy wystąpień
+                    posting = self._postings[expansions[0][0]]
+                    factor = expansions[0][1] * self._idf(count, len(posting))
+                    for note_id, part in posting.items():
+                        scores[note_id] = scores_get(note_id, 0.0) + factor * part
+                    matched.update(posting.keys())
+                    continue
+                # Kilka rdzeni z tym samym początkiem: liczy się najlepiej pasujący w danej notatce
+                best = {}
+                for term, weight in expansions:
+                    posting = self._postings[term]
+                    factor = weight * self._idf(count, len(posting))
+                    best_get = best.get
+                    for note_id, part in posting.items():
+                        score = factor * part
+                        if score > best_get(note_id, 0.0):
+                            best[note_id] = score
+                for note_id, score in best.items():
+                    scores[note_id] = scores_get(note_id, 0.0) + score
+                matched.update(best.keys())
+        # Notatki zawierające więcej słów zapytania przed częściowymi trafieniami
+        ranked = heapq.nlargest(offset + limit, scores.items(), key=lambda item: (matched[item[0]], item[1], item[0]))
+        return [(note_id, round(score, 4)) for note_id, score in ranked[offset:offset + limit]], len(scores)
@@ -0,0 +1,178 @@
+# scheduler.py
+import heapq
+import datetime
+import threading
+
+# Powtórzenia: dni tygodnia (0 = poniedziałek), w które wpis może się uruchomić
+REPEAT_DAYS = {
+    "daily": set(range(7)),
+    "weekdays": set(range(5)),
+    "weekends": {5, 6},
+}
+
+# Pozycje kopca: przygotowanie (lead przed terminem) zdejmowane jest przed uruchomieniem o tej samej porze
+PREPARE, FIRE = 0, 1
+
+
+def next_occurrence(item, after):
+    """Najbliższy moment uruchomienia wpisu (budzika/przypomnienia) nie wcześniejszy niż `after`.
+
+    Wpis ma "time" (HH:MM), opcjonalnie "date" (YYYY-MM-DD) i "repeat"
+    ("daily", "weekdays", "weekends", "weekly"). Zwraca datetime albo None,
+    jeśli wpis już się nie uruchomi.
+    """
+    try:
+        hour, minute = (int(part) for part in item["time"].split(":")[:2])
+    except (KeyError, ValueError):
+        return None
+    date = None
+    if item.get("date"):
+        try:
+            date = datetime.date.fromisoformat(item["date"])
+        except ValueError:
+            date = None
+    repeat = item.get("repeat")
+
+    if date is not None and not repeat:
+        candidate = datetime.datetime.combine(date, datetime.time(hour, minute))
+        return candidate if candidate >= after else None
+
+    start_day = max(date, after.date()) if date else after.date()
+    if repeat == "weekly":
+        days = {date.weekday() if date else start_day.weekday()}
+    else:
+        days = REPEAT_DAYS.get(repeat, set(range(7)))
+    for offset in range(8):
+        day = start_day + datetime.timedelta(days=offset)
+        if day.weekday() not in days:
+            continue
+        candidate = datetime.datetime.combine(day, datetime.time(hour, minute))
+        if candidate >= after:
+            return candidate
+    return None
+
+
+class EventScheduler:
+    """Jeden wątek i kolejka priorytetowa (kopiec) zamiast wątków sprawdzających co 30 s.
+
+    Wątek śpi do najbliższego terminu i jest budzony od razu, gdy wpis
+    zostanie dodany, zmieniony albo usunięty. Nieaktualne pozycje kopca
+    (po zmianie lub usunięciu wpisu) są pomijane przy zdjęciu z kopca.
+
+    Z `on_prepare` każdy termin ma w kopcu drugą pozycję, `lead` sekund
+    wcześniej: wtedy wywoływane jest on_prepare(kind, item, termin) - np. by
+    przygotować zapowiedź. `on_discard(kind, id)` dostaje każdą zmianę
+    i usunięcie wpisu, żeby przygotowane dane można było unieważnić.
+    """
+
+    def __init__(self, on_fire, now=datetime.datetime.now, lead=0.0, on_prepare=None, on_discard=None):
+        self.on_fire = on_fire  # on_fire(kind, item, repeats) wywoływane w osobnym wątku
+        self.now = now
+        self.lead = datetime.timedelta(seconds=lead)
+        self.on_prepare = on_prepare  # wywoływane w wątku harmonogramu - musi wracać od razu
+        self.on_discard = on_discard
+        self._heap = []
+        self._items = {}  # (kind, id) -> (wersja, wpis)
+        self._version = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def load(self, kind, items):
+        for item in items:
+            self.upsert(kind, item)
+
+    def upsert(self, kind, item):
+        """Dodaj lub zaktualizuj wpis; nieaktywny wpis jest usuwany z harmonogramu."""
+        key = (kind, item["id"])
+        with self._cond:
+            self._items.pop(key, None)
+            if item.get("active", True):
+                # Bieżąca minuta też się liczy - jak w dawnym porównaniu "HH:MM" == teraz
+                when = next_occurrence(item, self.now().replace(second=0, microsecond=0))
+                if when is not None:
+                    self._push(key, item, when)
+            self._cond.notify()
+        self._discarded(kind, item["id"])
+
+    def cancel(self, kind, item_id):
+        with self._cond:
+            self._items.pop((kind, item_id), None)
+            self._cond.notify()
+        self._discarded(kind, item_id)
+
+    def _discarded(self, kind, item_id):
+        if self.on_discard is not None:
+            self.on_discard(kind, item_id)
+
+    def pending(self):
+        """Lista zaplanowanych wpisów (rodzaj, id, termin), posortowana po terminie."""
+        with self._cond:
+            entries = [(when, kind, item_id) for when, version, phase, kind, item_id in self._heap
+                       if phase == FIRE and self._items.get((kind, item_id), (None,))[0] == version]
+        return [(kind, item_id, when) for when, kind, item_id in sorted(entries)]
+
+    def _push(self, key, item, when):
+        self._version += 1
+        self._items[key] = (self._version, item)
+        heapq.heappush(self._heap, (when, self._version, FIRE, key[0], key[1]))
+        if self.on_prepare is not None:
+            heapq.heappush(self._heap, (when - self.lead, self._version, PREPARE, key[0], key[1]))
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="event-scheduler", daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self):
+        return self._running
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                due, upcoming = self._pop_due()
+                if not due and not upcoming:
+                    timeout = None
+                    if self._heap:
+                        timeout = max(0.0, (self._heap[0][0] - self.now()).total_seconds())
+                    self._cond.wait(timeout)
+                    continue
+            for kind, item, when in upcoming:
+                try:
+                    self.on_prepare(kind, item, when)
+                except Exception as e:
+                    print(f"Błąd przygotowania wpisu {kind} {item.get('id')}: {e}")
+            for kind, item, repeats in due:
+                threading.Thread(target=self.on_fire, args=(kind, item, repeats), daemon=True).start()
+
+    def _pop_due(self):
+        # Wywoływane z założoną blokadą
+        now = self.now()
+        due, upcoming = [], []
+        while self._heap and self._heap[0][0] <= now:
+            when, version, phase, kind, item_id = heapq.heappop(self._heap)
+            current = self._items.get((kind, item_id))
+            if current is None or current[0] != version:
+                continue  # wpis zmieniony albo usunięty
+            item = current[1]
+            if phase == PREPARE:
+                upcoming.append((kind, item, when + self.lead))
+                continue
+            following = next_occurrence(item, when + datetime.timedelta(minutes=1)) if item.get("repeat") else None
+            if following is not None:
+                self._push((kind, item_id), item, following)
+            else:
+                del self._items[(kind, item_id)]
+            due.append((kind, item, following is not None))
+        return due, upcoming
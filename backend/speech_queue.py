@@ -0,0 +1,95 @@
+# speech_queue.py
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+
+# Niższa liczba = wyższy priorytet
+PRIORITY_ALARM = 0
+PRIORITY_REMINDER = 1
+PRIORITY_CONVERSATION = 2
+PRIORITY_SYSTEM = 3
+
+
+class SpeechQueue:
+    """Jedyny wątek odtwarzający mowę, zasilany kolejką priorytetową.
+
+    `say()` nigdy nie blokuje - zwraca Future, który dostaje True po
+    odtworzeniu całej wypowiedzi albo False, gdy została przerwana lub się
+    nie udała. Anulowany Future (`future.cancel()`) usuwa wypowiedź, która
+    jeszcze nie zaczęła grać. Wypowiedź o wyższym priorytecie przerywa bieżącą o niższym;
+    w obrębie jednego priorytetu zachowana jest kolejność zgłoszeń.
+
+    `play(text, interrupt_event, audio)` odtwarza tekst, zwraca True przy
+    sukcesie i powinna zakończyć się szybko po ustawieniu `interrupt_event`;
+    `audio` to gotowe nagranie podane w `say()` (zwykle None - do syntezy).
+    `on_busy(bool)` informuje, czy kolejka mówi lub ma coś do powiedzenia
+    (np. do wyciszania mikrofonu).
+    """
+
+    def __init__(self, play, on_busy=None):
+        self._play = play
+        self._on_busy = on_busy
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._current = None  # (priorytet, interrupt_event)
+        self._busy = False
+        self._thread = threading.Thread(target=self._run, name="speech-output", daemon=True)
+        self._thread.start()
+
+    def say(self, text, priority=PRIORITY_CONVERSATION, audio=None):
+        future = Future()
+        with self._cond:
+            heapq.heappush(self._heap, (priority, next(self._seq), text, audio, future))
+            if self._current is not None and priority < self._current[0]:
+                self._current[1].set()
+            self._set_busy(True)
+            self._cond.notify()
+        return future
+
+    def interrupt(self, clear=False):
+        """Przerwij bieżącą wypowiedź; z `clear=True` porzuć też oczekujące."""
+        with self._cond:
+            if self._current is not None:
+                self._current[1].set()
+            if clear:
+                for _, _, _, _, future in self._heap:
+                    if not future.done():
+                        future.set_result(False)
+                self._heap.clear()
+
+    @property
+    def busy(self):
+        with self._cond:
+            return self._busy
+
+    def _set_busy(self, busy):
+        # Wywoływane z założoną blokadą
+        if busy != self._busy:
+            self._busy = busy
+            if self._on_busy:
+                self._on_busy(busy)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._set_busy(False)
+                    self._cond.wait()
+                priority, _, text, audio, future = heapq.heappop(self._heap)
+                # Anulowana przez wywołującego - nie odtwarzaj; od teraz cancel() już nie zadziała
+                if not future.set_running_or_notify_cancel():
+                    continue
+                interrupt_event = threading.Event()
+                self._current = (priority, interrupt_event)
+            completed = False
+            try:
+                completed = bool(self._play(text, interrupt_event, audio)) and not interrupt_event.is_set()
+            except Exception as e:
+                print(f"Błąd odtwarzania mowy: {e}")
+            finally:
+                with self._cond:
+                    self._current = None
+                if not future.done():
+                    future.set_result(completed)
@@ -0,0 +1,44 @@
+# startup.py
+import time
+import threading
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Mierzy czas kolejnych faz uruchamiania serwera (import, magazyn, model...).
+
+    Fazy mogą biec równolegle (np. ładowanie modelu w tle); każda ma czas
+    rozpoczęcia liczony od startu procesu i czas trwania.
+    """
+
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self._phases = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+
+    def record(self, name, start, end=None):
+        end = time.perf_counter() if end is None else end
+        with self._lock:
+            self._phases.append((name, start - self.started, end - start))
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def phases(self):
+        with self._lock:
+            return [{"name": name, "start_ms": round(offset * 1000, 1), "duration_ms": round(duration * 1000, 1)}
+                    for name, offset, duration in self._phases]
+
+    def report(self, title="Start serwera"):
+        print(f"{title} - fazy uruchamiania:")
+        for phase in self.phases():
+            print(f"  {phase['name']:<28} od {phase['start_ms']:8.1f} ms  trwała {phase['duration_ms']:8.1f} ms")
+        print(f"  razem {self.elapsed() * 1000:.1f} ms od startu procesu")
@@ -0,0 +1,259 @@
+# storage.py
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from metrics import metrics
+
+
+class Repository:
+    """Kolekcja dokumentów JSON (notatki, budziki, przypomnienia) w jednej tabeli SQLite.
+
+    Każdy wiersz to jeden dokument z unikalnym, indeksowanym `id`.
+    Kolejność listy to kolejność dodawania - tak jak w dawnych plikach JSON.
+    Zmiana jednego dokumentu dotyka tylko jego wiersza.
+    """
+
+    def __init__(self, storage, table):
+        self.storage = storage
+        self.table = table
+
+    def list(self):
+        # Jedna tablica JSON sklejona po stronie SQLite i jedno json.loads zamiast parsowania wiersz po wierszu
+        with metrics.span("storage_read"):
+            row = self.storage.connection().execute(
+                f"SELECT '[' || COALESCE(group_concat(data, ','), '') || ']' "
+                f"FROM (SELECT data FROM {self.table} ORDER BY seq)").fetchone()
+            return json.loads(row[0])
+
+    def get(self, item_id):
+        with metrics.span("storage_read"):
+            row = self.storage.connection().execute(
+                f"SELECT data FROM {self.table} WHERE id = ?", (item_id,)).fetchone()
+            return json.loads(row[0]) if row else None
+
+    def page(self, after=0, limit=50):
+        """Dokumenty w kolejności dodawania po pozycji `after`; zwraca (dokumenty, kursor następnej strony albo None)."""
+        with metrics.span("storage_read"):
+            rows = self.storage.connection().execute(
+                f"SELECT seq, data FROM {self.table} WHERE seq > ? ORDER BY seq LIMIT ?",
+                (after, limit + 1)).fetchall()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        return [json.loads(data) for _, data in rows], (rows[-1][0] if more else None)
+
+    def latest(self, limit):
+        """`limit` ostatnio dodanych dokumentów, w kolejności dodawania."""
+        with metrics.span("storage_read"):
+            rows = self.storage.connection().execute(
+                f"SELECT data FROM {self.table} ORDER BY seq DESC LIMIT ?", (limit,)).fetchall()
+        return [json.loads(data) for data, in reversed(rows)]
+
+    def get_many(self, ids):
+        """Dokumenty o podanych id w kolejności `ids`; brakujące są pomijane."""
+        if not ids:
+            return []
+        with metrics.span("storage_read"):
+            rows = self.storage.connection().execute(
+                f"SELECT id, data FROM {self.table} WHERE id IN ({','.join('?' * len(ids))})", list(ids)).fetchall()
+        by_id = {item_id: data for item_id, data in rows}
+        return [json.loads(by_id[item_id]) for item_id in ids if item_id in by_id]
+
+    def insert(self, item):
+        """Dodaj dokument; `item` musi mieć pole "id"."""
+        with self.storage.transaction() as conn:
+            conn.execute(f"INSERT INTO {self.table} (id, data) VALUES (?, ?)",
+                         (item["id"], json.dumps(item, ensure_ascii=False)))
+        self.storage.bump_version(self.table)
+        return item
+
+    def update(self, item_id, **fields):
+        """Zmień wybrane pola dokumentu; zwraca nowy dokument albo None, gdy nie istnieje."""
+        with self.storage.transaction() as conn:
+            row = conn.execute(f"SELECT data FROM {self.table} WHERE id = ?", (item_id,)).fetchone()
+            if row is None:
+                return None
+            item = json.loads(row[0])
+            item.update(fields)
+            conn.execute(f"UPDATE {self.table} SET data = ? WHERE id = ?",
+                         (json.dumps(item, ensure_ascii=False), item_id))
+        self.storage.bump_version(self.table)
+        return item
+
+    def delete(self, item_id):
+        """Usuń dokument; zwraca True, jeśli istniał."""
+        with self.storage.transaction() as conn:
+            cursor = conn.execute(f"DELETE FROM {self.table} WHERE id = ?", (item_id,))
+        if cursor.rowcount:
+            self.storage.bump_version(self.table)
+        return cursor.rowcount > 0
+
+    def count(self):
+        return self.storage.connection().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def import_json(self, path):
+        """Jednorazowy import dawnego pliku JSON (lista dokumentów). Zwraca liczbę zaimportowanych."""
+        marker = f"imported:{self.table}"
+        if self.storage.get_meta(marker) or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+        except Exception as e:
+            print(f"Błąd odczytu {path} podczas importu: {e}")
+            return 0
+        imported = 0
+        with self.storage.transaction() as conn:
+            for item in items:
+                if not isinstance(item, dict) or "id" not in item:
+                    continue
+                exists = conn.execute(f"SELECT 1 FROM {self.table} WHERE id = ?", (item["id"],)).fetchone()
+                if exists:
+                    # Dawne pliki potrafiły mieć zduplikowane id - zachowaj wpis pod nowym id
+                    item = dict(item)
+                    item["id"] = conn.execute(f"SELECT MAX(id) + 1 FROM {self.table}").fetchone()[0]
+                conn.execute(f"INSERT INTO {self.table} (id, data) VALUES (?, ?)",
+                             (item["id"], json.dumps(item, ensure_ascii=False)))
+                imported += 1
+            self.storage.set_meta(marker, path, conn=conn)
+        self.storage.bump_version(self.table)
+        print(f"Zaimportowano {imported} wpisów z {path} do tabeli {self.table}.")
+        return imported
+
+
+class SettingsRepository:
+    """Ustawienia jako para klucz -> wartość JSON."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def get_all(self):
+        with metrics.span("storage_read"):
+            rows = self.storage.connection().execute("SELECT key, value FROM settings").fetchall()
+            return {key: json.loads(value) for key, value in rows}
+
+    def replace_all(self, values):
+        with self.storage.transaction() as conn:
+            self._replace(conn, values)
+        self.storage.bump_version("settings")
+
+    def import_json(self, path):
+        """Jednorazowy import dawnego settings.json (obiekt klucz -> wartość). Zwraca liczbę ustawień."""
+        if self.storage.get_meta("imported:settings") or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                values = json.load(f)
+        except Exception as e:
+            print(f"Błąd odczytu {path} podczas importu: {e}")
+            return 0
+        if not isinstance(values, dict):
+            print(f"Pominięto import {path}: oczekiwano obiektu JSON z ustawieniami, jest {type(values).__name__}.")
+            return 0
+        # Ustawienia i znacznik importu w jednej transakcji - przerwany import nie zostawi połowy stanu
+        with self.storage.transaction() as conn:
+            self._replace(conn, values)
+            self.storage.set_meta("imported:settings", path, conn=conn)
+        self.storage.bump_version("settings")
+        return len(values)
+
+    @staticmethod
+    def _replace(conn, values):
+        conn.execute("DELETE FROM settings")
+        conn.executemany("INSERT INTO settings (key, value) VALUES (?, ?)",
+                         [(key, json.dumps(value, ensure_ascii=False)) for key, value in values.items()])
+
+
+class Storage:
+    """Transakcyjny magazyn danych asystenta: SQLite w trybie WAL, osobne połączenie na wątek."""
+
+    COLLECTIONS = ("notes", "alarms", "reminders")
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        # Wersje kolekcji do ETagów: licznik zmian w tym procesie + znacznik startu,
+        # żeby po restarcie serwera stary ETag przeglądarki nie pasował przypadkiem
+        self._epoch = f"{int(time.time() * 1000):x}"
+        self._versions = {}
+        self._versions_lock = threading.Lock()
+        with self._init_lock:
+            conn = self.connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            for table in self.COLLECTIONS:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ("
+                             "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                             "id INTEGER NOT NULL UNIQUE, "
+                             "data TEXT NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            # Cache odpowiedzi AI (llm_cache.ResponseCache)
+            conn.execute("CREATE TABLE IF NOT EXISTS llm_cache ("
+                         "key TEXT PRIMARY KEY, response TEXT NOT NULL, expires REAL NOT NULL, used REAL NOT NULL)")
+            conn.commit()
+        self.notes = Repository(self, "notes")
+        self.alarms = Repository(self, "alarms")
+        self.reminders = Repository(self, "reminders")
+        self.settings = SettingsRepository(self)
+
+    def version(self, *tables):
+        """Znacznik stanu podanych kolekcji - zmienia się przy każdym zapisie do którejkolwiek z nich."""
+        with self._versions_lock:
+            return "-".join([self._epoch] + [str(self._versions.get(table, 0)) for table in tables])
+
+    def bump_version(self, table):
+        with self._versions_lock:
+            self._versions[table] = self._versions.get(table, 0) + 1
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    def transaction(self):
+        return _Transaction(self.connection())
+
+    def get_meta(self, key):
+        row = self.connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value, conn=None):
+        (conn or self.connection()).execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def import_legacy_json(self, notes_file=None, alarms_file=None, reminders_file=None, settings_file=None):
+        """Przy pierwszym uruchomieniu przenieś dane z dawnych plików JSON (pliki zostają jako kopia)."""
+        for repo, path in ((self.notes, notes_file), (self.alarms, alarms_file),
+                           (self.reminders, reminders_file), (self.settings, settings_file)):
+            if path:
+                repo.import_json(path)
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK - zapis blokuje bazę tylko na czas jednej operacji."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._span = metrics.span("storage_write")
+
+    def __enter__(self):
+        self._span.__enter__()
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.conn.execute("COMMIT")
+            else:
+                self.conn.execute("ROLLBACK")
+        finally:
+            self._span.__exit__(exc_type, exc, tb)
+        return False
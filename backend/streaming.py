@@ -0,0 +1,57 @@
+# streaming.py
+import re
+
+# Koniec zdania: . ! ? … (także kilka naraz) i biały znak po nim albo nowa linia
+_SENTENCE_END = re.compile(r'[.!?…]+["\')\]]*\s+|\n+')
+
+
+class SentenceSplitter:
+    """Składa przyrostowe fragmenty tekstu (tokeny z LLM) w pełne zdania."""
+
+    def __init__(self, min_length=12):
+        self.min_length = min_length  # krótsze "zdania" (np. "Tak.") doklejane są do następnego
+        self._buffer = ""
+
+    def feed(self, delta):
+        """Dodaj fragment tekstu; zwróć listę zdań, które się w nim domknęły."""
+        self._buffer += delta
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            if len(candidate) < self.min_length:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self):
+        """Zwróć resztę tekstu (ostatnie, niedomknięte zdanie)."""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return [rest] if rest else []
+
+
+class SentenceSpeaker:
+    """Zleca kolejne zdania do wypowiedzenia, gdy LLM nadal generuje dalszą część odpowiedzi.
+
+    `speak(text)` nie blokuje i zwraca Future (jak VoiceAssistant.tts_speak);
+    kolejność zdań zachowuje kolejka mowy.
+    """
+
+    def __init__(self, speak, on_first_audio=None):
+        self._speak = speak
+        self._on_first_audio = on_first_audio
+        self._futures = []
+
+    def say(self, sentence):
+        future = self._speak(sentence)
+        if not self._futures and self._on_first_audio:
+            future.add_done_callback(lambda f: f.result() and self._on_first_audio())
+        self._futures.append(future)
+
+    def finish(self, timeout=None):
+        """Poczekaj, aż wszystkie zdania zostaną wypowiedziane (albo przerwane)."""
+        for future in self._futures:
+            future.result(timeout)
@@ -0,0 +1,252 @@
+# stt_sessions.py
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from vad import VoiceActivityDetector
+from metrics import metrics
+
+
+class SessionRejected(Exception):
+    """Nie można otworzyć sesji rozpoznawania (limit sesji, brak modelu, zły format)."""
+
+
+class StreamSession:
+    """Strumień audio jednego klienta: kolejka bloków PCM, własny rozpoznawacz Kaldi i VAD."""
+
+    def __init__(self, sid, recognizer, vad):
+        self.sid = sid
+        self.recognizer = recognizer
+        self.vad = vad
+        self.pending = deque()
+        self.pending_bytes = 0
+        self.scheduled = False  # czy blok jest w kolejce puli albo właśnie dekodowany
+        self.closing = False  # po dekodowaniu reszty: zwolnienie rozpoznawacza
+        self.flush = False  # przy zamykaniu: wyślij wynik końcowy z reszty nagrania
+        self.closed = False
+        self.last_partial = ""
+        self.received_bytes = 0
+        self.decoded_bytes = 0
+        self.dropped_chunks = 0
+        self.max_lag = 0.0  # najdłuższe oczekiwanie bloku na dekodowanie (s)
+        self.decode_seconds = 0.0
+        self.opened = time.monotonic()
+
+
+class RecognizerPool:
+    """Wspólny model Vosk i pula rozpoznawaczy Kaldi - po jednej sesji na podłączonego klienta.
+
+    Klient przysyła 16-bitowy PCM mono (`sample_rate`) w kawałkach; `feed`
+    tylko dokłada je do kolejki sesji, a dekodowanie odbywa się w puli
+    `workers` wątków (Vosk zwalnia GIL w trakcie dekodowania). Bloki jednej
+    sesji dekodowane są po kolei, więc rozpoznawacz nigdy nie jest używany
+    równolegle. Gdy w kolejce sesji czeka więcej niż `max_pending_seconds`
+    nagrania, kolejne kawałki są odrzucane - klient dostaje to w potwierdzeniu
+    i zwalnia (backpressure). Zamknięte sesje oddają rozpoznawacz do puli.
+
+    Wyniki trafiają do `on_result(sid, rodzaj, tekst)`, rodzaj to "partial" albo "final".
+    """
+
+    def __init__(self, model_getter, sample_rate=16000, max_sessions=8, workers=4, max_pending_seconds=2.0,
+                 use_vad=True, on_result=None, recognizer_factory=None):
+        self._model_getter = model_getter
+        self.sample_rate = sample_rate
+        self.max_sessions = max_sessions
+        self.max_pending_bytes = int(max_pending_seconds * sample_rate * 2)
+        self.use_vad = use_vad
+        self.on_result = on_result
+        self._recognizer_factory = recognizer_factory or _kaldi_recognizer
+        self._sessions = {}
+        self._free = []  # rozpoznawacze do ponownego użycia
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stt-session")
+        self.opened_total = 0
+        self.rejected_total = 0
+
+    def open(self, sid, sample_rate=None):
+        """Otwórz (albo zacznij od nowa) sesję klienta; rzuca SessionRejected."""
+        if sample_rate is not None and sample_rate != self.sample_rate:
+            raise SessionRejected(f"Wymagany dźwięk {self.sample_rate} Hz, otrzymano {sample_rate} Hz.")
+        model = self._model_getter()
+        if model is None:
+            raise SessionRejected("Model rozpoznawania mowy nie jest jeszcze gotowy.")
+        self.close(sid, flush=False)
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                self.rejected_total += 1
+                raise SessionRejected(f"Osiągnięto limit {self.max_sessions} równoczesnych sesji mowy.")
+            # Miejsce zarezerwowane na czas tworzenia rozpoznawacza (poza blokadą, bo to trwa)
+            self._sessions[sid] = None
+            recognizer = self._free.pop() if self._free else None
+        try:
+            if recognizer is None:
+                recognizer = self._recognizer_factory(model, self.sample_rate)
+        except Exception:
+            with self._lock:
+                self._sessions.pop(sid, None)
+            raise
+        vad = VoiceActivityDetector(self.sample_rate) if self.use_vad else None
+        session = StreamSession(sid, recognizer, vad)
+        with self._lock:
+            self._sessions[sid] = session
+            self.opened_total += 1
+        return session
+
+    def feed(self, sid, data):
+        """Dołóż kawałek PCM do kolejki sesji; zwraca (przyjęto?, opóźnienie kolejki w ms)."""
+        data = bytes(data[:len(data) - len(data) % 2])
+        with self._lock:
+            session = self._sessions.get(sid)
+            if session is None or session.closing:
+                return False, 0
+            if session.pending_bytes + len(data) > self.max_pending_bytes:
+                session.dropped_chunks += 1
+                return False, self._lag_ms(session)
+            session.pending.append((time.monotonic(), data))
+            session.pending_bytes += len(data)
+            session.received_bytes += len(data)
+            lag = self._lag_ms(session)
+            schedule = not session.scheduled
+            session.scheduled = True
+        if schedule:
+            self._executor.submit(self._drain, session)
+        return True, lag
+
+    def close(self, sid, flush=True):
+        """Zakończ sesję; z `flush` reszta kolejki jest dekodowana i wysyłany jest wynik końcowy."""
+        with self._lock:
+            session = self._sessions.pop(sid, None)
+            if session is None:
+                return False  # brak sesji albo dopiero otwierana
+            session.closing = True
+            session.flush = flush
+            if not flush:
+                session.pending.clear()
+                session.pending_bytes = 0
+            schedule = not session.scheduled
+            session.scheduled = True
+        if schedule:
+            self._executor.submit(self._drain, session)
+        return True
+
+    def stats(self):
+        with self._lock:
+            sessions = [s for s in self._sessions.values() if s is not None]
+            free = len(self._free)
+        now = time.monotonic()
+        bytes_per_second = self.sample_rate * 2
+        return {
+            "sessions": len(sessions),
+            "max_sessions": self.max_sessions,
+            "free_recognizers": free,
+            "opened_total": self.opened_total,
+            "rejected_total": self.rejected_total,
+            "streams": [{
+                "sid": s.sid,
+                "seconds": round(now - s.opened, 1),
+                "audio_seconds": round(s.received_bytes / bytes_per_second, 1),
+                "queued_ms": self._lag_ms(s),
+                "max_lag_ms": round(s.max_lag * 1000),
+                "dropped_chunks": s.dropped_chunks,
+                # Ile sekund nagrania dekoduje się w sekundę pracy rozpoznawacza (>1 - szybciej niż czas rzeczywisty)
+                "speed": round(s.decoded_bytes / bytes_per_second / s.decode_seconds, 1) if s.decode_seconds else None
+            } for s in sessions]
+        }
+
+    def _lag_ms(self, session):
+        return round(session.pending_bytes / (self.sample_rate * 2) * 1000)
+
+    def _drain(self, session):
+        # Jedyny wątek obsługujący sesję w danej chwili (flaga `scheduled`)
+        while True:
+            with self._lock:
+                if not session.pending:
+                    if session.closing:
+                        break
+                    session.scheduled = False
+                    return
+                queued_at = session.pending[0][0]
+                data = b"".join(chunk for _, chunk in session.pending)
+                session.pending.clear()
+                session.pending_bytes = 0
+            session.max_lag = max(session.max_lag, time.monotonic() - queued_at)
+            try:
+                self._decode(session, data)
+            except Exception as e:
+                print(f"Błąd dekodowania sesji {session.sid}: {e}")
+        if session.flush:
+            try:
+                text = json.loads(session.recognizer.FinalResult()).get("text", "").strip().lower()
+                if text:
+                    self._emit(session.sid, "final", text)
+            except Exception as e:
+                print(f"Błąd wyniku końcowego sesji {session.sid}: {e}")
+        self._release(session)
+
+    def _decode(self, session, data):
+        start = time.perf_counter()
+        recognizer = session.recognizer
+        results = []
+        with metrics.span("browser_stt"):
+            blocks, ended = session.vad.process(data) if session.vad else ([data], False)
+            partial = None
+            for block in blocks:
+                if recognizer.AcceptWaveform(block):
+                    text = json.loads(recognizer.Result()).get("text", "").strip().lower()
+                    partial = None
+                    session.last_partial = ""
+                    if text:
+                        results.append(("final", text))
+                else:
+                    partial = json.loads(recognizer.PartialResult()).get("partial", "").strip().lower()
+            if ended:
+                # VAD wykrył koniec wypowiedzi wcześniej niż endpointer Kaldi
+                text = json.loads(recognizer.FinalResult()).get("text", "").strip().lower()
+                partial = None
+                session.last_partial = ""
+                if text:
+                    results.append(("final", text))
+            elif partial and partial != session.last_partial:
+                session.last_partial = partial
+                results.append(("partial", partial))
+        session.decode_seconds += time.perf_counter() - start
+        session.decoded_bytes += len(data)
+        for kind, text in results:
+            self._emit(session.sid, kind, text)
+
+    def _emit(self, sid, kind, text):
+        if self.on_result is not None:
+            try:
+                self.on_result(sid, kind, text)
+            except Exception as e:
+                print(f"Błąd przekazania wyniku sesji {sid}: {e}")
+
+    def _release(self, session):
+        session.closed = True
+        recognizer = session.recognizer
+        try:
+            recognizer.Reset()
+        except Exception:
+            self._discard(recognizer)  # rozpoznawacz w nieznanym stanie - nie wraca do puli
+            return
+        with self._lock:
+            if len(self._free) < self.max_sessions:
+                self._free.append(recognizer)
+                return
+        self._discard(recognizer)
+
+    @staticmethod
+    def _discard(recognizer):
+        # Zdalne rozpoznawacze (stt_workers) trzeba zwolnić w procesie roboczym
+        close = getattr(recognizer, "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception as e:
+                print(f"Błąd zwalniania rozpoznawacza: {e}")
+
+def _kaldi_recognizer(model, sample_rate):
+    from vosk import KaldiRecognizer
+    return KaldiRecognizer(model, sample_rate)
@@ -0,0 +1,422 @@
+# stt_workers.py
+import os
+import sys
+import json
+import time
+import queue
+import itertools
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from multiprocessing import shared_memory
+
+
+class WorkerCrashed(Exception):
+    """Proces dekodujący padł (albo się zawiesił) w trakcie wywołania - zostanie uruchomiony ponownie."""
+
+
+class _Worker:
+    """Stan jednego procesu dekodującego po stronie serwera WWW."""
+
+    def __init__(self, index, shm, slots):
+        self.index = index
+        self.shm = shm
+        self.process = None
+        self.requests = None
+        self.results = None
+        self.ready = threading.Event()
+        self.alive = False
+        self.started = False  # zgłosił gotowość od ostatniego uruchomienia; _fail_pending tego nie zeruje
+        self.generation = 0  # rośnie przy każdym restarcie - rozpoznawacze z poprzedniego procesu są stracone
+        self.restarts = 0
+        self.error = None
+        self.pending = {}  # id wywołania -> Future
+        self.recognizers = 0
+        self.calls = 0
+        self.busy_seconds = 0.0  # czas CPU dekodowania zgłoszony przez proces
+        self.lock = threading.Lock()
+        self.free_slots = list(range(slots))
+        self.slot_available = threading.Condition(self.lock)
+
+
+class SttWorkerPool:
+    """Dekodowanie Kaldi w osobnych procesach - poza GIL-em i CPU procesu serwera WWW.
+
+    Każdy z `workers` procesów ładuje model Vosk raz i trzyma rozpoznawacze
+    swoich sesji. Dźwięk nie jest serializowany: wywołujący wpisuje blok PCM
+    do wolnego slotu we wspólnej pamięci procesu, a kolejką idzie tylko
+    (id, rodzaj, rozpoznawacz, slot, długość). Odpowiedzi wracają kolejką
+    wyników, którą czyta wątek nadzorcy - ten sam wątek wykrywa śmierć
+    procesu, kończy oczekujące wywołania wyjątkiem WorkerCrashed i uruchamia
+    proces ponownie (z rosnącą przerwą, gdy pada zaraz po starcie).
+
+    `recognizer()` zwraca RemoteRecognizer o API KaldiRecognizer, więc
+    speech_to_text i RecognizerPool używają go bez zmian.
+    """
+
+    def __init__(self, model_path, workers=2, sample_rate=16000, slots=8, slot_seconds=2.0, call_timeout=10.0,
+                 nice=0, model_loader=None, recognizer_factory=None):
+        self.model_path = model_path
+        self.sample_rate = sample_rate
+        self.slot_bytes = int(slot_seconds * sample_rate) * 2
+        self.slots = slots
+        self.call_timeout = call_timeout
+        self.nice = nice
+        self._model_loader = model_loader or _vosk_model
+        self._recognizer_factory = recognizer_factory or _kaldi_recognizer
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = [_Worker(i, shared_memory.SharedMemory(create=True, size=slots * self.slot_bytes), slots)
+                         for i in range(workers)]
+        self._ids = itertools.count(1)
+        self._recognizer_ids = itertools.count(1)
+        self._supervisors = []
+        self._stopping = False
+
+    def start(self, timeout=120.0):
+        """Uruchom procesy i poczekaj, aż załadują model; rzuca RuntimeError, gdy żaden nie wystartował."""
+        for worker in self._workers:
+            self._spawn(worker)
+            thread = threading.Thread(target=self._supervise, args=(worker,), name=f"stt-worker-{worker.index}",
+                                      daemon=True)
+            thread.start()
+            self._supervisors.append(thread)
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.ready.wait(max(0.0, deadline - time.monotonic()))
+        if not any(worker.alive for worker in self._workers):
+            errors = "; ".join(sorted({w.error for w in self._workers if w.error})) or "przekroczono czas startu"
+            self.stop()
+            raise RuntimeError(f"Procesy STT nie wystartowały: {errors}")
+        return self
+
+    def stop(self):
+        self._stopping = True
+        for worker in self._workers:
+            if worker.requests is not None:
+                try:
+                    worker.requests.put(None)
+                except (OSError, ValueError):
+                    pass
+        for worker in self._workers:
+            if worker.process is not None:
+                worker.process.join(timeout=2)
+                if worker.process.is_alive():
+                    worker.process.kill()
+            self._fail_pending(worker, "pula STT zatrzymana")
+        for thread in self._supervisors:
+            thread.join(timeout=2)
+        for worker in self._workers:
+            worker.shm.close()
+            try:
+                worker.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def recognizer(self):
+        """Nowy zdalny rozpoznawacz na najmniej obciążonym żywym procesie."""
+        alive = [w for w in self._workers if w.alive] or self._workers
+        worker = min(alive, key=lambda w: w.recognizers)
+        with worker.lock:
+            worker.recognizers += 1
+        return RemoteRecognizer(self, worker, next(self._recognizer_ids))
+
+    def stats(self):
+        return {
+            "workers": [{
+                "index": w.index,
+                "pid": w.process.pid if w.process is not None else None,
+                "alive": w.alive,
+                "restarts": w.restarts,
+                "recognizers": w.recognizers,
+                "calls": w.calls,
+                "busy_seconds": round(w.busy_seconds, 2),
+                "error": w.error
+            } for w in self._workers],
+            "slot_bytes": self.slot_bytes,
+            "slots": self.slots
+        }
+
+    # --- Wywołania ---
+    def call(self, worker, kind, recognizer_id, data=None):
+        """Wyślij polecenie do procesu i poczekaj na wynik; dane audio idą przez slot wspólnej pamięci."""
+        slot = self._acquire_slot(worker) if data is not None else None
+        try:
+            payload = None
+            if slot is not None:
+                offset = slot * self.slot_bytes
+                worker.shm.buf[offset:offset + len(data)] = data
+                payload = (slot, len(data))
+            future = Future()
+            with worker.lock:
+                if not worker.alive:
+                    raise WorkerCrashed(f"Proces STT {worker.index} nie działa.")
+                call_id = next(self._ids)
+                worker.pending[call_id] = future
+                requests = worker.requests
+            requests.put((call_id, kind, recognizer_id, payload))
+            try:
+                return future.result(self.call_timeout)
+            except FutureTimeout:
+                # Zawieszony proces: nadzorca zobaczy jego śmierć i uruchomi nowy
+                print(f"Proces STT {worker.index} nie odpowiada - restart.")
+                worker.process.kill()
+                self._fail_pending(worker, f"proces STT {worker.index} nie odpowiada")
+                raise WorkerCrashed(f"Proces STT {worker.index} nie odpowiedział w {self.call_timeout} s.")
+        finally:
+            if slot is not None:
+                self._release_slot(worker, slot)
+
+    def _acquire_slot(self, worker):
+        with worker.slot_available:
+            while not worker.free_slots:
+                worker.slot_available.wait()
+            return worker.free_slots.pop()
+
+    def _release_slot(self, worker, slot):
+        with worker.slot_available:
+            worker.free_slots.append(slot)
+            worker.slot_available.notify()
+
+    # --- Procesy ---
+    def _spawn(self, worker):
+        worker.requests = self._context.Queue()
+        worker.results = self._context.Queue()
+        worker.ready.clear()
+        worker.started = False
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(worker.index, self.model_path, self.sample_rate, worker.shm.name, self.slot_bytes, self.nice,
+                  self._model_loader, self._recognizer_factory, worker.requests, worker.results),
+            name=f"nova-stt-{worker.index}",
+            daemon=True
+        )
+        with _without_main_module():
+            worker.process.start()
+
+    def _supervise(self, worker):
+        backoff = 1.0
+        while not self._stopping:
+            try:
+                message = worker.results.get(timeout=0.5)
+            except queue.Empty:
+                if worker.process.is_alive() or self._stopping:
+                    continue
+                message = ("exit", None, None)
+            except (OSError, EOFError):
+                message = ("exit", None, None)
+            call_id, ok, value = message
+            if call_id == "ready":
+                with worker.lock:
+                    worker.alive = True
+                    worker.started = True
+                    worker.error = None
+                worker.ready.set()
+                print(f"Proces STT {worker.index} gotowy (pid {worker.process.pid}).")
+                continue
+            if call_id == "error":
+                worker.error = value  # błąd startu (np. brak modelu); proces zaraz się zakończy
+                continue
+            if call_id == "exit":
+                if self._stopping:
+                    return
+                # Nie worker.alive - po zawieszeniu call() zeruje je, zanim nadzorca zobaczy koniec procesu
+                started = worker.started
+                worker.process.join(timeout=1)
+                print(f"Proces STT {worker.index} zakończył się (kod {worker.process.exitcode}).")
+                self._fail_pending(worker, f"proces STT {worker.index} zakończył się")
+                worker.ready.set()  # start() nie czeka na proces, który padł przy ładowaniu modelu
+                backoff = 1.0 if started else min(backoff * 2, 30.0)
+                time.sleep(backoff)
+                if self._stopping:
+                    return
+                worker.restarts += 1
+                self._spawn(worker)
+                continue
+            with worker.lock:
+                future = worker.pending.pop(call_id, None)
+                worker.calls += 1
+            if future is None:
+                continue  # odpowiedź na wywołanie, które już przekroczyło czas
+            if ok:
+                result, cpu_seconds = value
+                worker.busy_seconds += cpu_seconds
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(value))
+
+    def _fail_pending(self, worker, reason):
+        with worker.lock:
+            worker.alive = False
+            worker.generation += 1
+            pending, worker.pending = worker.pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(WorkerCrashed(reason))
+
+
+class RemoteRecognizer:
+    """Zamiennik KaldiRecognizer: to samo API, dekodowanie w procesie z SttWorkerPool.
+
+    AcceptWaveform to jedno wywołanie zwracające od razu wynik (albo wynik
+    częściowy), więc Result() i PartialResult() nie wymagają kolejnej rundy.
+    Po restarcie procesu rozpoznawacz jest tworzony od nowa (bieżąca
+    wypowiedź przepada), a blok, który trafił na awarię, wysyłany jest raz jeszcze.
+    `cpu_seconds` sumuje czas CPU dekodowania w procesie roboczym.
+    """
+
+    def __init__(self, pool, worker, recognizer_id):
+        self._pool = pool
+        self._worker = worker
+        self.id = recognizer_id
+        self._generation = None
+        self._result = json.dumps({"text": ""})
+        self._partial = json.dumps({"partial": ""})
+        self.cpu_seconds = 0.0
+        self.closed = False
+
+    def _request(self, kind, data=None):
+        for attempt in (1, 2):
+            generation = self._worker.generation
+            try:
+                if self._generation != generation:
+                    self._pool.call(self._worker, "open", self.id)
+                    self._generation = generation
+                return self._pool.call(self._worker, kind, self.id, data)
+            except WorkerCrashed:
+                if attempt == 2 or not self._wait_for_restart():
+                    raise
+
+    def _wait_for_restart(self):
+        # Nadzorca uruchamia proces ponownie po przerwie - czekamy najwyżej limit jednego wywołania
+        deadline = time.monotonic() + self._pool.call_timeout
+        while time.monotonic() < deadline and not self._pool._stopping:
+            if self._worker.alive:
+                return True
+            time.sleep(0.05)
+        return False
+
+    def AcceptWaveform(self, data):
+        data = bytes(data)
+        step = self._pool.slot_bytes
+        texts = []
+        for offset in range(0, len(data), step):
+            accepted, text, cpu_seconds = self._request("accept", data[offset:offset + step])
+            self.cpu_seconds += cpu_seconds
+            if accepted:
+                texts.append(text)
+                self._partial = json.dumps({"partial": ""})
+            else:
+                self._partial = text
+        if len(texts) == 1:
+            self._result = texts[0]
+        elif texts:
+            # Blok dłuższy niż slot trafił na kilka końców wypowiedzi - sklejamy je w jeden wynik
+            joined = " ".join(json.loads(t).get("text", "") for t in texts)
+            self._result = json.dumps({"text": " ".join(joined.split())})
+        return bool(texts)
+
+    def Result(self):
+        return self._result
+
+    def PartialResult(self):
+        return self._partial
+
+    def FinalResult(self):
+        return self._request("final")
+
+    def Reset(self):
+        self._request("reset")
+        self._partial = json.dumps({"partial": ""})
+
+    def close(self):
+        """Zwolnij rozpoznawacz w procesie roboczym (KaldiRecognizer nie ma odpowiednika)."""
+        if self.closed:
+            return
+        self.closed = True
+        with self._worker.lock:
+            self._worker.recognizers -= 1
+        if self._generation == self._worker.generation:
+            try:
+                self._pool.call(self._worker, "close", self.id)
+            except (WorkerCrashed, RuntimeError):
+                pass
+
+
+@contextmanager
+def _without_main_module():
+    # "spawn" wykonałby w każdym procesie roboczym cały skrypt startowy (app.py tworzy
+    # serwer, bazę i asystenta przy imporcie). Pracownik potrzebuje tylko tego modułu,
+    # więc na czas startu procesu ukrywamy ścieżkę __main__ przed multiprocessing.
+    main = sys.modules.get("__main__")
+    saved = {name: getattr(main, name) for name in ("__file__", "__spec__") if hasattr(main, name)}
+    try:
+        if "__file__" in saved:
+            del main.__file__
+        main.__spec__ = None
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(main, name, value)
+
+
+def _vosk_model(model_path):
+    from vosk import Model
+    return Model(model_path)
+
+
+def _kaldi_recognizer(model, sample_rate):
+    from vosk import KaldiRecognizer
+    return KaldiRecognizer(model, sample_rate)
+
+
+def _worker_main(index, model_path, sample_rate, shm_name, slot_bytes, nice, model_loader, recognizer_factory,
+                 requests, results):
+    """Pętla procesu dekodującego: model ładowany raz, rozpoznawacze po id, audio ze wspólnej pamięci."""
+    if nice:
+        os.nice(nice)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        model = model_loader(model_path)
+    except Exception as e:
+        results.put(("error", False, f"{type(e).__name__}: {e}"))
+        shm.close()
+        return
+    recognizers = {}
+    results.put(("ready", True, os.getpid()))
+    try:
+        while True:
+            message = requests.get()
+            if message is None:
+                break
+            call_id, kind, recognizer_id, payload = message
+            start = time.thread_time()
+            try:
+                if kind == "open":
+                    recognizers[recognizer_id] = recognizer_factory(model, sample_rate)
+                    result = None
+                elif kind == "close":
+                    recognizers.pop(recognizer_id, None)
+                    result = None
+                else:
+                    recognizer = recognizers[recognizer_id]
+                    if kind == "accept":
+                        slot, length = payload
+                        offset = slot * slot_bytes
+                        data = bytes(shm.buf[offset:offset + length])
+                        accepted = recognizer.AcceptWaveform(data)
+                        text = recognizer.Result() if accepted else recognizer.PartialResult()
+                        result = (accepted, text, time.thread_time() - start)
+                    elif kind == "final":
+                        result = recognizer.FinalResult()
+                    elif kind == "reset":
+                        recognizer.Reset()
+                        result = None
+                    else:
+                        raise ValueError(f"Nieznane polecenie: {kind}")
+                results.put((call_id, True, (result, time.thread_time() - start)))
+            except Exception as e:
+                results.put((call_id, False, f"{type(e).__name__}: {e}"))
+    finally:
+        recognizers.clear()
+        shm.close()
@@ -0,0 +1,122 @@
+# system_metrics.py
+import time
+import threading
+
+import numpy as np
+import psutil
+
+
+class SystemSampler:
+    """Jeden wątek próbkujący CPU, RAM, rdzenie, sieć i dysk do bufora pierścieniowego na tablicach NumPy.
+
+    Endpointy czytają ostatnią próbkę lub historię bez blokowania. `on_change`
+    wywoływane jest tylko wtedy, gdy CPU lub RAM zmieniły się co najmniej
+    o `threshold` punktów procentowych od ostatniego powiadomienia.
+    """
+
+    FIELDS = ("cpu", "ram", "net_sent", "net_recv", "disk_read", "disk_write")
+
+    def __init__(self, interval=1.0, capacity=3600, threshold=2.0, on_change=None):
+        self.interval = interval
+        self.capacity = capacity
+        self.threshold = threshold
+        self.on_change = on_change
+        self.cores = psutil.cpu_count() or 1
+        self._times = np.zeros(capacity, dtype=np.float64)
+        self._values = np.zeros((capacity, len(self.FIELDS)), dtype=np.float32)
+        self._per_core = np.zeros((capacity, self.cores), dtype=np.float32)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._last_pushed = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="system-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        # Pierwsze wywołanie cpu_percent(None) tylko ustawia punkt odniesienia
+        psutil.cpu_percent(interval=None, percpu=True)
+        net, disk, last = psutil.net_io_counters(), psutil.disk_io_counters(), time.monotonic()
+        while True:
+            time.sleep(self.interval)
+            now = time.monotonic()
+            elapsed = max(now - last, 1e-6)
+            per_core = psutil.cpu_percent(interval=None, percpu=True)
+            ram = psutil.virtual_memory().percent
+            new_net, new_disk = psutil.net_io_counters(), psutil.disk_io_counters()
+            row = [
+                sum(per_core) / len(per_core),
+                ram,
+                (new_net.bytes_sent - net.bytes_sent) / elapsed if net and new_net else 0.0,
+                (new_net.bytes_recv - net.bytes_recv) / elapsed if net and new_net else 0.0,
+                (new_disk.read_bytes - disk.read_bytes) / elapsed if disk and new_disk else 0.0,
+                (new_disk.write_bytes - disk.write_bytes) / elapsed if disk and new_disk else 0.0,
+            ]
+            net, disk, last = new_net, new_disk, now
+            self._append(time.time(), row, per_core)
+            self._maybe_notify()
+
+    def _append(self, timestamp, row, per_core):
+        with self._lock:
+            index = self._count % self.capacity
+            self._times[index] = timestamp
+            self._values[index] = row
+            self._per_core[index, :len(per_core)] = per_core[:self.cores]
+            self._count += 1
+
+    def _maybe_notify(self):
+        latest = self.latest()
+        if latest is None or self.on_change is None:
+            return
+        previous = self._last_pushed
+        if previous is not None and abs(latest["cpu"] - previous["cpu"]) < self.threshold \
+                and abs(latest["ram"] - previous["ram"]) < self.threshold:
+            return
+        self._last_pushed = latest
+        self.on_change(latest)
+
+    def latest(self):
+        """Ostatnia próbka jako słownik albo None, gdy jeszcze żadnej nie ma."""
+        with self._lock:
+            if self._count == 0:
+                return None
+            index = (self._count - 1) % self.capacity
+            values = self._values[index]
+            per_core = self._per_core[index]
+            timestamp = self._times[index]
+        result = {field: round(float(value), 1) for field, value in zip(self.FIELDS, values)}
+        result["per_core"] = [round(float(v), 1) for v in per_core]
+        result["timestamp"] = float(timestamp)
+        return result
+
+    def _ordered(self):
+        # Wywoływane z założoną blokadą; próbki od najstarszej do najnowszej (kopie)
+        size = min(self._count, self.capacity)
+        start = self._count - size
+        order = (np.arange(start, self._count) % self.capacity)
+        return self._times[order], self._values[order], self._per_core[order]
+
+    def history(self, window=300.0, points=60):
+        """Próbki z ostatnich `window` sekund uśrednione do co najwyżej `points` punktów."""
+        with self._lock:
+            times, values, per_core = self._ordered()
+        if len(times) == 0:
+            return {"timestamps": [], **{field: [] for field in self.FIELDS}, "per_core": []}
+        mask = times >= times[-1] - window
+        times, values, per_core = times[mask], values[mask], per_core[mask]
+        points = max(1, min(points, len(times)))
+        # Podział na `points` kubełków możliwie równej wielkości i średnia w każdym
+        edges = np.linspace(0, len(times), points + 1).astype(int)
+        starts = edges[:-1]
+        counts = np.diff(edges)
+        mean_values = np.add.reduceat(values, starts, axis=0) / counts[:, None]
+        mean_cores = np.add.reduceat(per_core, starts, axis=0) / counts[:, None]
+        bucket_times = np.add.reduceat(times, starts) / counts
+        result = {"timestamps": np.round(bucket_times, 3).tolist()}
+        for i, field in enumerate(self.FIELDS):
+            result[field] = np.round(mean_values[:, i], 1).tolist()
+        result["per_core"] = np.round(mean_cores, 1).tolist()
+        return result
@@ -0,0 +1,67 @@
+# test_audio_capture.py
+import time
+
+from audio_capture import AudioCapture
+from metrics import metrics
+
+
+class CountingSource:
+    """Bloki po 10 ms z numerem w pierwszym bajcie."""
+
+    def __init__(self):
+        self.index = 0
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def read(self, frames):
+        time.sleep(0.01)
+        self.index += 1
+        return bytes([self.index % 256]) + bytes(frames * 2 - 1), False
+
+
+def test_read_reports_capture_stage():
+    capture = AudioCapture(sample_rate=16000, blocksize=160, buffer_seconds=1.0, stream_factory=CountingSource())
+    before = metrics.stages().get("capture", {}).get("count", 0)
+    capture.start()
+    try:
+        cursor = capture.cursor()
+        received = []
+        for _ in range(5):
+            block, cursor = capture.read(cursor, timeout=1.0)
+            received.append(block[0])
+    finally:
+        capture.stop()
+    assert received == list(range(received[0], received[0] + 5))
+    stage = metrics.stages()["capture"]
+    assert stage["count"] == before + 5
+    # Odbiorca czekał na bloki - żaden nie leżał w buforze dłużej niż jeden blok
+    assert stage["last"] < 50
+
+
+def test_preroll_blocks_are_not_capture_latency():
+    capture = AudioCapture(sample_rate=16000, blocksize=160, buffer_seconds=1.0, stream_factory=CountingSource())
+    capture.start()
+    try:
+        time.sleep(0.3)  # bufor zbiera bloki, zanim odbiorca zacznie czytać
+        cursor = capture.cursor(preroll=0.2)
+        before = metrics.stages().get("capture", {}).get("count", 0)
+        preroll = capture._head - cursor
+        for _ in range(preroll):
+            block, cursor = capture.read(cursor, timeout=1.0)
+            assert block is not None
+        assert metrics.stages().get("capture", {}).get("count", 0) == before
+        # Blok, na który odbiorca czeka, nadal jest liczony
+        block, cursor = capture.read(capture.cursor(), timeout=1.0)
+    finally:
+        capture.stop()
+    stage = metrics.stages()["capture"]
+    assert preroll >= 10
+    assert stage["count"] == before + 1
+    assert stage["last"] < 50
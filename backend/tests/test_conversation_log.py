@@ -0,0 +1,48 @@
+# test_conversation_log.py
+from conversation_log import ConversationLog
+
+
+def filled_log(tmp_path, count, capacity=10):
+    log = ConversationLog(str(tmp_path), capacity=capacity, segment_size=5)
+    for i in range(count):
+        log.append("Użytkownik", f"wiadomość {i + 1}")
+    return log
+
+
+def seqs(entries):
+    return [entry["seq"] for entry in entries]
+
+
+def test_page_after_cursor_returns_increment(tmp_path):
+    log = filled_log(tmp_path, 8)
+    entries, more, gap = log.page(after=5, limit=2)
+    assert seqs(entries) == [6, 7] and more and not gap
+    entries, more, gap = log.page(after=8)
+    assert entries == [] and not more and not gap
+
+
+def test_cursor_older_than_retained_log_reports_gap(tmp_path):
+    log = filled_log(tmp_path, 25)  # zachowane tylko seq 16-25
+    entries, more, gap = log.page(after=3, limit=4)
+    assert gap
+    # Zamiast przyrostu od najstarszego zachowanego wpisu - najnowsze wpisy
+    assert seqs(entries) == [22, 23, 24, 25] and more
+    # Kursor tuż przed najstarszym zachowanym wpisem nie gubi niczego
+    entries, _, gap = log.page(after=15, limit=1)
+    assert seqs(entries) == [16] and not gap
+
+
+def test_cursor_from_the_future_reports_gap(tmp_path):
+    # Np. katalog logu wyczyszczony, a przeglądarka pamięta stary kursor
+    log = filled_log(tmp_path, 3)
+    entries, _, gap = log.page(after=40)
+    assert gap and seqs(entries) == [1, 2, 3]
+    _, _, gap = ConversationLog(str(tmp_path / "pusty")).page(after=7)
+    assert gap
+
+
+def test_no_cursor_is_not_a_gap(tmp_path):
+    log = filled_log(tmp_path, 25)
+    for kwargs in ({}, {"after": 0}, {"before": 20}):
+        _, _, gap = log.page(limit=3, **kwargs)
+        assert not gap
@@ -0,0 +1,41 @@
+# test_http_client.py
+import requests
+
+from http_client import HttpClient
+from metrics import metrics
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    """Zwraca kolejne statusy albo zgłasza podane wyjątki."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+
+    def request(self, method, url, timeout=None, **kwargs):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+
+def test_attempts_reach_stats_and_metrics():
+    client = HttpClient(backoff_base=0.0)
+    client._session = lambda url: FakeSession(requests.exceptions.ConnectionError("reset"), 200)
+    before = metrics.render()
+    assert client.get("test_endpoint", "https://example.invalid/").status_code == 200
+
+    stats = client.stats()["test_endpoint"]
+    assert stats["requests"] == 2
+    assert stats["errors"] == 1
+    rendered = metrics.render()
+    assert 'nova_http_client_duration_seconds_count{endpoint="test_endpoint"} 2' in rendered
+    assert 'nova_http_client_errors_total{endpoint="test_endpoint"} 1' in rendered
+    assert 'endpoint="test_endpoint"' not in before
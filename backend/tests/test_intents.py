@@ -0,0 +1,71 @@
+# test_intents.py
+import pytest
+
+from intents import build_default_router, city_nominative, extract_city
+
+END_WORDS = ["stop", "koniec", "zakończ", "wyjdź"]
+
+
+@pytest.fixture(scope="module")
+def router():
+    return build_default_router(END_WORDS)
+
+
+@pytest.mark.parametrize("text, city", [
+    ("jaka jest pogoda w krakowie", "Kraków"),
+    ("jaka jest pogoda w Warszawie", "Warszawa"),
+    ("czy jutro będzie padać deszcz w gdańsku", "Gdańsk"),
+    ("jaka będzie temperatura we wrocławiu", "Wrocław"),
+    ("jaka pogoda w łodzi", "Łódź"),
+    ("w poznaniu jest teraz słońce", "Poznań"),
+    ("jaki wiatr w szczecinie", "Szczecin"),
+    ("pogoda w katowicach na dziś", "Katowice"),
+    ("temperatura w białymstoku", "Białystok"),
+    ("pogoda w zielonej górze", "Zielona Góra"),
+    # Spoza słownika - końcówki miejscownika
+    ("pogoda w tarnowie", "Tarnów"),
+    ("pogoda w ostrawie", "Ostrawa"),
+    ("pogoda w koszalinie", "Koszalin"),
+    ("pogoda w elblągu", "Elbląg"),
+    ("pogoda w płocku", "Płock"),
+    ("pogoda w gliwicach", "Gliwice"),
+    ("pogoda w kołobrzegu", "Kołobrzeg"),
+])
+def test_city_is_returned_in_nominative(router, text, city):
+    match = router.match(text)
+    assert match.name == "weather"
+    assert match.slots["city"] == city
+
+
+@pytest.mark.parametrize("text", ["jaka jest pogoda", "jaka pogoda w tym tygodniu", "pogoda w ogóle"])
+def test_no_city(text):
+    assert extract_city(text) is None
+
+
+def test_nominative_input_is_kept():
+    assert city_nominative("kraków") == "kraków"
+    assert city_nominative("oslo") == "oslo"
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("wlacz komputer", "wake_computer"),
+    ("włącz komputer", "wake_computer"),
+    ("Włącz PC", "wake_computer"),
+    ("pokaz notatki", "notes_show"),
+    ("jaka jest wilgotnosc", "weather"),
+    ("jaka temperatura, proszę?", "weather"),
+    ("dobra, koniec.", "end"),
+    ("stopień trudności tego przepisu", None),
+    ("opowiedz żart", None),
+])
+def test_match_with_and_without_diacritics(router, text, intent):
+    match = router.match(text)
+    assert (match.name if match else None) == intent
+
+
+def test_longer_trigger_and_priority_win(router):
+    # "zapisz notatkę" ma pierwszeństwo przed pogodą wspomnianą w treści
+    match = router.match("zapisz notatkę że jutro pogoda będzie ładna")
+    assert match.name == "note_save"
+    assert match.slots["content"] == "że jutro pogoda będzie ładna"
+    assert router.match("znajdź notatkę o zakupach").slots["query"] == "zakupach"
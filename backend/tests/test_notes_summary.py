@@ -0,0 +1,29 @@
+# test_notes_summary.py
+from types import SimpleNamespace
+
+from assistant import VoiceAssistant
+from storage import Storage
+
+
+def summary(tmp_path, count, **kwargs):
+    storage = Storage(str(tmp_path / "nova.db"))
+    for i in range(1, count + 1):
+        storage.notes.insert({"id": i, "content": f"notatka {i}"})
+    owner = SimpleNamespace(storage=storage, notes_read_limit=5)
+    return VoiceAssistant.recent_notes_summary(owner, **kwargs)
+
+
+def test_no_notes(tmp_path):
+    assert summary(tmp_path, 0) == "Nie masz jeszcze żadnych notatek."
+
+
+def test_few_notes_are_read_in_full(tmp_path):
+    assert summary(tmp_path, 2) == "Oto Twoje notatki: notatka 1, notatka 2"
+
+
+def test_many_notes_read_only_newest(tmp_path):
+    text = summary(tmp_path, 20000, numbered=True)
+    assert text.startswith("Masz 20000 notatek. Oto 5 najnowszych: Notatka 1: notatka 19996.")
+    assert "notatka 20000." in text and "notatka 19995" not in text
+    assert "znajdź notatkę o" in text
+    assert len(text) < 400
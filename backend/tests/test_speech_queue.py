@@ -0,0 +1,53 @@
+# test_speech_queue.py
+import threading
+
+from speech_queue import SpeechQueue, PRIORITY_CONVERSATION
+
+
+class GatedPlayer:
+    """Odtwarzanie czekające na zwolnienie bramki; zapisuje odtworzone teksty."""
+
+    def __init__(self):
+        self.played = []
+        self.gate = threading.Event()
+
+    def __call__(self, text, interrupt_event, audio):
+        self.played.append(text)
+        self.gate.wait(5)
+        return True
+
+
+def test_cancelled_item_is_skipped_and_queue_keeps_working():
+    player = GatedPlayer()
+    busy = []
+    queue = SpeechQueue(player, on_busy=busy.append)
+    first = queue.say("a")
+    cancelled = queue.say("b")
+    assert cancelled.cancel()
+    player.gate.set()
+    last = queue.say("c", PRIORITY_CONVERSATION)
+    assert first.result(timeout=5) is True
+    assert last.result(timeout=5) is True
+    assert player.played == ["a", "c"]
+    assert queue._thread.is_alive()
+    # Kolejka pusta - mikrofon znów otwarty
+    for _ in range(100):
+        if not queue.busy:
+            break
+        threading.Event().wait(0.01)
+    assert busy[-1] is False
+
+
+def test_interrupt_clear_tolerates_cancelled_futures():
+    player = GatedPlayer()
+    queue = SpeechQueue(player)
+    playing = queue.say("a")
+    waiting = queue.say("b")
+    cancelled = queue.say("c")
+    cancelled.cancel()
+    queue.interrupt(clear=True)
+    player.gate.set()
+    assert waiting.result(timeout=5) is False
+    playing.result(timeout=5)
+    assert queue.say("d").result(timeout=5) is True
+    assert "c" not in player.played
@@ -0,0 +1,124 @@
+# test_speech_to_text.py
+"""Równoczesne nasłuchiwania (główna pętla i notatka głosowa) czytają bufor własnymi kursorami i VAD."""
+import json
+import time
+import threading
+
+import numpy as np
+import pytest
+
+SAMPLE_RATE = 16000
+BLOCKSIZE = 8000
+
+
+class TaggedSource:
+    """Źródło audio: bloki po 0,5 s - dwa z tonem (mowa), jeden cichy; pierwsza próbka to numer bloku."""
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.index = 0
+        t = np.arange(BLOCKSIZE) / SAMPLE_RATE
+        self.tone = (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16)
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def read(self, frames):
+        time.sleep(self.interval)
+        block = self.tone.copy() if self.index % 3 < 2 else np.zeros(frames, dtype=np.int16)
+        block[0] = self.index
+        self.index += 1
+        return block.tobytes(), False
+
+
+class RecordingRecognizer:
+    """Zamiast Kaldi: zapamiętuje numery bloków, a wynik końcowy to ich lista."""
+
+    def __init__(self):
+        self.blocks = []
+
+    def AcceptWaveform(self, data):
+        self.blocks.append(int(np.frombuffer(data, dtype=np.int16)[0]))
+        return False
+
+    def PartialResult(self):
+        return json.dumps({"partial": ""})
+
+    def Result(self):
+        return self.FinalResult()
+
+    def FinalResult(self):
+        text = " ".join(str(block) for block in self.blocks)
+        self.blocks = []
+        return json.dumps({"text": text})
+
+
+@pytest.fixture
+def assistant(tmp_path, monkeypatch):
+    monkeypatch.setenv("TTS_CACHE_DIR", str(tmp_path / "tts"))
+    monkeypatch.setenv("VAD_ENABLED", "1")
+    monkeypatch.setenv("VAD_PREROLL_BLOCKS", "0")
+    from assistant import VoiceAssistant
+    from storage import Storage
+    voice = VoiceAssistant(None, storage=Storage(str(tmp_path / "nova.db")), audio_source=TaggedSource())
+    voice.model_vosk = object()
+    voice.new_recognizer = RecordingRecognizer
+    yield voice
+    voice.stop_capture()
+
+
+def utterance(text):
+    blocks = [int(block) for block in text.split()]
+    assert blocks, "pusta wypowiedź"
+    return blocks
+
+
+def test_concurrent_readers_keep_their_own_cursor_and_vad(assistant):
+    assistant.start_capture()
+    time.sleep(0.2)
+    results = {}
+
+    def listen(name, persist):
+        results[name] = [assistant.speech_to_text(timeout=5, preroll=0, persist_cursor=persist) for _ in range(3)]
+
+    readers = [threading.Thread(target=listen, args=("main", True)),
+               threading.Thread(target=listen, args=("note", False))]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join(timeout=10)
+
+    for name in ("main", "note"):
+        blocks = [utterance(text) for text in results[name]]
+        for first, second in zip(blocks, blocks[1:]):
+            # Kolejna wypowiedź zaczyna się od bloku po poprzedniej - nic nie zgubiono ani nie powtórzono
+            assert second[0] == first[-1] + 1, (name, blocks)
+        for spoken in blocks:
+            # Dwa bloki z tonem i kończąca cisza: drugi odbiorca nie przerwał ani nie zresetował wypowiedzi
+            assert spoken[0] % 3 == 0 and spoken == list(range(spoken[0], spoken[0] + 3)), (name, blocks)
+
+
+def test_only_persistent_reader_saves_cursor(assistant):
+    assistant.start_capture()
+    time.sleep(0.1)
+    assert utterance(assistant.speech_to_text(timeout=5, preroll=0))
+    assert assistant._stt_cursor is None
+    assert utterance(assistant.speech_to_text(timeout=5, preroll=0, persist_cursor=True))
+    assert assistant._stt_cursor is not None
+
+
+def test_vad_stats_are_kept_per_consumer(assistant):
+    assistant.start_capture()
+    time.sleep(0.1)
+    assert utterance(assistant.speech_to_text(timeout=5, preroll=0, persist_cursor=True))
+    assert utterance(assistant.speech_to_text(timeout=5, preroll=0, consumer="note"))
+    assert utterance(assistant.speech_to_text(timeout=5, preroll=0, consumer="note"))
+    assert set(assistant.stt_vads) == {"command", "note"}
+    assert assistant.stt_vad("command").stats()["utterances"] == 1
+    assert assistant.stt_vad("note").stats()["utterances"] == 2
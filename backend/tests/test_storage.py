@@ -0,0 +1,55 @@
+# test_storage.py
+import json
+
+import pytest
+
+from storage import Storage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return Storage(str(tmp_path / "nova.db"))
+
+
+def write_json(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+def test_settings_import(storage, tmp_path):
+    path = write_json(tmp_path / "settings.json", {"city": "Kraków", "mac": "aa:bb"})
+    assert storage.settings.import_json(path) == 2
+    assert storage.settings.get_all() == {"city": "Kraków", "mac": "aa:bb"}
+    assert storage.get_meta("imported:settings") == path
+    # Drugi start nie nadpisuje ustawień zmienionych od czasu importu
+    storage.settings.replace_all({"city": "Gdańsk"})
+    assert storage.settings.import_json(path) == 0
+    assert storage.settings.get_all() == {"city": "Gdańsk"}
+
+
+@pytest.mark.parametrize("data", [["city", "Kraków"], "Kraków", None])
+def test_settings_import_rejects_non_object(storage, tmp_path, data):
+    path = write_json(tmp_path / "settings.json", data)
+    assert storage.settings.import_json(path) == 0
+    assert storage.settings.get_all() == {}
+
+
+def test_settings_import_is_atomic(storage, tmp_path, monkeypatch):
+    storage.settings.replace_all({"city": "Gdańsk"})
+    path = write_json(tmp_path / "settings.json", {"city": "Kraków"})
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("awaria w trakcie importu")
+
+    monkeypatch.setattr(storage, "set_meta", fail)
+    with pytest.raises(RuntimeError):
+        storage.settings.import_json(path)
+    assert storage.settings.get_all() == {"city": "Gdańsk"}
+    assert storage.get_meta("imported:settings") is None
+
+
+def test_latest_returns_newest_in_insertion_order(storage):
+    for i in range(1, 8):
+        storage.notes.insert({"id": i, "content": f"notatka {i}"})
+    assert [note["id"] for note in storage.notes.latest(3)] == [5, 6, 7]
+    assert len(storage.notes.latest(50)) == 7
@@ -0,0 +1,56 @@
+# test_stt_workers.py
+import time
+
+import pytest
+
+from stt_workers import SttWorkerPool, WorkerCrashed
+
+
+class HangingRecognizer:
+    """Blok zaczynający się od b"H" zawiesza proces roboczy."""
+
+    def AcceptWaveform(self, data):
+        if data.startswith(b"H"):
+            time.sleep(60)
+        return False
+
+    def Result(self):
+        return '{"text": ""}'
+
+    def PartialResult(self):
+        return '{"partial": ""}'
+
+
+def fake_model(model_path):
+    return None
+
+
+def hanging_recognizer(model, sample_rate):
+    return HangingRecognizer()
+
+
+def wait_alive(worker, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if worker.alive:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_hung_worker_restarts_without_growing_backoff():
+    pool = SttWorkerPool(None, workers=1, slots=1, slot_seconds=0.1, call_timeout=1.0,
+                         model_loader=fake_model, recognizer_factory=hanging_recognizer).start(timeout=30)
+    worker = pool._workers[0]
+    try:
+        for restart in (1, 2, 3):
+            pool.call(worker, "open", restart)
+            with pytest.raises(WorkerCrashed):
+                pool.call(worker, "accept", restart, b"H" + bytes(99))
+            # Proces był gotowy przed zawieszeniem - przerwa przed restartem to zawsze 1 s, nie 2, 4, 8 s
+            assert wait_alive(worker, 3.5)
+            assert worker.restarts == restart
+        pool.call(worker, "open", 4)
+        assert pool.call(worker, "accept", 4, bytes(100))[0] is False
+    finally:
+        pool.stop()
@@ -0,0 +1,47 @@
+# test_tts_cache.py
+import os
+
+from tts_cache import TTSCache
+
+AUDIO = b"\x01\x00" * 1000
+
+
+def disk_files(cache):
+    return sorted(name for name in os.listdir(cache.cache_dir) if name.endswith(".pcm"))
+
+
+def test_one_off_text_stays_in_memory(tmp_path):
+    cache = TTSCache(str(tmp_path), disk_min_uses=2)
+    assert cache.get("odpowiedz") is None
+    cache.put("odpowiedz", AUDIO)
+    assert disk_files(cache) == []
+    assert cache.stats()["memory_entries"] == 1
+
+
+def test_text_reaches_disk_after_repeated_use(tmp_path):
+    cache = TTSCache(str(tmp_path), disk_min_uses=3)
+    assert cache.get("kwestia") is None
+    cache.put("kwestia", AUDIO)
+    assert cache.get("kwestia") == AUDIO  # drugie użycie - wciąż tylko pamięć
+    assert disk_files(cache) == []
+    assert cache.get("kwestia") == AUDIO  # trzecie - zapis na dysk
+    assert disk_files(cache) == ["kwestia.pcm"]
+    # Po restarcie nagranie jest dostępne z dysku
+    assert TTSCache(str(tmp_path)).get("kwestia") == AUDIO
+
+
+def test_repeated_miss_after_memory_eviction_persists(tmp_path):
+    cache = TTSCache(str(tmp_path), memory_limit_bytes=len(AUDIO), disk_min_uses=2)
+    cache.get("a")
+    cache.put("a", AUDIO)
+    cache.get("b")
+    cache.put("b", AUDIO)  # wypycha "a" z pamięci
+    assert cache.get("a") is None  # drugie użycie "a"
+    cache.put("a", AUDIO)
+    assert disk_files(cache) == ["a.pcm"]
+
+
+def test_fixed_phrase_is_persisted_immediately(tmp_path):
+    cache = TTSCache(str(tmp_path), disk_min_uses=5)
+    cache.put("slucham", AUDIO, persist=True)
+    assert disk_files(cache) == ["slucham.pcm"]
@@ -0,0 +1,46 @@
+# test_vad.py
+import numpy as np
+import pytest
+
+from vad import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+
+
+def tone(seconds, amplitude=8000):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * 220 * t) * amplitude).astype(np.int16).tobytes()
+
+
+def silence(seconds):
+    return bytes(int(seconds * SAMPLE_RATE) * 2)
+
+
+@pytest.mark.parametrize("size", [0, 1, 200, 639, 641])
+def test_short_and_odd_blocks_do_not_fail(size):
+    vad = VoiceActivityDetector(preroll_blocks=1)
+    blocks, ended = vad.process(b"\x00" * size)
+    assert not ended
+    assert blocks == []
+    assert vad.stats()["blocks"] == 1
+
+
+def test_sub_frame_remainder_is_carried_over():
+    vad = VoiceActivityDetector(preroll_blocks=0)
+    vad.process(silence(0.5))
+    speech = tone(0.3)
+    # Kawałki po 101 bajtów: żaden nie mieści pełnej ramki ani parzystej liczby bajtów
+    passed = []
+    for start in range(0, len(speech), 101):
+        blocks, _ = vad.process(speech[start:start + 101])
+        passed.extend(blocks)
+    assert vad.in_speech
+    assert passed, "mowa w krótkich kawałkach nie została wykryta"
+
+
+def test_utterance_ends_after_hangover_with_browser_sized_chunks():
+    vad = VoiceActivityDetector(preroll_blocks=1, hangover_ms=200)
+    chunks = [silence(0.1)] * 5 + [tone(0.1)] * 5 + [silence(0.1)] * 5
+    ended = [vad.process(chunk)[1] for chunk in chunks]
+    assert ended.count(True) == 1
+    assert vad.stats()["utterances"] == 1
@@ -0,0 +1,170 @@
+# tts_cache.py
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class TTSCache:
+    """Dwupoziomowy cache nagrań TTS: LRU w pamięci + katalog na dysku z limitem rozmiaru.
+
+    Klucz to skrót SHA-256 z (tekst, głos, model, ustawienia głosu, format),
+    więc zmiana głosu lub ustawień nigdy nie odtworzy starego nagrania.
+
+    Na dysk trafiają stałe kwestie (`put(..., persist=True)`) oraz teksty
+    użyte co najmniej `disk_min_uses` razy; jednorazowe odpowiedzi zostają
+    tylko w pamięci i nie wypychają z dysku kwestii, które się powtarzają.
+    """
+
+    # Ile kluczy spoza dysku pamiętać do liczenia użyć (najdawniejsze wypadają)
+    MAX_TRACKED_USES = 4096
+
+    def __init__(self, cache_dir, memory_limit_bytes=8 * 1024 * 1024, disk_limit_bytes=50 * 1024 * 1024,
+                 disk_min_uses=2):
+        self.cache_dir = cache_dir
+        self.memory_limit_bytes = memory_limit_bytes
+        self.disk_limit_bytes = disk_limit_bytes
+        self.disk_min_uses = disk_min_uses
+        self._uses = OrderedDict()  # klucz spoza dysku -> liczba zapytań
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_index = {}  # klucz -> (rozmiar, czas ostatniego użycia)
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._scan_disk()
+        except OSError as e:
+            print(f"Błąd inicjalizacji cache TTS: {e}")
+
+    @staticmethod
+    def make_key(text, voice_id, model_id, voice_settings, output_format):
+        raw = json.dumps([text, voice_id, model_id, voice_settings, output_format],
+                         sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pcm")
+
+    def _scan_disk(self):
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".pcm"):
+                continue
+            st = os.stat(os.path.join(self.cache_dir, name))
+            self._disk_index[name[:-4]] = (st.st_size, st.st_mtime)
+            self._disk_bytes += st.st_size
+
+    def get(self, key):
+        """Zwróć nagranie (bytes) albo None; częste teksty z pamięci zapisuje na dysk."""
+        with self._lock:
+            on_disk = key in self._disk_index
+            uses = 0 if on_disk else self._count_use(key)
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+            elif not on_disk:
+                self.misses += 1
+                return None
+        if audio is not None:
+            if not on_disk and uses >= self.disk_min_uses:
+                self._write_disk(key, audio)
+            return audio
+        try:
+            with open(self._path(key), "rb") as f:
+                audio = f.read()
+            os.utime(self._path(key))
+        except OSError:
+            with self._lock:
+                self._forget_disk(key)
+                self.misses += 1
+            return None
+        with self._lock:
+            if key in self._disk_index:
+                self._disk_index[key] = (len(audio), os.path.getmtime(self._path(key)))
+            self._remember(key, audio)
+            self.hits += 1
+        return audio
+
+    def put(self, key, audio, persist=False):
+        """Zapisz nagranie w pamięci, a na dysku - stałą kwestię albo tekst używany co najmniej disk_min_uses razy."""
+        if not audio:
+            return
+        with self._lock:
+            self._remember(key, audio)
+            persist = persist or self._uses.get(key, 0) >= self.disk_min_uses
+        if persist:
+            self._write_disk(key, audio)
+
+    def _write_disk(self, key, audio):
+        """Zapisz nagranie na dysku, usuwając najdawniej używane wpisy ponad limit."""
+        tmp_path = self._path(key) + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Błąd zapisu cache TTS: {e}")
+            return
+        with self._lock:
+            self._forget_disk(key)
+            self._disk_index[key] = (len(audio), os.path.getmtime(self._path(key)))
+            self._disk_bytes += len(audio)
+            self._uses.pop(key, None)
+            self._evict_disk()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._memory or key in self._disk_index
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk_index),
+                "disk_bytes": self._disk_bytes
+            }
+
+    # Metody poniżej wywoływane są z założoną blokadą
+    def _count_use(self, key):
+        uses = self._uses.pop(key, 0) + 1
+        self._uses[key] = uses
+        if len(self._uses) > self.MAX_TRACKED_USES:
+            self._uses.popitem(last=False)
+        return uses
+
+    def _remember(self, key, audio):
+        if len(audio) > self.memory_limit_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.memory_limit_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _forget_disk(self, key):
+        entry = self._disk_index.pop(key, None)
+        if entry is not None:
+            self._disk_bytes -= entry[0]
+
+    def _evict_disk(self):
+        if self._disk_bytes <= self.disk_limit_bytes:
+            return
+        for key, _ in sorted(self._disk_index.items(), key=lambda item: item[1][1]):
+            if self._disk_bytes <= self.disk_limit_bytes:
+                break
+            self._forget_disk(key)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
@@ -0,0 +1,168 @@
+# vad.py
+import time
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class VoiceActivityDetector:
+    """Bramka detekcji mowy (VAD) przed rozpoznawaczem Kaldi.
+
+    Każdy blok int16 dzielony jest na ramki `frame_ms`; energia (dBFS)
+    i liczba przejść przez zero liczone są wektorowo w NumPy. Ramka jest
+    mową, gdy energia przekracza adaptacyjny poziom szumu o `threshold_db`
+    i nie wygląda na szum szerokopasmowy (wysoki ZCR przy niskiej energii).
+
+    `process(blok)` zwraca (bloki_dla_rozpoznawacza, koniec_wypowiedzi).
+    Cisza nie trafia do rozpoznawacza; na początku wypowiedzi dokładane są
+    `preroll_blocks` wcześniejsze bloki, a koniec zgłaszany jest po
+    `hangover_ms` ciszy - zwykle wcześniej niż własny endpointer Kaldi.
+    Bloki nie muszą być wielokrotnością ramki: niepełna ramka (także
+    nieparzysty bajt) przechodzi do następnego wywołania.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=20, threshold_db=9.0, hangover_ms=400,
+                 preroll_blocks=1, min_speech_ms=60, zcr_max=0.35, floor_db=-70.0):
+        self.sample_rate = sample_rate
+        self.frame_len = int(sample_rate * frame_ms / 1000)
+        self.frame_ms = frame_ms
+        self.threshold_db = threshold_db
+        self.hangover_ms = hangover_ms
+        self.min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+        self.zcr_max = zcr_max
+        self.floor_db = floor_db
+        self.noise_db = None  # adaptacyjny poziom szumu tła
+        self._preroll = deque(maxlen=preroll_blocks)
+        self._pending = b""  # bajty niepełnej ramki z poprzedniego bloku
+        self._speech_streak = 0  # ramki mowy kończące poprzedni blok - krótkie bloki sumują się
+        self._in_speech = False
+        self._silence_ms = 0.0
+        self._lock = threading.Lock()
+        self.blocks = 0
+        self.passed = 0
+        self.utterances = 0
+        self._vad_seconds = 0.0
+        self._recognizer_seconds = 0.0
+        self._recognizer_blocks = 0
+        self._block_seconds = 0.0
+
+    @property
+    def in_speech(self):
+        return self._in_speech
+
+    def reset(self):
+        """Zapomnij bieżący segment (poziom szumu zostaje)."""
+        self._preroll.clear()
+        self._pending = b""
+        self._speech_streak = 0
+        self._in_speech = False
+        self._silence_ms = 0.0
+
+    def _frame_features(self, samples):
+        frames = samples.reshape(-1, self.frame_len)
+        frames = frames.astype(np.float32) / 32768.0
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame_len
+        return energy_db, zcr
+
+    def _speech_frames(self, energy_db, zcr):
+        quiet = float(np.percentile(energy_db, 10))
+        if self.noise_db is None:
+            self.noise_db = max(quiet, self.floor_db)
+        threshold = self.noise_db + self.threshold_db
+        speech = (energy_db > threshold) & ((zcr < self.zcr_max) | (energy_db > threshold + self.threshold_db))
+        # Poziom szumu: szybko w dół, powoli w górę (żeby długa mowa go nie podniosła)
+        rate = 0.5 if quiet < self.noise_db else (0.05 if not speech.any() else 0.01)
+        self.noise_db = max(self.floor_db, self.noise_db + rate * (quiet - self.noise_db))
+        return speech
+
+    def process(self, data):
+        cpu_start = time.thread_time()
+        buffered = self._pending + bytes(data) if self._pending else data
+        whole = len(buffered) // (2 * self.frame_len) * (2 * self.frame_len)
+        self._pending = bytes(buffered[whole:])
+        block_ms = len(data) / 2 * 1000.0 / self.sample_rate
+        if whole:
+            samples = np.frombuffer(buffered, dtype=np.int16, count=whole // 2)
+            speech = self._speech_frames(*self._frame_features(samples))
+            speech_frames = np.count_nonzero(speech)
+            carried = self._speech_streak if speech[0] else 0
+            has_speech = speech_frames + carried >= self.min_speech_frames
+            silent = np.flatnonzero(~speech)
+            self._speech_streak = carried + len(speech) if not len(silent) else len(speech) - 1 - int(silent[-1])
+        else:
+            # Krócej niż jedna ramka - bez oceny; blok idzie dalej jak w bieżącym stanie
+            speech, has_speech = None, False
+
+        out, ended = [], False
+        if has_speech:
+            last = int(np.flatnonzero(speech)[-1])
+            trailing_ms = (len(speech) - 1 - last) * self.frame_ms
+            if not self._in_speech:
+                out.extend(self._preroll)
+                self._preroll.clear()
+                self._in_speech = True
+            self._silence_ms = trailing_ms
+        elif self._in_speech and speech is not None:
+            self._silence_ms += block_ms
+        if self._in_speech:
+            out.append(data)
+            if self._silence_ms >= self.hangover_ms:
+                self._in_speech = False
+                self._silence_ms = 0.0
+                ended = True
+        else:
+            self._preroll.append(data)
+
+        with self._lock:
+            self.blocks += 1
+            self.passed += len(out)
+            self.utterances += ended
+            self._block_seconds = block_ms / 1000.0
+            self._vad_seconds += time.thread_time() - cpu_start
+        return out, ended
+
+    def absorb(self, other):
+        """Dolicz liczniki innego detektora (zakończonego nasłuchiwania) - do łącznych statystyk."""
+        with other._lock:
+            counters = (other.blocks, other.passed, other.utterances, other._vad_seconds,
+                        other._recognizer_seconds, other._recognizer_blocks, other._block_seconds)
+        with self._lock:
+            self.blocks += counters[0]
+            self.passed += counters[1]
+            self.utterances += counters[2]
+            self._vad_seconds += counters[3]
+            self._recognizer_seconds += counters[4]
+            self._recognizer_blocks += counters[5]
+            self._block_seconds = counters[6] or self._block_seconds
+            if other.noise_db is not None:
+                self.noise_db = other.noise_db
+
+    def account(self, cpu_seconds, blocks=1):
+        """Zapisz koszt CPU rozpoznawacza - do szacowania oszczędności."""
+        with self._lock:
+            self._recognizer_seconds += cpu_seconds
+            self._recognizer_blocks += blocks
+
+    def stats(self):
+        with self._lock:
+            skipped = max(0, self.blocks - self.passed)
+            vad_per_block = self._vad_seconds / self.blocks if self.blocks else 0.0
+            recognizer_per_block = (self._recognizer_seconds / self._recognizer_blocks
+                                    if self._recognizer_blocks else 0.0)
+            blocks_per_hour = 3600.0 / self._block_seconds if self._block_seconds else 0.0
+            return {
+                "blocks": self.blocks,
+                "passed_blocks": self.passed,
+                "skipped_blocks": skipped,
+                "utterances": self.utterances,
+                "noise_db": round(self.noise_db, 1) if self.noise_db is not None else None,
+                "vad_ms_per_block": round(vad_per_block * 1000, 3),
+                "recognizer_ms_per_block": round(recognizer_per_block * 1000, 3),
+                "cpu_saved_seconds": round(skipped * recognizer_per_block - self._vad_seconds, 2),
+                # Cała godzina ciszy: żaden blok nie trafia do rozpoznawacza
+                "cpu_saved_per_idle_hour": round((recognizer_per_block - vad_per_block) * blocks_per_hour, 1),
+                "hangover_ms": self.hangover_ms
+            }
@@ -0,0 +1,119 @@
+# wake_word.py
+import json
+import time
+import threading
+
+from metrics import metrics
+
+
+class WakeWordDetector:
+    """Tani detektor słowa aktywującego oparty o gramatykę Vosk.
+
+    Rozpoznawacz ma słownik ograniczony do słów aktywujących i "[unk]",
+    więc dekodowanie jest dużo lżejsze niż pełny model językowy. Decyzja
+    zapada już na wynikach częściowych (PartialResult) - pełny
+    rozpoznawacz uruchamiany jest dopiero po trafieniu. Z bramką `vad`
+    rozpoznawacz nie dostaje bloków ciszy, a koniec wypowiedzi wymusza
+    wynik końcowy bez czekania na endpointer Kaldi.
+    """
+
+    def __init__(self, model, sample_rate, wake_words, manual_window=5.0, vad=None):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.wake_words = [w.strip().lower() for w in wake_words if w.strip()]
+        self.grammar = json.dumps(self.wake_words + ["[unk]"], ensure_ascii=False)
+        self.manual_window = manual_window
+        self.vad = vad
+        self._recognizer = None
+        self._lock = threading.Lock()
+        self._last_unknown_speech = 0.0
+        self._cpu_seconds = 0.0
+        self._wall_seconds = 0.0
+        self.detections = 0
+        self.false_accepts = 0
+        self.false_rejects = 0
+
+    def _new_recognizer(self):
+        from vosk import KaldiRecognizer
+        return KaldiRecognizer(self.model, self.sample_rate, self.grammar)
+
+    def _match(self, text):
+        return next((w for w in self.wake_words if w in text), None)
+
+    def _check(self, text):
+        word = self._match(text)
+        if not word and text.replace("[unk]", "").strip() == "" and "[unk]" in text:
+            # Ktoś mówił, ale nie było to słowo aktywujące
+            self._last_unknown_speech = time.monotonic()
+        return word or ""
+
+    def listen(self, capture, cursor, timeout=10):
+        """Czytaj z bufora od `cursor` do wykrycia słowa aktywującego.
+
+        Zwraca (słowo_lub_"", nowy_kursor).
+        """
+        if self._recognizer is None:
+            self._recognizer = self._new_recognizer()
+        recognizer = self._recognizer
+        wall_start = time.monotonic()
+        cpu_start = time.thread_time()
+        matched = ""
+        try:
+            while time.monotonic() - wall_start < timeout:
+                data, cursor = capture.read(cursor, timeout=0.5)
+                if data is None:
+                    continue
+                with metrics.span("vad"):
+                    blocks, ended = self.vad.process(data) if self.vad else ([data], False)
+                for block in blocks:
+                    block_start = time.thread_time()
+                    with metrics.span("wake_block"):
+                        if recognizer.AcceptWaveform(block):
+                            text = json.loads(recognizer.Result()).get("text", "")
+                        else:
+                            text = json.loads(recognizer.PartialResult()).get("partial", "")
+                    if self.vad:
+                        self.vad.account(time.thread_time() - block_start)
+                    matched = self._check(text)
+                    if matched:
+                        break
+                if not matched and ended:
+                    matched = self._check(json.loads(recognizer.FinalResult()).get("text", ""))
+                if matched:
+                    recognizer.Reset()
+                    if self.vad:
+                        self.vad.reset()
+                    break
+        finally:
+            with self._lock:
+                self._cpu_seconds += time.thread_time() - cpu_start
+                self._wall_seconds += time.monotonic() - wall_start
+                if matched:
+                    self.detections += 1
+        return matched, cursor
+
+    def report_session(self, had_command):
+        """Aktywacja bez żadnej rozpoznanej komendy liczona jest jako fałszywa akceptacja."""
+        if not had_command:
+            with self._lock:
+                self.false_accepts += 1
+
+    def report_manual_activation(self):
+        """Ręczne włączenie nasłuchiwania tuż po niezrozumianej mowie to prawdopodobnie fałszywe odrzucenie."""
+        with self._lock:
+            if time.monotonic() - self._last_unknown_speech < self.manual_window:
+                self.false_rejects += 1
+
+    def stats(self):
+        with self._lock:
+            cpu_percent = (self._cpu_seconds / self._wall_seconds * 100) if self._wall_seconds else 0.0
+            return {
+                "wake_words": self.wake_words,
+                "detections": self.detections,
+                "false_accepts": self.false_accepts,
+                "false_rejects": self.false_rejects,
+                "cpu_seconds": round(self._cpu_seconds, 2),
+                "listening_seconds": round(self._wall_seconds, 1),
+                "cpu_percent": round(cpu_percent, 1),
+                "vad": self.vad.stats() if self.vad else None
+            }
@@ -0,0 +1,116 @@
+# weather_cache.py
+import time
+import threading
+from concurrent.futures import Future
+
+
+class WeatherCache:
+    """Cache pogody per miasto z TTL, stale-while-revalidate i łączeniem równoległych zapytań.
+
+    - świeży wpis (młodszy niż `ttl`) zwracany jest od razu,
+    - nieświeży (młodszy niż `stale_ttl`) też, ale w tle startuje odświeżenie,
+    - brak wpisu: jedno zapytanie do API, na które czekają wszyscy pytający o to samo miasto.
+    Odpowiedzi z błędem nie są zapamiętywane.
+    """
+
+    def __init__(self, fetch, default_city, ttl=600.0, stale_ttl=3600.0):
+        self._fetch = fetch
+        self.default_city = default_city
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = {}   # klucz -> (payload, czas pobrania)
+        self._inflight = {}  # klucz -> Future
+        self._lock = threading.Lock()
+        self._refresher = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def _key(self, city):
+        return (city or self.default_city).strip().lower()
+
+    def get(self, city=None):
+        """Zwróć (payload, wiek_w_sekundach, status), gdzie status to "hit", "stale" albo "miss"."""
+        key = self._key(city)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                payload, fetched_at = entry
+                age = now - fetched_at
+                if age < self.ttl:
+                    self.hits += 1
+                    return payload, age, "hit"
+                if age < self.stale_ttl:
+                    self.stale_hits += 1
+                    self._start_fetch(key, city, background=True)
+                    return payload, age, "stale"
+            self.misses += 1
+            future, leader = self._start_fetch(key, city, background=False)
+        if leader:
+            self._run_fetch(key, city, future)
+        return future.result(), 0.0, "miss"
+
+    def refresh(self, city=None):
+        """Wymuś pobranie świeżych danych (łączone z trwającym zapytaniem o to samo miasto)."""
+        key = self._key(city)
+        with self._lock:
+            future, leader = self._start_fetch(key, city, background=False)
+        if leader:
+            self._run_fetch(key, city, future)
+        return future.result()
+
+    def _start_fetch(self, key, city, background):
+        # Wywoływane z założoną blokadą; zwraca (future, czy_ten_wątek_ma_pobrać)
+        future = self._inflight.get(key)
+        if future is not None:
+            return future, False
+        future = Future()
+        self._inflight[key] = future
+        if background:
+            threading.Thread(target=self._run_fetch, args=(key, city, future), daemon=True).start()
+            return future, False
+        return future, True
+
+    def _run_fetch(self, key, city, future):
+        try:
+            payload = self._fetch(city)
+        except Exception as e:
+            payload = {"error": f"Błąd pogody: {e}"}
+        with self._lock:
+            self.refreshes += 1
+            if "error" in payload:
+                self.errors += 1
+            else:
+                self._entries[key] = (payload, time.monotonic())
+            self._inflight.pop(key, None)
+        future.set_result(payload)
+
+    def start_refresher(self, interval=None):
+        """Odświeżaj domyślne miasto w tle, zanim wpis się zestarzeje."""
+        if self._refresher is not None:
+            return self._refresher
+        interval = interval or max(30.0, self.ttl * 0.8)
+
+        def _loop():
+            while True:
+                self.refresh(self.default_city)
+                time.sleep(interval)
+
+        self._refresher = threading.Thread(target=_loop, name="weather-refresher", daemon=True)
+        self._refresher.start()
+        return self._refresher
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "errors": self.errors,
+                "entries": len(self._entries),
+                "ttl": self.ttl
+            }
@@ -0,0 +1,13 @@
+# wsgi.py
+"""Punkt wejścia dla serwera produkcyjnego (gunicorn z wątkami).
+
+    gunicorn --chdir backend --worker-class gthread -w 1 --threads 100 -b 0.0.0.0:5000 wsgi:app
+
+Dokładnie jeden proces roboczy: mikrofon, harmonogram i sesje Socket.IO
+żyją w pamięci procesu. Socket.IO działa w trybie wątkowym, WebSocket
+obsługuje simple-websocket.
+"""
+import app as server
+
+server.start_background_services()
+app = server.app
@@ -1,7 +1,52 @@
+// Procesor AudioWorklet: uśrednia próbki mikrofonu do 16 kHz i wysyła 100 ms kawałki PCM int16
+const BROWSER_MIC_WORKLET = `
+class PcmDownsampler extends AudioWorkletProcessor {
+    constructor() {
+        super();
+        this.ratio = sampleRate / 16000;
+        this.phase = 0;
+        this.sum = 0;
+        this.count = 0;
+        this.chunk = new Int16Array(1600);
+        this.length = 0;
+    }
+
+    process(inputs) {
+        const input = inputs[0] && inputs[0][0];
+        if (!input) return true;
+        for (let i = 0; i < input.length; i++) {
+            this.sum += input[i];
+            this.count++;
+            this.phase += 1;
+            if (this.phase < this.ratio) continue;
+            this.phase -= this.ratio;
+            const value = Math.max(-1, Math.min(1, this.sum / this.count));
+            this.chunk[this.length++] = value * 0x7fff;
+            this.sum = 0;
+            this.count = 0;
+            if (this.length === this.chunk.length) {
+                this.port.postMessage(this.chunk.buffer, [this.chunk.buffer]);
+                this.chunk = new Int16Array(1600);
+                this.length = 0;
+            }
+        }
+        return true;
+    }
+}
+registerProcessor('pcm-downsampler', PcmDownsampler);
+`;
+const BROWSER_MIC_MAX_IN_FLIGHT = 5; // niepotwierdzone kawałki (po 100 ms) w drodze do serwera
+let browserMicNodes = null; // strumień i AudioContext poza danymi Alpine (bez proxy reaktywności)
+
 document.addEventListener('alpine:init', () => {
     Alpine.data('app', () => ({
         listening: false,
+        browserMic: false,
+        browserMicText: '', // bieżąca hipoteza rozpoznawania z mikrofonu przeglądarki
+        micInFlight: 0,
+        micDropped: 0,
         conversation: [],
+        conversationCursor: null, // seq ostatniego wpisu z logu rozmowy
         weather: {
             city: "Ładowanie...",
             icon: "☀️",
@@ -15,6 +60,7 @@ document.addEventListener('alpine:init', () => {
             cpu: 0,
             ram: 0
         },
+        latency: {}, // etap -> {last, p50, p95} (ms), gdy serwer ma METRICS_DEBUG=1
         notes: [],
         alarms: [],
         reminders: [],
@@ -29,6 +75,12 @@ document.addEventListener('alpine:init', () => {
         addingNote: false,
         newNoteText: '',
         status: "Połączono",
+        jobLabels: {
+            speak: "Mowa",
+            voice_note: "Notatka głosowa",
+            read_notes: "Czytanie notatek",
+            browser_command: "Komenda"
+        },
         settings: {
             city: "",
             mac: ""
@@ -36,18 +88,101 @@ document.addEventListener('alpine:init', () => {
         showSettingsModal: false,
         notification: { show: false, text: '', type: 'success' },
 
+        mergeLoggedMessage(entry) {
+            if (this.conversation.some(m => m.seq === entry.seq)) return;
+            // Odpowiedź strumieniowana mogła dotrzeć tylko w części przed rozłączeniem
+            const existing = entry.id && this.conversation.find(m => m.id === entry.id);
+            if (existing) {
+                Object.assign(existing, entry, { done: true });
+            } else {
+                this.conversation.push(entry);
+            }
+            this.advanceConversationCursor(entry.seq);
+        },
+
+        advanceConversationCursor(seq) {
+            if (seq && (this.conversationCursor === null || seq > this.conversationCursor)) {
+                this.conversationCursor = seq;
+            }
+        },
+
+        fetchConversation() {
+            // Dociąga brakujące wpisy stronami, gdy przerwa była dłuższa niż jedna paczka synchronizacji
+            fetch(`/api/conversation?after=${this.conversationCursor}&limit=200`)
+                .then(response => response.json())
+                .then(data => {
+                    if (data.reset) {
+                        // Brakujące wpisy wypadły już z logu - historia od nowa, od najnowszych wpisów
+                        this.conversation = [];
+                        this.conversationCursor = null;
+                    }
+                    data.entries.forEach(entry => this.mergeLoggedMessage(entry));
+                    if (data.more && data.entries.length > 0 && !data.reset) {
+                        this.fetchConversation();
+                    } else {
+                        this.scrollConversation();
+                    }
+                })
+                .catch(error => console.error("Błąd pobierania historii rozmowy:", error));
+        },
+
+        scrollConversation() {
+            // Auto-przewijanie
+            setTimeout(() => {
+                const container = document.querySelector('.conversation-container');
+                container.scrollTop = container.scrollHeight;
+            }, 100);
+        },
+
         init() {
             // Połączenie z WebSocket
-            this.socket = io();
+            // Po ponownym połączeniu serwer dosyła tylko wpisy nowsze niż kursor
+            this.socket = io({
+                auth: (cb) => cb(this.conversationCursor === null ? {} : { conversation_cursor: this.conversationCursor })
+            });
             
             // Nasłuchiwanie aktualizacji konwersacji
             this.socket.on('conversation_update', (message) => {
-                this.conversation.push(message);
-                // Auto-przewijanie
-                setTimeout(() => {
-                    const container = document.querySelector('.conversation-container');
-                    container.scrollTop = container.scrollHeight;
-                }, 100);
+                // Odpowiedzi strumieniowane przychodzą jako kolejne fragmenty z tym samym id
+                const existing = message.id && this.conversation.find(m => m.id === message.id);
+                if (existing) {
+                    existing.text += message.text;
+                    existing.done = message.done;
+                    if (message.seq) existing.seq = message.seq;
+                } else {
+                    this.conversation.push(message);
+                }
+                this.advanceConversationCursor(message.seq);
+                this.scrollConversation();
+            });
+
+            // Synchronizacja logu rozmowy przy (ponownym) połączeniu
+            this.socket.on('conversation_sync', (data) => {
+                if (data.reset) {
+                    // Pierwsze połączenie albo kursor starszy niż zachowany log - pełne przeładowanie
+                    this.conversation = [];
+                    this.conversationCursor = null;
+                }
+                data.entries.forEach(entry => this.mergeLoggedMessage(entry));
+                if (data.more && !data.reset) {
+                    this.fetchConversation();
+                }
+                this.scrollConversation();
+            });
+            
+            // Wyniki rozpoznawania mowy z mikrofonu tej przeglądarki (tylko dla tego klienta)
+            this.socket.on('stt_partial', (data) => {
+                this.browserMicText = data.text;
+            });
+            this.socket.on('stt_result', () => {
+                this.browserMicText = '';
+            });
+            // Nowe połączenie to nowa sesja po stronie serwera
+            this.socket.on('connect', () => {
+                if (this.browserMic) {
+                    this.micInFlight = 0;
+                    this.socket.emit('stt_start', { sample_rate: 16000 });
+                }
             });
             
             // Nasłuchiwanie statusu nasłuchiwania
@@ -61,7 +196,25 @@ document.addEventListener('alpine:init', () => {
                     this.newNoteText = text;
                 }
             });
-            
+
+            // Statusy długich zadań (mowa, notatka głosowa, komendy z mikrofonu przeglądarki)
+            this.socket.on('job_update', (job) => {
+                const label = this.jobLabels[job.name] || job.name;
+                if (job.status === 'rejected' || job.status === 'failed') {
+                    this.status = `${label}: błąd`;
+                    this.showNotification(job.error || `${label}: nie udało się wykonać zadania`, "error");
+                    if (job.name === 'voice_note') {
+                        this.newNoteText = '';
+                    }
+                } else if (job.status === 'done' || job.status === 'cancelled') {
+                    this.status = "Połączono";
+                } else if (job.message === 'listening') {
+                    this.status = `${label}: słucham...`;
+                } else {
+                    this.status = job.status === 'queued' ? `${label}: w kolejce` : `${label}...`;
+                }
+            });
+
             // Nasłuchiwanie alarmów
             this.socket.on('alarm_triggered', (alarm) => {
                 this.conversation.push({
@@ -71,23 +224,24 @@ document.addEventListener('alpine:init', () => {
                 });
             });
             
-            // Pobierz początkową pogodę
-            this.refreshWeather();
-            
-            // Pobierz notatki
-            this.loadNotes();
-            
-            // Pobierz budziki
-            this.loadAlarms();
-            
-            // Pobierz przypomnienia
-            this.loadReminders();
+            // Pogoda, notatki, budziki, przypomnienia i ustawienia jednym zapytaniem
+            this.loadBootstrap();
             
             // Uruchom monitor systemu
             this.startSystemMonitor();
+        },
 
-            // Pobierz ustawienia
-            this.loadSettings();
+        loadBootstrap() {
+            fetch('/api/bootstrap')
+                .then(response => response.json())
+                .then(data => {
+                    this.applyWeather(data.weather);
+                    this.notes = data.notes;
+                    this.alarms = data.alarms;
+                    this.reminders = data.reminders;
+                    this.settings = { ...this.settings, ...data.settings };
+                })
+                .catch(error => console.error("Błąd ładowania stanu paneli:", error));
         },
         
         toggleListening() {
@@ -99,31 +253,94 @@ document.addEventListener('alpine:init', () => {
             }
         },
         
+        toggleBrowserMic() {
+            if (this.browserMic) {
+                this.stopBrowserMic();
+            } else {
+                this.startBrowserMic();
+            }
+        },
+
+        startBrowserMic() {
+            this.socket.emit('stt_start', { sample_rate: 16000 }, (reply) => {
+                if (!reply || !reply.ok) {
+                    this.showNotification((reply && reply.error) || "Nie udało się rozpocząć rozpoznawania", "error");
+                    return;
+                }
+                navigator.mediaDevices.getUserMedia({ audio: { channelCount: 1, echoCancellation: true, noiseSuppression: true } })
+                    .then(stream => {
+                        const context = new AudioContext();
+                        const url = URL.createObjectURL(new Blob([BROWSER_MIC_WORKLET], { type: 'application/javascript' }));
+                        return context.audioWorklet.addModule(url).then(() => {
+                            const node = new AudioWorkletNode(context, 'pcm-downsampler', { numberOfOutputs: 0 });
+                            node.port.onmessage = (event) => this.sendMicChunk(event.data);
+                            context.createMediaStreamSource(stream).connect(node);
+                            browserMicNodes = { stream, context };
+                            this.micDropped = 0;
+                            this.browserMic = true;
+                        });
+                    })
+                    .catch(error => {
+                        console.error("Błąd mikrofonu przeglądarki:", error);
+                        this.socket.emit('stt_stop');
+                        this.showNotification("Brak dostępu do mikrofonu przeglądarki", "error");
+                    });
+            });
+        },
+
+        sendMicChunk(buffer) {
+            // Backpressure: gdy serwer nie nadąża, nadmiarowe kawałki są pomijane zamiast rosnącej kolejki
+            if (this.micInFlight >= BROWSER_MIC_MAX_IN_FLIGHT) {
+                this.micDropped++;
+                return;
+            }
+            this.micInFlight++;
+            this.socket.emit('stt_audio', buffer, (reply) => {
+                this.micInFlight = Math.max(0, this.micInFlight - 1);
+                if (reply && !reply.ok) this.micDropped++;
+            });
+        },
+
+        stopBrowserMic() {
+            if (browserMicNodes) {
+                browserMicNodes.stream.getTracks().forEach(track => track.stop());
+                browserMicNodes.context.close();
+                browserMicNodes = null;
+            }
+            this.browserMic = false;
+            this.browserMicText = '';
+            this.micInFlight = 0;
+            this.socket.emit('stt_stop');
+        },
+        
         refreshWeather() {
             fetch('/api/weather')
                 .then(response => response.json())
-                .then(data => {
-                    this.weather = data;
-                    // Aktualizuj ikonę
-                    const icons = {
-                        "01d": "☀️", "01n": "🌙", "02d": "⛅", "02n": "☁️",
-                        "03d": "☁️", "03n": "☁️", "04d": "☁️", "04n": "☁️",
-                        "09d": "🌧️", "09n": "🌧️", "10d": "🌦️", "10n": "🌧️",
-                        "11d": "⛈️", "11n": "⛈️", "13d": "❄️", "13n": "❄️",
-                        "50d": "🌫️", "50n": "🌫️"
-                    };
-                    this.weather.icon = icons[data.icon] || "☀️";
-                });
+                .then(data => this.applyWeather(data));
+        },
+
+        applyWeather(data) {
+            this.weather = data;
+            // Aktualizuj ikonę
+            const icons = {
+                "01d": "☀️", "01n": "🌙", "02d": "⛅", "02n": "☁️",
+                "03d": "☁️", "03n": "☁️", "04d": "☁️", "04n": "☁️",
+                "09d": "🌧️", "09n": "🌧️", "10d": "🌦️", "10n": "🌧️",
+                "11d": "⛈️", "11n": "⛈️", "13d": "❄️", "13n": "❄️",
+                "50d": "🌫️", "50n": "🌫️"
+            };
+            this.weather.icon = icons[data.icon] || "☀️";
         },
         
         startSystemMonitor() {
-            setInterval(() => {
-                fetch('/api/system')
-                    .then(response => response.json())
-                    .then(data => {
-                        this.system = data;
-                    });
-            }, 2000);
+            // Stan początkowy serwer wysyła po połączeniu, dalej tylko istotne zmiany
+            this.socket.on('system_stats', (data) => {
+                this.system = data;
+            });
+            // Podsumowanie opóźnień etapów (tylko w trybie diagnostycznym serwera)
+            this.socket.on('latency_stats', (data) => {
+                this.latency = data;
+            });
         },
         
         wakeComputer() {